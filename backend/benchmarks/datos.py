@@ -0,0 +1,169 @@
+"""
+Generador de datos sintéticos reproducibles para los benchmarks.
+
+Con la misma semilla y los mismos volúmenes genera exactamente las mismas filas: propiedades,
+años de reservas sin superposición por propiedad (con cancelaciones, plataformas e ids
+externos de canal), categorías, movimientos de caja en ARS y USD y una cotización ARS/USD
+por día hábil. Al final reconstruye el resumen mensual, como después de una carga histórica.
+"""
+import random
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from src.models import (
+    CategoriaMovimiento, MovimientoCaja, Propiedad, Reserva, TipoCambio,
+    EstadoReservaEnum, MonedaEnum, PlataformaEnum, SocioEnum, TipoMovimientoEnum,
+)
+from src.services.resumen_mensual import reconstruir_resumen_mensual
+
+LOTE = 5000
+
+CATEGORIAS = [
+    ("Alquiler", TipoMovimientoEnum.INGRESO),
+    ("Seña", TipoMovimientoEnum.INGRESO),
+    ("Limpieza extra", TipoMovimientoEnum.INGRESO),
+    ("Limpieza", TipoMovimientoEnum.EGRESO),
+    ("Mantenimiento", TipoMovimientoEnum.EGRESO),
+    ("Servicios", TipoMovimientoEnum.EGRESO),
+    ("Impuestos", TipoMovimientoEnum.EGRESO),
+    ("Comisiones", TipoMovimientoEnum.EGRESO),
+    ("Blanquería", TipoMovimientoEnum.EGRESO),
+    ("Retiro de socios", TipoMovimientoEnum.EGRESO),
+]
+
+# Proporciones aproximadas de la operación real
+PESO_PLATAFORMAS = {
+    PlataformaEnum.AIRBNB: 0.55,
+    PlataformaEnum.BOOKING: 0.25,
+    PlataformaEnum.PARTICULAR: 0.15,
+    PlataformaEnum.OTRO: 0.05,
+}
+PROPORCION_CANCELADAS = 0.06
+PROPORCION_USD = 0.3
+
+
+@dataclass
+class Volumen:
+    propiedades: int = 10
+    anios: int = 3
+    anio_final: int = date.today().year
+    movimientos: int = 200_000
+    semilla: int = 42
+
+    def como_dict(self) -> dict:
+        return asdict(self)
+
+
+def _insertar(db: Session, modelo, filas: List[dict]):
+    for inicio in range(0, len(filas), LOTE):
+        db.execute(insert(modelo), filas[inicio:inicio + LOTE])
+
+
+def _reservas(rnd: random.Random, propiedad_id: int, desde: date, hasta: date) -> List[dict]:
+    plataformas = list(PESO_PLATAFORMAS)
+    pesos = list(PESO_PLATAFORMAS.values())
+    filas = []
+    ingreso = desde + timedelta(days=rnd.randint(0, 6))
+    while ingreso < hasta:
+        noches = rnd.choices((1, 2, 3, 4, 5, 7, 10, 14), weights=(8, 20, 22, 16, 12, 12, 6, 4))[0]
+        salida = ingreso + timedelta(days=noches)
+        plataforma = rnd.choices(plataformas, weights=pesos)[0]
+        if rnd.random() < PROPORCION_CANCELADAS:
+            estado = EstadoReservaEnum.CANCELADA
+        else:
+            estado = rnd.choices(
+                (EstadoReservaEnum.CONFIRMADA, EstadoReservaEnum.COMPLETADA, EstadoReservaEnum.PENDIENTE),
+                weights=(60, 30, 10)
+            )[0]
+        total = round(noches * rnd.uniform(40, 160), 2)
+        filas.append({
+            "propiedad_id": propiedad_id,
+            "fecha_ingreso": ingreso,
+            "fecha_salida": salida,
+            "nombre_huesped": f"Huésped {propiedad_id}-{len(filas) + 1}",
+            "plataforma": plataforma,
+            "estado": estado,
+            "monto_total_usd": total,
+            "monto_sena_usd": round(total * 0.3, 2) if plataforma == PlataformaEnum.PARTICULAR else None,
+            "notas": None,
+            "id_externo": (
+                f"{plataforma.name.lower()}-{propiedad_id}-{len(filas) + 1}"
+                if plataforma in (PlataformaEnum.AIRBNB, PlataformaEnum.BOOKING) else None
+            ),
+        })
+        # Las canceladas liberan el período: la siguiente puede empezar el mismo día
+        siguiente = ingreso if estado == EstadoReservaEnum.CANCELADA else salida
+        ingreso = siguiente + timedelta(days=rnd.choices((0, 1, 2, 3, 5, 8), weights=(30, 25, 15, 12, 10, 8))[0])
+    return filas
+
+
+def generar(db: Session, volumen: Volumen) -> Dict[str, int]:
+    """
+    Carga los datos en una base con el esquema vacío y confirma la transacción.
+    Devuelve la cantidad de filas por tabla.
+    """
+    rnd = random.Random(volumen.semilla)
+    desde = date(volumen.anio_final - volumen.anios + 1, 1, 1)
+    hasta = date(volumen.anio_final + 1, 1, 1)
+
+    propiedad_ids = db.scalars(
+        insert(Propiedad).returning(Propiedad.id, sort_by_parameter_order=True),
+        [{"nombre": f"Propiedad {i + 1}", "descripcion": f"Unidad sintética {i + 1}"} for i in range(volumen.propiedades)]
+    ).all()
+
+    reservas: List[dict] = []
+    for propiedad_id in propiedad_ids:
+        reservas.extend(_reservas(rnd, propiedad_id, desde, hasta))
+    _insertar(db, Reserva, reservas)
+    reserva_ids = db.scalars(db.query(Reserva.id).order_by(Reserva.id).statement).all()
+
+    categorias = db.execute(
+        insert(CategoriaMovimiento).returning(CategoriaMovimiento.id, CategoriaMovimiento.tipo, sort_by_parameter_order=True),
+        [{"nombre": nombre, "tipo": tipo} for nombre, tipo in CATEGORIAS]
+    ).all()
+
+    socios = list(SocioEnum)
+    nombres = {categoria_id: CATEGORIAS[i][0] for i, (categoria_id, _) in enumerate(categorias)}
+    dias = (hasta - desde).days
+    movimientos = []
+    for _ in range(volumen.movimientos):
+        categoria_id, tipo = rnd.choice(categorias)
+        usd = rnd.random() < PROPORCION_USD
+        fecha = desde + timedelta(days=rnd.randrange(dias))
+        movimientos.append({
+            "fecha": fecha,
+            "tipo": tipo,
+            "categoria_id": categoria_id,
+            "descripcion": f"{nombres[categoria_id]} {fecha:%m/%Y}",
+            "monto": round(rnd.uniform(20, 900) if usd else rnd.uniform(5_000, 400_000), 2),
+            "moneda": MonedaEnum.DOLARES if usd else MonedaEnum.PESOS,
+            "tipo_cambio": round(rnd.uniform(800, 1400), 2) if usd else None,
+            "socio": rnd.choice(socios),
+            "relacionado_reserva_id": rnd.choice(reserva_ids) if reserva_ids and rnd.random() < 0.1 else None,
+        })
+    _insertar(db, MovimientoCaja, movimientos)
+
+    # Después de los movimientos, para no alterar la secuencia aleatoria de los datos anteriores
+    cotizacion = 800.0
+    tipos_cambio = []
+    for dia in range(dias):
+        fecha = desde + timedelta(days=dia)
+        if fecha.weekday() < 5:
+            cotizacion = round(cotizacion * rnd.uniform(0.998, 1.004), 2)
+            tipos_cambio.append({"fecha": fecha, "valor": cotizacion, "fuente": "Benchmark"})
+    _insertar(db, TipoCambio, tipos_cambio)
+
+    meses = reconstruir_resumen_mensual(db)
+    db.commit()
+    return {
+        "propiedades": len(propiedad_ids),
+        "reservas": len(reservas),
+        "categorias": len(categorias),
+        "movimientos": len(movimientos),
+        "tipos_cambio": len(tipos_cambio),
+        "meses_resumen": meses,
+    }
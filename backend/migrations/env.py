@@ -0,0 +1,45 @@
+"""
+Entorno de Alembic: usa la misma URL y los mismos modelos que la aplicación.
+
+    alembic upgrade head                                # aplicar migraciones pendientes
+    alembic revision --autogenerate -m "descripcion"    # nueva migración a partir de los modelos
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from src.db.database import SQLALCHEMY_DATABASE_URL, Base
+import src.models  # noqa: F401  (registra las tablas en Base.metadata)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    # Genera el SQL sin conectarse (alembic upgrade head --sql)
+    context.configure(
+        url=SQLALCHEMY_DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    conectable = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=pool.NullPool)
+    with conectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
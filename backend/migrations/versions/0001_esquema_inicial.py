@@ -0,0 +1,81 @@
+"""Esquema inicial: propiedades, reservas y caja
+
+Corresponde a las tablas que creaba Base.metadata.create_all al iniciar la aplicación. Una base
+creada de esa forma se marca como migrada con `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+PLATAFORMAS = ("AIRBNB", "BOOKING", "PARTICULAR", "OTRO")
+ESTADOS_RESERVA = ("CONFIRMADA", "PENDIENTE", "CANCELADA", "COMPLETADA")
+TIPOS_MOVIMIENTO = ("INGRESO", "EGRESO")
+MONEDAS = ("PESOS", "DOLARES")
+SOCIOS = ("MAXY", "OSO", "LAURA", "TODOS")
+
+
+def upgrade():
+    op.create_table(
+        "propiedades",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nombre", sa.String(), nullable=False),
+        sa.Column("descripcion", sa.String(), nullable=True),
+    )
+    op.create_index("ix_propiedades_id", "propiedades", ["id"])
+
+    op.create_table(
+        "reservas",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("fecha_ingreso", sa.Date(), nullable=False),
+        sa.Column("fecha_salida", sa.Date(), nullable=False),
+        sa.Column("nombre_huesped", sa.String(), nullable=False),
+        sa.Column("plataforma", sa.Enum(*PLATAFORMAS, name="plataformaenum"), nullable=False),
+        sa.Column("estado", sa.Enum(*ESTADOS_RESERVA, name="estadoreservaenum"), nullable=True),
+        sa.Column("monto_total_usd", sa.Float(), nullable=False),
+        sa.Column("monto_sena_usd", sa.Float(), nullable=True),
+        sa.Column("notas", sa.String(), nullable=True),
+        sa.Column("propiedad_id", sa.Integer(), sa.ForeignKey("propiedades.id"), nullable=True),
+    )
+    op.create_index("ix_reservas_id", "reservas", ["id"])
+
+    op.create_table(
+        "categorias_movimiento",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nombre", sa.String(), nullable=False, unique=True),
+        sa.Column("descripcion", sa.String(), nullable=True),
+        sa.Column("tipo", sa.Enum(*TIPOS_MOVIMIENTO, name="tipomovimientoenum"), nullable=False),
+    )
+    op.create_index("ix_categorias_movimiento_id", "categorias_movimiento", ["id"])
+
+    op.create_table(
+        "movimientos_caja",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("fecha", sa.Date(), nullable=False),
+        sa.Column("tipo", postgresql.ENUM(name="tipomovimientoenum", create_type=False), nullable=False),
+        sa.Column("categoria_id", sa.Integer(), sa.ForeignKey("categorias_movimiento.id"), nullable=False),
+        sa.Column("descripcion", sa.Text(), nullable=True),
+        sa.Column("monto", sa.Float(), nullable=False),
+        sa.Column("moneda", sa.Enum(*MONEDAS, name="monedaenum"), nullable=False),
+        sa.Column("tipo_cambio", sa.Float(), nullable=True),
+        sa.Column("socio", sa.Enum(*SOCIOS, name="socioenum"), nullable=False),
+        sa.Column("relacionado_reserva_id", sa.Integer(), sa.ForeignKey("reservas.id"), nullable=True),
+    )
+    op.create_index("ix_movimientos_caja_id", "movimientos_caja", ["id"])
+
+
+def downgrade():
+    op.drop_table("movimientos_caja")
+    op.drop_table("categorias_movimiento")
+    op.drop_table("reservas")
+    op.drop_table("propiedades")
+    for nombre in ("socioenum", "monedaenum", "tipomovimientoenum", "estadoreservaenum", "plataformaenum"):
+        op.execute(f"DROP TYPE IF EXISTS {nombre}")
@@ -0,0 +1,25 @@
+"""Fecha de última modificación de propiedades y reservas
+
+actualizado_en en propiedades y reservas, para el ETag del calendario y del feed iCal.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("propiedades", sa.Column("actualizado_en", sa.DateTime(), nullable=False, server_default=sa.func.now()))
+    op.add_column("reservas", sa.Column("actualizado_en", sa.DateTime(), nullable=False, server_default=sa.func.now()))
+
+
+def downgrade():
+    op.drop_column("reservas", "actualizado_en")
+    op.drop_column("propiedades", "actualizado_en")
@@ -0,0 +1,31 @@
+"""Resumen mensual de caja
+
+Tabla resumen_mensual_caja con los totales de cada mes. En una base con datos se completa
+después de migrar con `python -m src.services.resumen_mensual`.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "resumen_mensual_caja",
+        sa.Column("anio", sa.Integer(), primary_key=True),
+        sa.Column("mes", sa.Integer(), primary_key=True),
+        sa.Column("total_ingresos_pesos", sa.Float(), nullable=False),
+        sa.Column("total_egresos_pesos", sa.Float(), nullable=False),
+        sa.Column("reservas_total", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("resumen_mensual_caja")
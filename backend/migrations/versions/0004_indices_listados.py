@@ -0,0 +1,36 @@
+"""Índices de listados
+
+Índices compuestos para la paginación por (fecha, id) de reservas y movimientos de caja.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_reservas_fecha_ingreso_id", "reservas", ["fecha_ingreso", "id"])
+    op.create_index("ix_reservas_propiedad_fecha_ingreso_id", "reservas", ["propiedad_id", "fecha_ingreso", "id"])
+    op.create_index("ix_reservas_plataforma_fecha_ingreso_id", "reservas", ["plataforma", "fecha_ingreso", "id"])
+
+    op.create_index("ix_movimientos_caja_fecha_id", "movimientos_caja", ["fecha", "id"])
+    op.create_index("ix_movimientos_caja_socio_fecha_id", "movimientos_caja", ["socio", "fecha", "id"])
+    op.create_index("ix_movimientos_caja_moneda_fecha_id", "movimientos_caja", ["moneda", "fecha", "id"])
+    op.create_index("ix_movimientos_caja_categoria_fecha_id", "movimientos_caja", ["categoria_id", "fecha", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_movimientos_caja_categoria_fecha_id", table_name="movimientos_caja")
+    op.drop_index("ix_movimientos_caja_moneda_fecha_id", table_name="movimientos_caja")
+    op.drop_index("ix_movimientos_caja_socio_fecha_id", table_name="movimientos_caja")
+    op.drop_index("ix_movimientos_caja_fecha_id", table_name="movimientos_caja")
+
+    op.drop_index("ix_reservas_plataforma_fecha_ingreso_id", table_name="reservas")
+    op.drop_index("ix_reservas_propiedad_fecha_ingreso_id", table_name="reservas")
+    op.drop_index("ix_reservas_fecha_ingreso_id", table_name="reservas")
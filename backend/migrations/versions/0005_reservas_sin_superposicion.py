@@ -0,0 +1,31 @@
+"""No superposición de reservas
+
+Restricción de exclusión GiST que impide reservas superpuestas de una misma propiedad
+(requiere btree_gist). Las canceladas no ocupan la propiedad: la restricción se crea
+directamente con esa condición, así una base con una estadía cancelada en las mismas fechas
+que la reserva que la reemplazó puede migrar. Falla si la base ya tiene reservas activas
+superpuestas: hay que corregirlas antes de migrar.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE reservas ADD CONSTRAINT reservas_sin_superposicion EXCLUDE USING gist ("
+        "propiedad_id WITH =, daterange(fecha_ingreso, fecha_salida, '[)') WITH &&"
+        ") WHERE (estado IS DISTINCT FROM 'CANCELADA')"
+    )
+
+
+def downgrade():
+    op.execute("ALTER TABLE reservas DROP CONSTRAINT reservas_sin_superposicion")
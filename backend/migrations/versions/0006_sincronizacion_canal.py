@@ -0,0 +1,45 @@
+"""Sincronización con canales
+
+- reservas.id_externo, único por plataforma.
+- Tabla sincronizaciones_canal: publicación de cada propiedad en cada canal y su marca de agua.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("reservas", sa.Column("id_externo", sa.String(), nullable=True))
+    op.create_index("ux_reservas_plataforma_id_externo", "reservas", ["plataforma", "id_externo"], unique=True)
+
+    op.create_table(
+        "sincronizaciones_canal",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("propiedad_id", sa.Integer(), sa.ForeignKey("propiedades.id"), nullable=False),
+        sa.Column(
+            "plataforma",
+            postgresql.ENUM(name="plataformaenum", create_type=False),
+            nullable=False
+        ),
+        sa.Column("id_externo", sa.String(), nullable=False),
+        sa.Column("ultima_modificacion", sa.DateTime(), nullable=True),
+        sa.Column("ultima_sincronizacion", sa.DateTime(), nullable=True),
+        sa.Column("ultimo_error", sa.String(), nullable=True),
+        sa.UniqueConstraint("propiedad_id", "plataforma", name="uq_sincronizaciones_canal_propiedad_plataforma"),
+    )
+    op.create_index("ix_sincronizaciones_canal_id", "sincronizaciones_canal", ["id"])
+
+
+def downgrade():
+    op.drop_table("sincronizaciones_canal")
+    op.drop_index("ux_reservas_plataforma_id_externo", table_name="reservas")
+    op.drop_column("reservas", "id_externo")
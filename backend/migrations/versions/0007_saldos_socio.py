@@ -0,0 +1,32 @@
+"""Puntos de control mensuales del libro de socios
+
+Tabla saldos_socio con el saldo acumulado de cada socio y moneda al cierre de cada mes. Se
+completa sola a medida que se consulta el libro; no hace falta cargarla después de migrar.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "saldos_socio",
+        sa.Column("anio", sa.Integer(), primary_key=True),
+        sa.Column("mes", sa.Integer(), primary_key=True),
+        sa.Column("socio", postgresql.ENUM(name="socioenum", create_type=False), primary_key=True),
+        sa.Column("moneda", postgresql.ENUM(name="monedaenum", create_type=False), primary_key=True),
+        sa.Column("saldo", sa.Float(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("saldos_socio")
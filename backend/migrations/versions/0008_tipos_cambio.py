@@ -0,0 +1,30 @@
+"""Tabla de tipos de cambio ARS/USD
+
+Cotizaciones por fecha (pesos por dólar). Cada una rige desde su fecha hasta la siguiente; se
+usan por defecto en los movimientos en dólares sin tipo de cambio y para llevar los reportes a
+una sola moneda.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tipos_cambio",
+        sa.Column("fecha", sa.Date(), primary_key=True),
+        sa.Column("valor", sa.Float(), nullable=False),
+        sa.Column("fuente", sa.String(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("tipos_cambio")
@@ -0,0 +1,51 @@
+"""Índices de búsqueda de texto en reservas y movimientos de caja
+
+- Extensión pg_trgm.
+- Índices GIN sobre el documento tsvector de reservas (nombre_huesped y notas) y de movimientos
+  (descripcion), y de trigramas sobre reservas.nombre_huesped y movimientos_caja.descripcion.
+  Todos sin acentos y con las mismas expresiones que src/models/busqueda.py.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+CON_ACENTO = "ÁÀÂÄÉÈÊËÍÌÎÏÓÒÔÖÚÙÛÜÑÇáàâäéèêëíìîïóòôöúùûüñç"
+SIN_ACENTO = "AAAAEEEEIIIIOOOOUUUUNCaaaaeeeeiiiioooouuuunc"
+
+
+def _sin_acentos(expresion: str) -> str:
+    return f"translate({expresion}, '{CON_ACENTO}', '{SIN_ACENTO}')"
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    nombre = _sin_acentos("nombre_huesped")
+    notas = _sin_acentos("coalesce(notas, '')")
+    descripcion = _sin_acentos("descripcion")
+
+    op.execute(
+        "CREATE INDEX ix_reservas_busqueda ON reservas USING gin "
+        f"(to_tsvector('simple'::regconfig, {nombre} || ' ' || {notas}))"
+    )
+    op.execute(f"CREATE INDEX ix_reservas_nombre_huesped_trgm ON reservas USING gin ({nombre} gin_trgm_ops)")
+
+    op.execute(
+        "CREATE INDEX ix_movimientos_caja_busqueda ON movimientos_caja USING gin "
+        f"(to_tsvector('simple'::regconfig, coalesce({descripcion}, '')))"
+    )
+    op.execute(f"CREATE INDEX ix_movimientos_caja_descripcion_trgm ON movimientos_caja USING gin ({descripcion} gin_trgm_ops)")
+
+
+def downgrade():
+    op.drop_index("ix_movimientos_caja_descripcion_trgm", table_name="movimientos_caja")
+    op.drop_index("ix_movimientos_caja_busqueda", table_name="movimientos_caja")
+    op.drop_index("ix_reservas_nombre_huesped_trgm", table_name="reservas")
+    op.drop_index("ix_reservas_busqueda", table_name="reservas")
@@ -0,0 +1,34 @@
+"""Registro de ejecuciones de tareas programadas
+
+Una fila por ejecución de cada tarea de services.tareas, de cualquier worker. La última
+ejecución de cada tarea decide si otro worker todavía tiene que ejecutarla.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ejecuciones_tarea",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tarea", sa.String(), nullable=False),
+        sa.Column("inicio", sa.DateTime(), nullable=False),
+        sa.Column("duracion_ms", sa.Float(), nullable=False),
+        sa.Column("filas", sa.Integer(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+    )
+    op.create_index("ix_ejecuciones_tarea_id", "ejecuciones_tarea", ["id"])
+    op.create_index("ix_ejecuciones_tarea_tarea_inicio", "ejecuciones_tarea", ["tarea", "inicio"])
+
+
+def downgrade():
+    op.drop_table("ejecuciones_tarea")
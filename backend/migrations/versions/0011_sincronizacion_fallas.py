@@ -0,0 +1,28 @@
+"""Corridas con fallas de cada publicación sincronizada
+
+sincronizaciones_canal.corridas_con_fallas cuenta las corridas seguidas en que la marca de
+agua quedó retenida por reservas que no pudieron aplicarse; al llegar a
+SYNC_CORRIDAS_CON_FALLAS_MAXIMAS la marca avanza igual (services.canales).
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "sincronizaciones_canal",
+        sa.Column("corridas_con_fallas", sa.Integer(), nullable=False, server_default="0")
+    )
+
+
+def downgrade():
+    op.drop_column("sincronizaciones_canal", "corridas_con_fallas")
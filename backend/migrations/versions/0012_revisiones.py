@@ -0,0 +1,36 @@
+"""Revisión de reservas y propiedades
+
+- Tabla revisiones: contador que cada transacción que escribe en reservas o propiedades
+  incrementa antes de su primera escritura (models.revision).
+- reservas.revision y propiedades.revision: revisión de la última escritura de cada fila. Las
+  filas existentes quedan en 0.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    revisiones = op.create_table(
+        "revisiones",
+        sa.Column("nombre", sa.String(), primary_key=True),
+        sa.Column("valor", sa.BigInteger(), nullable=False),
+    )
+    op.bulk_insert(revisiones, [{"nombre": "reservas", "valor": 0}])
+
+    op.add_column("reservas", sa.Column("revision", sa.BigInteger(), nullable=False, server_default="0"))
+    op.add_column("propiedades", sa.Column("revision", sa.BigInteger(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    op.drop_column("propiedades", "revision")
+    op.drop_column("reservas", "revision")
+    op.drop_table("revisiones")
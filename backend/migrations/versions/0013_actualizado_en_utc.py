@@ -0,0 +1,31 @@
+"""actualizado_en en UTC
+
+propiedades.actualizado_en y reservas.actualizado_en pasan a guardarse en UTC (el feed iCal
+las publica como DTSTAMP con sufijo Z). Las filas existentes, escritas por now() en la zona
+horaria de la sesión, se convierten con la zona de la sesión que migra, que debe ser la misma
+que usa la aplicación.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+TABLAS = ("propiedades", "reservas")
+
+
+def upgrade():
+    for tabla in TABLAS:
+        op.execute(f"ALTER TABLE {tabla} ALTER COLUMN actualizado_en SET DEFAULT timezone('UTC', now())")
+        op.execute(f"UPDATE {tabla} SET actualizado_en = timezone('UTC', actualizado_en::timestamptz)")
+
+
+def downgrade():
+    for tabla in TABLAS:
+        op.execute(f"UPDATE {tabla} SET actualizado_en = timezone('UTC', actualizado_en)::timestamp")
+        op.execute(f"ALTER TABLE {tabla} ALTER COLUMN actualizado_en SET DEFAULT now()")
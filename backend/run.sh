@@ -4,7 +4,8 @@
 # Activar el entorno virtual
 source venv/bin/activate
 
-# Ejecutar la aplicación
+# Aplicar migraciones pendientes y ejecutar la aplicación
+alembic upgrade head
 uvicorn src.main:app --reload
 
 # Nota: para salir del entorno virtual cuando termines, ejecuta 'deactivate'
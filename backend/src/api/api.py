@@ -1,10 +1,19 @@
 from fastapi import APIRouter
-from .endpoints import propiedades, reservas, categorias, caja, integraciones
+from .endpoints import propiedades, reservas, categorias, caja, tipos_cambio, integraciones, analitica, busqueda
 
 api_router = APIRouter()
 
-api_router.include_router(propiedades.router, prefix="/propiedades", tags=["propiedades"])
-api_router.include_router(reservas.router, prefix="/reservas", tags=["reservas"])
-api_router.include_router(categorias.router, prefix="/categorias", tags=["categorias"])
-api_router.include_router(caja.router, prefix="/caja", tags=["caja"])
-api_router.include_router(integraciones.router, prefix="/integraciones", tags=["integraciones"])
\ No newline at end of file
+# (prefijo, router) de cada módulo; también lo usa el middleware de métricas para etiquetar las rutas
+ROUTERS = [
+    ("/propiedades", propiedades.router),
+    ("/reservas", reservas.router),
+    ("/categorias", categorias.router),
+    ("/caja", caja.router),
+    ("/tipos-cambio", tipos_cambio.router),
+    ("/integraciones", integraciones.router),
+    ("/analitica", analitica.router),
+    ("/buscar", busqueda.router),
+]
+
+for prefijo, router in ROUTERS:
+    api_router.include_router(router, prefix=prefijo, tags=[prefijo.strip("/")])
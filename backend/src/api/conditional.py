@@ -0,0 +1,56 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+
+def calcular_etag(*partes: Any) -> str:
+    """
+    Genera un ETag débil a partir de los valores que identifican una representación.
+    """
+    huella = "|".join("" if parte is None else str(parte) for parte in partes)
+    return f'W/"{hashlib.sha1(huella.encode("utf-8")).hexdigest()}"'
+
+
+def formatear_http_date(valor: Optional[datetime]) -> Optional[str]:
+    if valor is None:
+        return None
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return format_datetime(valor.astimezone(timezone.utc), usegmt=True)
+
+
+def no_modificado(request: Request, etag: str, ultima_modificacion: Optional[datetime] = None) -> bool:
+    """
+    Evalúa If-None-Match / If-Modified-Since. If-None-Match tiene prioridad cuando está presente.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidatos = [c.strip() for c in if_none_match.split(",")]
+        return "*" in candidatos or etag in candidatos or etag.removeprefix("W/") in candidatos
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and ultima_modificacion is not None:
+        try:
+            desde = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if ultima_modificacion.tzinfo is None:
+            ultima_modificacion = ultima_modificacion.replace(tzinfo=timezone.utc)
+        return ultima_modificacion.replace(microsecond=0) <= desde
+
+    return False
+
+
+def cabeceras_cache(etag: str, ultima_modificacion: Optional[datetime] = None) -> dict:
+    cabeceras = {"ETag": etag, "Cache-Control": "no-cache"}
+    last_modified = formatear_http_date(ultima_modificacion)
+    if last_modified:
+        cabeceras["Last-Modified"] = last_modified
+    return cabeceras
+
+
+def respuesta_no_modificada(etag: str, ultima_modificacion: Optional[datetime] = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabeceras_cache(etag, ultima_modificacion))
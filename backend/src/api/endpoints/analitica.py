@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date
+
+from ...db.database import get_db
+from ...models import PlataformaEnum
+from ...schemas import ReporteRendimiento
+
+router = APIRouter()
+
+@router.get("/rendimiento", response_model=ReporteRendimiento)
+def get_rendimiento(
+    desde: Optional[date] = Query(None, description="Primera noche del período (por defecto, 1 de enero del año actual)"),
+    hasta: Optional[date] = Query(None, description="Fin exclusivo del período (por defecto, 1 de enero del año siguiente)"),
+    propiedad_id: Optional[int] = None,
+    plataforma: Optional[PlataformaEnum] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Ocupación, ADR y RevPAR por propiedad, por mes y por plataforma. Las estadías que cruzan
+    meses reparten su monto en partes iguales por noche.
+    """
+    if not desde:
+        desde = date(date.today().year, 1, 1)
+    
+    if not hasta:
+        hasta = date(desde.year + 1, 1, 1)
+    
+    if hasta <= desde:
+        raise HTTPException(status_code=400, detail="La fecha de fin debe ser posterior a la fecha de inicio")
+    
+    # NumPy se importa en la primera consulta, no al arrancar el worker
+    from ...services.analitica import calcular_rendimiento
+    
+    return calcular_rendimiento(db, desde, hasta, propiedad_id=propiedad_id, plataforma=plataforma)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from ...db.database import get_db
+from ...schemas import CoincidenciaBusqueda
+from ...services.busqueda import TIPOS, consulta_busqueda, palabras
+
+router = APIRouter()
+
+@router.get("/", response_model=List[CoincidenciaBusqueda])
+def buscar(
+    q: str = Query(..., min_length=2, description="Nombre del huésped (completo, parcial o aproximado), palabras de las notas o de la descripción"),
+    tipo: Optional[str] = Query(None, description="reserva o movimiento (por defecto, ambos)"),
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    if tipo is not None and tipo not in TIPOS:
+        raise HTTPException(status_code=400, detail="tipo debe ser reserva o movimiento")
+    if not palabras(q):
+        raise HTTPException(status_code=400, detail="La búsqueda debe incluir al menos una palabra")
+    
+    # Reservas y movimientos en una sola consulta ordenada por relevancia
+    postgres = db.get_bind().dialect.name == "postgresql"
+    consulta = consulta_busqueda(q, [tipo] if tipo else TIPOS, postgres)
+    return db.execute(consulta.offset(skip).limit(limit)).mappings().all()
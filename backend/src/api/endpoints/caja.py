@@ -1,19 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import case, func, extract, select, tuple_
 from typing import List, Optional
 from datetime import date, datetime, timedelta
 
-from ...db.database import get_db
-from ...models import MovimientoCaja, CategoriaMovimiento, TipoMovimientoEnum, MonedaEnum, SocioEnum
-from ...schemas import MovimientoCajaCreate, MovimientoCajaUpdate, MovimientoCajaInDB, MovimientoCajaWithRelaciones, ResumenCaja, ResumenMensual
+from ...core.config import settings
+from ...db.database import SessionLocal, get_db, get_async_db
+from ...models import MovimientoCaja, CategoriaMovimiento, ResumenMensualCaja, TipoMovimientoEnum, MonedaEnum, SocioEnum
+from ...schemas import MovimientoCajaCreate, MovimientoCajaUpdate, MovimientoCajaInDB, MovimientoCajaWithRelaciones, ResumenCaja, ResumenMensual, SaldoSocio, LibroSocios, Liquidacion, ResumenEnMoneda, GrupoEnMoneda
+from ...services.cache import obtener_categoria, tipo_cambio_vigente
+from ...services.exportacion import FORMATOS, Columna, exportar
+from ...services.liquidacion import ErrorLiquidacion, consulta_liquidacion, leer_partes, liquidar, normalizar_partes
+from ...services.resumen_mensual import registrar_movimiento
+from ...services.saldos_socios import invalidar_saldos, libro_socios, saldos_a_fecha
+from ...services.tipos_cambio import monto_en_moneda, tasa_movimiento
+from ..pagination import decodificar_cursor, paginar
 
 router = APIRouter()
 
+# Columnas de la exportación, en el orden de la consulta de exportar_movimientos
+COLUMNAS_MOVIMIENTOS = [
+    Columna("id", "entero"),
+    Columna("fecha", "fecha"),
+    Columna("tipo", "texto"),
+    Columna("categoria", "texto"),
+    Columna("descripcion", "texto"),
+    Columna("monto", "decimal"),
+    Columna("moneda", "texto"),
+    Columna("tipo_cambio", "decimal"),
+    Columna("socio", "texto"),
+    Columna("relacionado_reserva_id", "entero"),
+]
+
+# Columnas de agrupación del resumen en una moneda
+AGRUPACIONES_EN_MONEDA = {
+    "mes": (extract("year", MovimientoCaja.fecha), extract("month", MovimientoCaja.fecha)),
+    "categoria": (CategoriaMovimiento.nombre,),
+    "socio": (MovimientoCaja.socio,),
+}
+
 @router.post("/", response_model=MovimientoCajaInDB, status_code=status.HTTP_201_CREATED)
 def create_movimiento(movimiento: MovimientoCajaCreate, db: Session = Depends(get_db)):
     # Verificar que la categoría existe
-    db_categoria = db.query(CategoriaMovimiento).filter(CategoriaMovimiento.id == movimiento.categoria_id).first()
+    db_categoria = obtener_categoria(db, movimiento.categoria_id)
     if not db_categoria:
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
     
@@ -24,33 +55,26 @@ def create_movimiento(movimiento: MovimientoCajaCreate, db: Session = Depends(ge
             detail=f"El tipo de movimiento debe ser {db_categoria.tipo} para la categoría seleccionada"
         )
     
-    # Si es en USD, el tipo de cambio es obligatorio
+    # Si es en USD sin tipo de cambio, se usa el vigente en su fecha; si no hay, es obligatorio
+    datos = movimiento.dict()
     if movimiento.moneda == MonedaEnum.DOLARES and not movimiento.tipo_cambio:
-        raise HTTPException(
-            status_code=400,
-            detail="El tipo de cambio es obligatorio para movimientos en dólares"
-        )
+        datos["tipo_cambio"] = tipo_cambio_vigente(db, movimiento.fecha)
+        if datos["tipo_cambio"] is None:
+            raise HTTPException(
+                status_code=400,
+                detail="El tipo de cambio es obligatorio para movimientos en dólares"
+            )
     
-    db_movimiento = MovimientoCaja(**movimiento.dict())
+    db_movimiento = MovimientoCaja(**datos)
     db.add(db_movimiento)
+    registrar_movimiento(db, db_movimiento)
+    invalidar_saldos(db, db_movimiento.fecha)
     db.commit()
     db.refresh(db_movimiento)
     return db_movimiento
 
-@router.get("/", response_model=List[MovimientoCajaWithRelaciones])
-def read_movimientos(
-    skip: int = 0, 
-    limit: int = 100, 
-    desde: Optional[date] = None,
-    hasta: Optional[date] = None,
-    tipo: Optional[TipoMovimientoEnum] = None,
-    categoria_id: Optional[int] = None,
-    socio: Optional[SocioEnum] = None,
-    moneda: Optional[MonedaEnum] = None,
-    db: Session = Depends(get_db)
-):
-    query = db.query(MovimientoCaja)
-    
+def _filtrar_movimientos(query, desde, hasta, tipo, categoria_id, socio, moneda):
+    # Filtros comunes al listado y a la exportación
     if desde:
         query = query.filter(MovimientoCaja.fecha >= desde)
     
@@ -69,23 +93,126 @@ def read_movimientos(
     if moneda:
         query = query.filter(MovimientoCaja.moneda == moneda)
     
+    return query
+
+@router.get("/", response_model=List[MovimientoCajaWithRelaciones])
+def read_movimientos(
+    response: Response,
+    skip: int = 0, 
+    limit: int = 100, 
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor por la página anterior"),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    tipo: Optional[TipoMovimientoEnum] = None,
+    categoria_id: Optional[int] = None,
+    socio: Optional[SocioEnum] = None,
+    moneda: Optional[MonedaEnum] = None,
+    db: Session = Depends(get_db)
+):
+    query = _filtrar_movimientos(db.query(MovimientoCaja), desde, hasta, tipo, categoria_id, socio, moneda)
+    
     # Ordenar por fecha descendente
     query = query.order_by(MovimientoCaja.fecha.desc(), MovimientoCaja.id.desc())
     
-    movimientos = query.offset(skip).limit(limit).all()
-    return movimientos
+    # Con cursor se continúa después de la última fila vista (keyset), sin recorrer las anteriores
+    if cursor:
+        fecha_cursor, id_cursor = decodificar_cursor(cursor)
+        query = query.filter(tuple_(MovimientoCaja.fecha, MovimientoCaja.id) < tuple_(fecha_cursor, id_cursor))
+    else:
+        query = query.offset(skip)
+    
+    movimientos = query.options(joinedload(MovimientoCaja.categoria)).limit(limit + 1).all()
+    return paginar(movimientos, limit, response, lambda m: (m.fecha, m.id))
+
+@router.get("/exportar")
+def exportar_movimientos(
+    formato: str = Query("csv", description="csv o parquet"),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    tipo: Optional[TipoMovimientoEnum] = None,
+    categoria_id: Optional[int] = None,
+    socio: Optional[SocioEnum] = None,
+    moneda: Optional[MonedaEnum] = None
+):
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail="Formato no soportado, usar csv o parquet")
+    
+    consulta = _filtrar_movimientos(select(
+        MovimientoCaja.id,
+        MovimientoCaja.fecha,
+        MovimientoCaja.tipo,
+        CategoriaMovimiento.nombre,
+        MovimientoCaja.descripcion,
+        MovimientoCaja.monto,
+        MovimientoCaja.moneda,
+        MovimientoCaja.tipo_cambio,
+        MovimientoCaja.socio,
+        MovimientoCaja.relacionado_reserva_id,
+    ).join(
+        CategoriaMovimiento, CategoriaMovimiento.id == MovimientoCaja.categoria_id
+    ), desde, hasta, tipo, categoria_id, socio, moneda)
+    
+    # Orden cronológico, como un libro de caja
+    consulta = consulta.order_by(MovimientoCaja.fecha, MovimientoCaja.id)
+    
+    return StreamingResponse(
+        exportar(formato, SessionLocal, consulta, COLUMNAS_MOVIMIENTOS),
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="movimientos_caja_{date.today().isoformat()}.{formato}"'}
+    )
+
+@router.get("/saldos-socios", response_model=List[SaldoSocio])
+def get_saldos_socios(
+    fecha: Optional[date] = Query(None, description="Saldo al final de este día (por defecto, hoy)"),
+    db: Session = Depends(get_db)
+):
+    saldos = saldos_a_fecha(db, fecha or date.today())
+    # Guardar los puntos de control generados durante la consulta
+    db.commit()
+    return [SaldoSocio(socio=socio, moneda=moneda, saldo=saldo) for (socio, moneda), saldo in saldos.items()]
+
+@router.get("/libro-socios", response_model=LibroSocios)
+def get_libro_socios(
+    desde: Optional[date] = Query(None, description="Por defecto, el primer día del mes de hasta"),
+    hasta: Optional[date] = Query(None, description="Por defecto, hoy"),
+    socio: Optional[SocioEnum] = None,
+    moneda: Optional[MonedaEnum] = None,
+    db: Session = Depends(get_db)
+):
+    hasta = hasta or date.today()
+    desde = desde or hasta.replace(day=1)
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="La fecha desde no puede ser posterior a hasta")
+    
+    libro = libro_socios(db, desde, hasta, socio, moneda)
+    db.commit()
+    return libro
 
 @router.get("/resumen", response_model=ResumenCaja)
-def get_resumen_caja(
+async def get_resumen_caja(
     desde: date = Query(..., description="Fecha de inicio para el resumen"),
     hasta: date = Query(..., description="Fecha de fin para el resumen"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Obtener movimientos en el período
-    movimientos = db.query(MovimientoCaja).filter(
+    # Agregar en SQL por socio, categoría, moneda y tipo: una sola consulta sin importar la cantidad de movimientos
+    grupos = (await db.execute(select(
+        MovimientoCaja.socio,
+        CategoriaMovimiento.nombre,
+        MovimientoCaja.moneda,
+        MovimientoCaja.tipo,
+        func.coalesce(func.sum(MovimientoCaja.monto), 0.0),
+        func.coalesce(func.sum(monto_en_moneda(MonedaEnum.PESOS, tasa_movimiento())), 0.0),
+    ).join(
+        CategoriaMovimiento, CategoriaMovimiento.id == MovimientoCaja.categoria_id
+    ).where(
         MovimientoCaja.fecha >= desde,
         MovimientoCaja.fecha <= hasta
-    ).all()
+    ).group_by(
+        MovimientoCaja.socio,
+        CategoriaMovimiento.nombre,
+        MovimientoCaja.moneda,
+        MovimientoCaja.tipo
+    ))).all()
     
     # Inicializar contadores
     total_ingresos_pesos = 0.0
@@ -100,36 +227,31 @@ def get_resumen_caja(
     # Contadores por categoría
     categorias_data = {}
     
-    # Procesar movimientos
-    for mov in movimientos:
-        # Categoría
-        if mov.categoria.nombre not in categorias_data:
-            categorias_data[mov.categoria.nombre] = 0.0
+    # Combinar los grupos (a lo sumo socios x categorías x monedas x tipos filas)
+    for socio, categoria_nombre, moneda, tipo, monto, monto_convertido in grupos:
+        es_ingreso = tipo == TipoMovimientoEnum.INGRESO
+        signo = 1 if es_ingreso else -1
         
-        if mov.moneda == MonedaEnum.PESOS:
-            # Sumar al total general
-            if mov.tipo == TipoMovimientoEnum.INGRESO:
-                total_ingresos_pesos += mov.monto
-                socios_data[mov.socio]["ingresos_pesos"] += mov.monto
+        if moneda == MonedaEnum.PESOS:
+            if es_ingreso:
+                total_ingresos_pesos += monto
+                socios_data[socio]["ingresos_pesos"] += monto
             else:
-                total_egresos_pesos += mov.monto
-                socios_data[mov.socio]["egresos_pesos"] += mov.monto
+                total_egresos_pesos += monto
+                socios_data[socio]["egresos_pesos"] += monto
             
             # Sumar a la categoría
-            categorias_data[mov.categoria.nombre] += mov.monto if mov.tipo == TipoMovimientoEnum.INGRESO else -mov.monto
+            categorias_data[categoria_nombre] = categorias_data.get(categoria_nombre, 0.0) + signo * monto
         else:  # USD
-            monto_pesos = mov.monto * mov.tipo_cambio
-            
-            # Sumar al total general
-            if mov.tipo == TipoMovimientoEnum.INGRESO:
-                total_ingresos_usd += mov.monto
-                socios_data[mov.socio]["ingresos_usd"] += mov.monto
+            if es_ingreso:
+                total_ingresos_usd += monto
+                socios_data[socio]["ingresos_usd"] += monto
             else:
-                total_egresos_usd += mov.monto
-                socios_data[mov.socio]["egresos_usd"] += mov.monto
+                total_egresos_usd += monto
+                socios_data[socio]["egresos_usd"] += monto
             
             # Sumar a la categoría (convertido a pesos)
-            categorias_data[mov.categoria.nombre] += monto_pesos if mov.tipo == TipoMovimientoEnum.INGRESO else -monto_pesos
+            categorias_data[categoria_nombre] = categorias_data.get(categoria_nombre, 0.0) + signo * monto_convertido
     
     # Calcular balances
     balance_pesos = total_ingresos_pesos - total_egresos_pesos
@@ -148,64 +270,114 @@ def get_resumen_caja(
         desglose_por_categoria=categorias_data
     )
 
+@router.get("/liquidacion", response_model=Liquidacion)
+async def get_liquidacion(
+    desde: date = Query(..., description="Fecha de inicio del período a liquidar"),
+    hasta: date = Query(..., description="Fecha de fin del período a liquidar"),
+    partes: Optional[str] = Query(
+        None, description="Partes por socio, por ejemplo Maxy:2,Oso:1,Laura:1 (por defecto, LIQUIDACION_PARTES)"
+    ),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="La fecha desde no puede ser posterior a hasta")
+    try:
+        proporciones = normalizar_partes(leer_partes(partes) if partes else settings.LIQUIDACION_PARTES)
+    except ErrorLiquidacion as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Una consulta agrupada por socio, moneda y tipo; el reparto se hace sobre esos totales
+    grupos = (await db.execute(consulta_liquidacion(desde, hasta))).all()
+    return liquidar(desde, hasta, grupos, proporciones)
+
+@router.get("/resumen-moneda", response_model=ResumenEnMoneda)
+async def get_resumen_en_moneda(
+    desde: date = Query(..., description="Fecha de inicio para el resumen"),
+    hasta: date = Query(..., description="Fecha de fin para el resumen"),
+    moneda: MonedaEnum = Query(MonedaEnum.DOLARES, description="Moneda en la que se expresa todo el resumen"),
+    agrupar: str = Query("mes", description="mes, categoria o socio"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if agrupar not in AGRUPACIONES_EN_MONEDA:
+        raise HTTPException(status_code=400, detail="agrupar debe ser mes, categoria o socio")
+    
+    # Cada movimiento se convierte en SQL con su tipo de cambio o el vigente en su fecha
+    convertido = monto_en_moneda(moneda, tasa_movimiento())
+    claves = AGRUPACIONES_EN_MONEDA[agrupar]
+    grupos = (await db.execute(select(
+        *claves,
+        MovimientoCaja.tipo,
+        func.coalesce(func.sum(convertido), 0.0),
+        func.sum(case((convertido.is_(None), 1), else_=0)),
+    ).join(
+        CategoriaMovimiento, CategoriaMovimiento.id == MovimientoCaja.categoria_id
+    ).where(
+        MovimientoCaja.fecha >= desde,
+        MovimientoCaja.fecha <= hasta
+    ).group_by(*claves, MovimientoCaja.tipo))).all()
+    
+    totales = {}
+    sin_tipo_cambio = 0
+    for *clave, tipo, monto, sin_cambio in grupos:
+        if agrupar == "mes":
+            nombre = f"{int(clave[0]):04d}-{int(clave[1]):02d}"
+        else:
+            nombre = getattr(clave[0], "value", clave[0])
+        grupo = totales.setdefault(nombre, {"ingresos": 0.0, "egresos": 0.0})
+        grupo["ingresos" if tipo == TipoMovimientoEnum.INGRESO else "egresos"] += monto
+        sin_tipo_cambio += sin_cambio or 0
+    
+    total_ingresos = sum(grupo["ingresos"] for grupo in totales.values())
+    total_egresos = sum(grupo["egresos"] for grupo in totales.values())
+    return ResumenEnMoneda(
+        desde=desde,
+        hasta=hasta,
+        moneda=moneda,
+        agrupar=agrupar,
+        total_ingresos=total_ingresos,
+        total_egresos=total_egresos,
+        balance=total_ingresos - total_egresos,
+        movimientos_sin_tipo_cambio=sin_tipo_cambio,
+        grupos=[
+            GrupoEnMoneda(grupo=nombre, balance=grupo["ingresos"] - grupo["egresos"], **grupo)
+            for nombre, grupo in sorted(totales.items())
+        ]
+    )
+
 @router.get("/resumen-mensual", response_model=List[ResumenMensual])
-def get_resumen_mensual(
+async def get_resumen_mensual(
     anio: int = Query(..., description="Año para el resumen"),
-    db: Session = Depends(get_db)
+    anio_fin: Optional[int] = Query(None, description="Último año a incluir (por defecto, el mismo año)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    resultados = []
+    anio_fin = anio_fin or anio
+    if anio_fin < anio:
+        raise HTTPException(status_code=400, detail="El año final no puede ser anterior al año inicial")
     
-    # Para cada mes del año
-    for mes in range(1, 13):
-        # Obtener el primer y último día del mes
-        primer_dia = date(anio, mes, 1)
-        if mes == 12:
-            ultimo_dia = date(anio + 1, 1, 1) - timedelta(days=1)
-        else:
-            ultimo_dia = date(anio, mes + 1, 1) - timedelta(days=1)
-        
-        # Obtener movimientos del mes
-        movimientos = db.query(MovimientoCaja).filter(
-            MovimientoCaja.fecha >= primer_dia,
-            MovimientoCaja.fecha <= ultimo_dia
-        ).all()
-        
-        # Inicializar contadores
-        total_ingresos_pesos = 0.0
-        total_egresos_pesos = 0.0
-        
-        # Contar reservas del mes
-        from ...models import Reserva
-        reservas_count = db.query(func.count(Reserva.id)).filter(
-            func.extract('year', Reserva.fecha_ingreso) == anio,
-            func.extract('month', Reserva.fecha_ingreso) == mes
-        ).scalar()
-        
-        # Procesar movimientos
-        for mov in movimientos:
-            if mov.moneda == MonedaEnum.PESOS:
-                if mov.tipo == TipoMovimientoEnum.INGRESO:
-                    total_ingresos_pesos += mov.monto
-                else:
-                    total_egresos_pesos += mov.monto
-            else:  # USD
-                monto_pesos = mov.monto * mov.tipo_cambio
-                if mov.tipo == TipoMovimientoEnum.INGRESO:
-                    total_ingresos_pesos += monto_pesos
-                else:
-                    total_egresos_pesos += monto_pesos
-        
-        # Calcular balance
-        balance_pesos = total_ingresos_pesos - total_egresos_pesos
-        
-        resultados.append(ResumenMensual(
-            mes=mes,
-            anio=anio,
-            total_ingresos_pesos=total_ingresos_pesos,
-            total_egresos_pesos=total_egresos_pesos,
-            balance_pesos=balance_pesos,
-            reservas_total=reservas_count
-        ))
+    # Leer el acumulado mensual ya calculado: una sola consulta para cualquier cantidad de años
+    acumulados = {
+        (fila.anio, fila.mes): fila
+        for fila in (await db.scalars(select(ResumenMensualCaja).where(
+            ResumenMensualCaja.anio >= anio,
+            ResumenMensualCaja.anio <= anio_fin
+        ))).all()
+    }
+    
+    resultados = []
+    for anio_actual in range(anio, anio_fin + 1):
+        for mes in range(1, 13):
+            fila = acumulados.get((anio_actual, mes))
+            total_ingresos_pesos = fila.total_ingresos_pesos if fila else 0.0
+            total_egresos_pesos = fila.total_egresos_pesos if fila else 0.0
+            
+            resultados.append(ResumenMensual(
+                mes=mes,
+                anio=anio_actual,
+                total_ingresos_pesos=total_ingresos_pesos,
+                total_egresos_pesos=total_egresos_pesos,
+                balance_pesos=total_ingresos_pesos - total_egresos_pesos,
+                reservas_total=fila.reservas_total if fila else 0
+            ))
     
     return resultados
 
@@ -224,7 +396,7 @@ def update_movimiento(movimiento_id: int, movimiento: MovimientoCajaUpdate, db:
     
     # Si se actualiza la categoría, verificar que exista y que el tipo coincida
     if movimiento.categoria_id is not None:
-        db_categoria = db.query(CategoriaMovimiento).filter(CategoriaMovimiento.id == movimiento.categoria_id).first()
+        db_categoria = obtener_categoria(db, movimiento.categoria_id)
         if not db_categoria:
             raise HTTPException(status_code=404, detail="Categoría no encontrada")
         
@@ -241,20 +413,29 @@ def update_movimiento(movimiento_id: int, movimiento: MovimientoCajaUpdate, db:
                 detail=f"El tipo de movimiento debe ser {db_categoria.tipo} para la categoría seleccionada"
             )
     
-    # Si se actualiza a USD, el tipo de cambio es obligatorio
+    # Si se actualiza a USD, el tipo de cambio es obligatorio; si falta, se usa el vigente en la fecha
     nueva_moneda = movimiento.moneda or db_movimiento.moneda
     nuevo_tipo_cambio = movimiento.tipo_cambio if movimiento.tipo_cambio is not None else db_movimiento.tipo_cambio
+    update_data = movimiento.dict(exclude_unset=True)
     
     if nueva_moneda == MonedaEnum.DOLARES and nuevo_tipo_cambio is None:
-        raise HTTPException(
-            status_code=400,
-            detail="El tipo de cambio es obligatorio para movimientos en dólares"
-        )
+        nuevo_tipo_cambio = tipo_cambio_vigente(db, movimiento.fecha or db_movimiento.fecha)
+        if nuevo_tipo_cambio is None:
+            raise HTTPException(
+                status_code=400,
+                detail="El tipo de cambio es obligatorio para movimientos en dólares"
+            )
+        update_data["tipo_cambio"] = nuevo_tipo_cambio
+    
+    # Quitar el movimiento del acumulado mensual con sus valores anteriores y volver a sumarlo
+    registrar_movimiento(db, db_movimiento, -1)
+    fecha_anterior = db_movimiento.fecha
     
-    update_data = movimiento.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_movimiento, key, value)
     
+    registrar_movimiento(db, db_movimiento)
+    invalidar_saldos(db, fecha_anterior, db_movimiento.fecha)
     db.commit()
     db.refresh(db_movimiento)
     return db_movimiento
@@ -265,6 +446,8 @@ def delete_movimiento(movimiento_id: int, db: Session = Depends(get_db)):
     if db_movimiento is None:
         raise HTTPException(status_code=404, detail="Movimiento no encontrado")
     
+    registrar_movimiento(db, db_movimiento, -1)
+    invalidar_saldos(db, db_movimiento.fecha)
     db.delete(db_movimiento)
     db.commit()
     return None
\ No newline at end of file
@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from ...db.database import get_db
-from ...models import CategoriaMovimiento, TipoMovimientoEnum
+from ...models import CategoriaMovimiento, MovimientoCaja, TipoMovimientoEnum
 from ...schemas import CategoriaMovimientoCreate, CategoriaMovimientoUpdate, CategoriaMovimientoInDB
+from ...services.cache import cache_categorias, listar_categorias, obtener_categoria
 
 router = APIRouter()
 
@@ -19,6 +20,7 @@ def create_categoria(categoria: CategoriaMovimientoCreate, db: Session = Depends
     db.add(db_categoria)
     db.commit()
     db.refresh(db_categoria)
+    cache_categorias.invalidar()
     return db_categoria
 
 @router.get("/", response_model=List[CategoriaMovimientoInDB])
@@ -28,17 +30,16 @@ def read_categorias(
     tipo: TipoMovimientoEnum = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(CategoriaMovimiento)
+    categorias = listar_categorias(db)
     
     if tipo:
-        query = query.filter(CategoriaMovimiento.tipo == tipo)
+        categorias = [categoria for categoria in categorias if categoria.tipo == tipo]
     
-    categorias = query.order_by(CategoriaMovimiento.nombre).offset(skip).limit(limit).all()
-    return categorias
+    return categorias[skip:skip + limit]
 
 @router.get("/{categoria_id}", response_model=CategoriaMovimientoInDB)
 def read_categoria(categoria_id: int, db: Session = Depends(get_db)):
-    categoria = db.query(CategoriaMovimiento).filter(CategoriaMovimiento.id == categoria_id).first()
+    categoria = obtener_categoria(db, categoria_id)
     if categoria is None:
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
     return categoria
@@ -61,6 +62,7 @@ def update_categoria(categoria_id: int, categoria: CategoriaMovimientoUpdate, db
     
     db.commit()
     db.refresh(db_categoria)
+    cache_categorias.invalidar()
     return db_categoria
 
 @router.delete("/{categoria_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -70,7 +72,9 @@ def delete_categoria(categoria_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
     
     # Verificar si hay movimientos asociados a esta categoría
-    if db_categoria.movimientos:
+    if db.query(
+        db.query(MovimientoCaja.id).filter(MovimientoCaja.categoria_id == categoria_id).exists()
+    ).scalar():
         raise HTTPException(
             status_code=400, 
             detail="No se puede eliminar la categoría porque tiene movimientos asociados"
@@ -78,4 +82,5 @@ def delete_categoria(categoria_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_categoria)
     db.commit()
+    cache_categorias.invalidar()
     return None
\ No newline at end of file
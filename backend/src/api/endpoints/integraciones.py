@@ -1,178 +1,219 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, File, Form, UploadFile
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
-import requests
-from datetime import datetime, date
-import os
-from dotenv import load_dotenv
+from typing import Callable, List, Dict, Any, Optional, Type
 
-from ...db.database import get_db
-from ...models import Reserva, PlataformaEnum, EstadoReservaEnum, Propiedad
-from ...schemas import ReservaCreate
+from ...db.database import get_async_db, get_db
+from ...models import PlataformaEnum, Propiedad, SincronizacionCanal
+from ...schemas import SincronizacionCanalCreate, SincronizacionCanalInDB, SincronizacionRespuesta
+from ...services.ocupacion import indice_ocupacion
+from ...services.superposiciones import es_superposicion
 
 router = APIRouter()
 
-load_dotenv()
-
-# Cargar claves de API desde variables de entorno
-AIRBNB_API_KEY = os.getenv("AIRBNB_API_KEY")
-BOOKING_API_KEY = os.getenv("BOOKING_API_KEY")
-
-@router.post("/airbnb/sync", status_code=status.HTTP_200_OK)
-async def sync_airbnb_reservations(
-    propiedad_id: int,
-    desde: date = Body(...),
-    hasta: date = Body(...),
-    db: Session = Depends(get_db)
-):
+def _importar(db: Session, importar: Callable[[], Dict[str, Any]], error_archivo: Type[Exception]) -> Dict[str, Any]:
     """
-    Sincroniza las reservas de Airbnb para una propiedad específica en un rango de fechas.
-    Nota: Esta es una implementación de muestra. La integración real dependerá de la API de Airbnb.
+    Ejecuta una importación y la confirma. Un archivo inválido (error_archivo) o un período que
+    otra operación ocupó durante la importación responden 400; cualquier otro error, 500.
     """
-    if not AIRBNB_API_KEY:
+    try:
+        reporte = importar()
+        db.commit()
+    except error_archivo as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError as e:
+        db.rollback()
+        if es_superposicion(e):
+            raise HTTPException(
+                status_code=400,
+                detail="Otra operación ocupó alguno de los períodos durante la importación; reintente"
+            )
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al procesar el archivo: {str(e)}"
+        )
+    return reporte
+
+async def _sincronizar_propiedad(db: AsyncSession, propiedad_id: int, plataforma: PlataformaEnum) -> SincronizacionRespuesta:
+    # httpx se importa recién al sincronizar, no al arrancar el worker
+    from ...services.canales import configuracion_canal, sincronizar_canales
+    
+    if configuracion_canal(plataforma) is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="API key de Airbnb no configurada"
+            detail=f"API de {plataforma.value} no configurada"
         )
     
-    # Verificar que la propiedad existe
-    propiedad = db.query(Propiedad).filter(Propiedad.id == propiedad_id).first()
+    # Verificar que la propiedad existe y está vinculada al canal
+    propiedad = await db.get(Propiedad, propiedad_id)
     if not propiedad:
         raise HTTPException(status_code=404, detail="Propiedad no encontrada")
     
-    # En una implementación real, aquí se haría la llamada a la API de Airbnb
-    # Usando requests para obtener las reservas
-    # Por ahora, simulamos una respuesta
+    vinculada = await db.scalar(select(SincronizacionCanal.id).where(
+        SincronizacionCanal.propiedad_id == propiedad_id,
+        SincronizacionCanal.plataforma == plataforma
+    ))
+    if vinculada is None:
+        raise HTTPException(status_code=404, detail=f"La propiedad no está vinculada a {plataforma.value}")
     
-    # Resultado simulado
-    nuevas_reservas = 0
-    actualizadas = 0
+    return await sincronizar_canales(db, plataformas=[plataforma], propiedad_id=propiedad_id)
+
+@router.post("/airbnb/sync", response_model=SincronizacionRespuesta)
+async def sync_airbnb_reservations(propiedad_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Trae de Airbnb las reservas de la propiedad modificadas desde la última sincronización.
+    """
+    return await _sincronizar_propiedad(db, propiedad_id, PlataformaEnum.AIRBNB)
+
+@router.post("/booking/sync", response_model=SincronizacionRespuesta)
+async def sync_booking_reservations(propiedad_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Trae de Booking las reservas de la propiedad modificadas desde la última sincronización.
+    """
+    return await _sincronizar_propiedad(db, propiedad_id, PlataformaEnum.BOOKING)
+
+@router.post("/sync", response_model=SincronizacionRespuesta)
+async def sync_canales(
+    plataforma: Optional[PlataformaEnum] = None,
+    propiedad_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Sincroniza en paralelo todas las publicaciones vinculadas de ambos canales
+    (o las de la plataforma/propiedad indicada).
+    """
+    from ...services.canales import sincronizar_canales
     
-    # En una implementación real, se procesarían las reservas obtenidas
-    # y se guardarían en la base de datos
+    return await sincronizar_canales(
+        db,
+        plataformas=[plataforma] if plataforma else None,
+        propiedad_id=propiedad_id
+    )
+
+@router.get("/canales", response_model=List[SincronizacionCanalInDB])
+async def read_canales(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(SincronizacionCanal).order_by(SincronizacionCanal.id))).all()
+
+@router.put("/canales", response_model=SincronizacionCanalInDB)
+async def vincular_canal(canal: SincronizacionCanalCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Vincula una propiedad con su publicación en un canal. Cambiar la publicación reinicia la marca de agua.
+    """
+    propiedad = await db.get(Propiedad, canal.propiedad_id)
+    if not propiedad:
+        raise HTTPException(status_code=404, detail="Propiedad no encontrada")
     
-    return {
-        "mensaje": f"Sincronización completada: {nuevas_reservas} nuevas reservas, {actualizadas} actualizadas",
-        "propiedad": propiedad.nombre,
-        "plataforma": "Airbnb",
-        "desde": desde,
-        "hasta": hasta
-    }
+    db_canal = await db.scalar(select(SincronizacionCanal).where(
+        SincronizacionCanal.propiedad_id == canal.propiedad_id,
+        SincronizacionCanal.plataforma == canal.plataforma
+    ))
+    if db_canal is None:
+        db_canal = SincronizacionCanal(**canal.dict())
+        db.add(db_canal)
+    elif db_canal.id_externo != canal.id_externo:
+        db_canal.id_externo = canal.id_externo
+        db_canal.ultima_modificacion = None
+        db_canal.ultimo_error = None
+    
+    await db.commit()
+    await db.refresh(db_canal)
+    return db_canal
 
-@router.post("/booking/sync", status_code=status.HTTP_200_OK)
-async def sync_booking_reservations(
-    propiedad_id: int,
-    desde: date = Body(...),
-    hasta: date = Body(...),
+# Las importaciones son sincrónicas a propósito: FastAPI corre todo el handler en el threadpool
+# (lectura del archivo, etapas de pandas, conciliación y escritura), así que no bloquean el
+# event loop mientras se procesa el archivo.
+@router.post("/importar-excel", status_code=status.HTTP_200_OK)
+def import_from_excel(
+    file_path: str = Body(...),
+    propiedad_id: Optional[int] = Body(None),
+    hoja: Optional[str] = Body(None),
     db: Session = Depends(get_db)
 ):
     """
-    Sincroniza las reservas de Booking para una propiedad específica en un rango de fechas.
-    Nota: Esta es una implementación de muestra. La integración real dependerá de la API de Booking.
+    Importa reservas desde un archivo Excel.
+    Si no se indica propiedad_id, cada fila se asigna según la columna Propiedad del archivo.
+    Devuelve un reporte con el motivo de rechazo de cada fila no importada.
     """
-    if not BOOKING_API_KEY:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="API key de Booking no configurada"
-        )
+    from pathlib import Path
+    from ...services.importacion_excel import ErrorImportacion, importar_reservas, leer_excel
     
     # Verificar que la propiedad existe
-    propiedad = db.query(Propiedad).filter(Propiedad.id == propiedad_id).first()
-    if not propiedad:
-        raise HTTPException(status_code=404, detail="Propiedad no encontrada")
+    propiedad = None
+    if propiedad_id is not None:
+        propiedad = db.get(Propiedad, propiedad_id)
+        if not propiedad:
+            raise HTTPException(status_code=404, detail="Propiedad no encontrada")
+    # El commit expira la instancia: se lee el nombre antes para no volver a consultarla
+    nombre_propiedad = propiedad.nombre if propiedad else None
     
-    # En una implementación real, aquí se haría la llamada a la API de Booking
-    # Usando requests para obtener las reservas
-    # Por ahora, simulamos una respuesta
+    # Verificar que el archivo existe
+    file = Path(file_path)
+    if not file.exists():
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
     
-    # Resultado simulado
-    nuevas_reservas = 0
-    actualizadas = 0
+    reporte = _importar(
+        db, lambda: importar_reservas(db, leer_excel(file_path, hoja), propiedad_id=propiedad_id), ErrorImportacion
+    )
     
-    # En una implementación real, se procesarían las reservas obtenidas
-    # y se guardarían en la base de datos
+    if reporte["nuevas_reservas"]:
+        indice_ocupacion.invalidar()
     
     return {
-        "mensaje": f"Sincronización completada: {nuevas_reservas} nuevas reservas, {actualizadas} actualizadas",
-        "propiedad": propiedad.nombre,
-        "plataforma": "Booking",
-        "desde": desde,
-        "hasta": hasta
+        "mensaje": f"Importación completada: {reporte['nuevas_reservas']} nuevas reservas",
+        "propiedad": nombre_propiedad,
+        **reporte
     }
 
-@router.post("/importar-excel", status_code=status.HTTP_200_OK)
-async def import_from_excel(
-    file_path: str = Body(...),
-    propiedad_id: int = Body(...),
+@router.post("/importar-ical", status_code=status.HTTP_200_OK)
+def import_from_ical(
+    propiedad_id: int = Form(...),
+    plataforma: PlataformaEnum = Form(PlataformaEnum.OTRO),
+    archivo: Optional[UploadFile] = File(None),
+    file_path: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
     """
-    Importa reservas desde un archivo Excel.
+    Importa el calendario iCal (.ics) de una propiedad, subido como archivo o desde una ruta local.
+    Solo se aplican las diferencias con las reservas existentes: altas, cambios de fechas y
+    cancelaciones de las reservas futuras que ya no figuran en el feed.
     """
-    import pandas as pd
     from pathlib import Path
+    from ...services.importacion_ical import ErrorIcal, importar_ical, leer_ical
+    
+    if archivo is None and not file_path:
+        raise HTTPException(status_code=400, detail="Debe enviar un archivo o indicar file_path")
     
     # Verificar que la propiedad existe
-    propiedad = db.query(Propiedad).filter(Propiedad.id == propiedad_id).first()
+    propiedad = db.get(Propiedad, propiedad_id)
     if not propiedad:
         raise HTTPException(status_code=404, detail="Propiedad no encontrada")
+    nombre_propiedad = propiedad.nombre
     
     # Verificar que el archivo existe
-    file = Path(file_path)
-    if not file.exists():
+    if archivo is None and not Path(file_path).exists():
         raise HTTPException(status_code=404, detail="Archivo no encontrado")
     
-    try:
-        # Leer el archivo Excel
-        df = pd.read_excel(file_path)
-        
-        # Implementación de ejemplo: se asume un formato específico
-        # En una implementación real, se debería validar y mapear adecuadamente
-        
-        nuevas_reservas = 0
-        
-        # Procesar las filas (implementación de ejemplo)
-        for _, row in df.iterrows():
-            try:
-                # Mapeo de ejemplo (adaptar a la estructura real del Excel)
-                nueva_reserva = ReservaCreate(
-                    fecha_ingreso=row.get('fecha_ingreso'),
-                    fecha_salida=row.get('fecha_salida'),
-                    nombre_huesped=row.get('nombre_huesped', 'Sin nombre'),
-                    plataforma=PlataformaEnum(row.get('plataforma', 'Otro')),
-                    monto_total_usd=float(row.get('monto_total', 0)),
-                    monto_sena_usd=float(row.get('monto_sena', 0)) if 'monto_sena' in row else None,
-                    notas=row.get('notas', ''),
-                    propiedad_id=propiedad_id
-                )
-                
-                # Verificar si ya existe una reserva para esas fechas
-                reserva_existente = db.query(Reserva).filter(
-                    Reserva.propiedad_id == propiedad_id,
-                    Reserva.fecha_ingreso == nueva_reserva.fecha_ingreso,
-                    Reserva.fecha_salida == nueva_reserva.fecha_salida
-                ).first()
-                
-                if not reserva_existente:
-                    # Crear nueva reserva
-                    db_reserva = Reserva(**nueva_reserva.dict())
-                    db.add(db_reserva)
-                    nuevas_reservas += 1
-            
-            except Exception as e:
-                # Continuar con la siguiente fila si hay error
-                continue
-        
-        # Guardar cambios en la base de datos
-        db.commit()
-        
-        return {
-            "mensaje": f"Importación completada: {nuevas_reservas} nuevas reservas",
-            "propiedad": propiedad.nombre
-        }
+    def importar():
+        # El feed se recorre línea a línea, sin cargarlo entero en memoria
+        eventos = leer_ical(archivo.file if archivo is not None else file_path)
+        return importar_ical(db, eventos, propiedad_id, plataforma)
     
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al procesar el archivo: {str(e)}"
-        )
\ No newline at end of file
+    reporte = _importar(db, importar, ErrorIcal)
+    
+    if reporte["nuevas_reservas"] or reporte["actualizadas"] or reporte["canceladas"]:
+        indice_ocupacion.invalidar()
+    
+    return {
+        "mensaje": (
+            f"Importación completada: {reporte['nuevas_reservas']} nuevas, "
+            f"{reporte['actualizadas']} actualizadas, {reporte['canceladas']} canceladas"
+        ),
+        "propiedad": nombre_propiedad,
+        **reporte
+    }
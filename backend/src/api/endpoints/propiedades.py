@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
 from ...db.database import get_db
-from ...models import Propiedad
+from ...models import Propiedad, revision_actual
 from ...schemas import PropiedadCreate, PropiedadUpdate, PropiedadInDB
+from ...services.cache import cache_propiedades, listar_propiedades, obtener_propiedad
+from ...services.ical import cache_calendarios, huella_calendario
+from ...services.ocupacion import indice_ocupacion
+from ..conditional import calcular_etag, no_modificado, respuesta_no_modificada, cabeceras_cache
 
 router = APIRouter()
 
@@ -14,20 +18,48 @@ def create_propiedad(propiedad: PropiedadCreate, db: Session = Depends(get_db)):
     db.add(db_propiedad)
     db.commit()
     db.refresh(db_propiedad)
+    cache_propiedades.invalidar()
+    indice_ocupacion.agregar_propiedad(db_propiedad.id, db_propiedad.revision)
     return db_propiedad
 
 @router.get("/", response_model=List[PropiedadInDB])
 def read_propiedades(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    propiedades = db.query(Propiedad).offset(skip).limit(limit).all()
-    return propiedades
+    propiedades = listar_propiedades(db)
+    return propiedades[skip:skip + limit]
 
 @router.get("/{propiedad_id}", response_model=PropiedadInDB)
 def read_propiedad(propiedad_id: int, db: Session = Depends(get_db)):
-    propiedad = db.query(Propiedad).filter(Propiedad.id == propiedad_id).first()
+    propiedad = obtener_propiedad(db, propiedad_id)
     if propiedad is None:
         raise HTTPException(status_code=404, detail="Propiedad no encontrada")
     return propiedad
 
+@router.get("/{propiedad_id}/calendario.ics", response_class=Response)
+def get_calendario_ics(propiedad_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Feed iCalendar con las reservas (no canceladas) de la propiedad, para channel managers y limpieza.
+    """
+    propiedad = obtener_propiedad(db, propiedad_id)
+    if propiedad is None:
+        raise HTTPException(status_code=404, detail="Propiedad no encontrada")
+    
+    # Huella de las reservas publicadas: si no cambió, 304 sin generar nada
+    huella = huella_calendario(db, propiedad_id)
+    etag = calcular_etag("ics", propiedad_id, propiedad.nombre, *huella)
+    # Sin Last-Modified: borrar una reserva no avanza la última modificación, solo el ETag lo refleja
+    if no_modificado(request, etag):
+        return respuesta_no_modificada(etag)
+    
+    cuerpo = cache_calendarios.obtener(db, propiedad_id, propiedad.nombre, huella)
+    return Response(
+        content=cuerpo,
+        media_type="text/calendar; charset=utf-8",
+        headers={
+            **cabeceras_cache(etag),
+            "Content-Disposition": f'inline; filename="propiedad-{propiedad_id}.ics"',
+        }
+    )
+
 @router.put("/{propiedad_id}", response_model=PropiedadInDB)
 def update_propiedad(propiedad_id: int, propiedad: PropiedadUpdate, db: Session = Depends(get_db)):
     db_propiedad = db.query(Propiedad).filter(Propiedad.id == propiedad_id).first()
@@ -40,6 +72,8 @@ def update_propiedad(propiedad_id: int, propiedad: PropiedadUpdate, db: Session
     
     db.commit()
     db.refresh(db_propiedad)
+    cache_propiedades.invalidar()
+    indice_ocupacion.agregar_propiedad(db_propiedad.id, db_propiedad.revision)
     return db_propiedad
 
 @router.delete("/{propiedad_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -50,4 +84,7 @@ def delete_propiedad(propiedad_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_propiedad)
     db.commit()
+    cache_propiedades.invalidar()
+    cache_calendarios.invalidar(propiedad_id)
+    indice_ocupacion.quitar_propiedad(propiedad_id, revision_actual(db))
     return None
\ No newline at end of file
@@ -1,14 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from typing import Any, List, Optional
 from datetime import date, datetime, timedelta
 
-from ...db.database import get_db
-from ...models import Reserva, Propiedad, PlataformaEnum
-from ...schemas import ReservaCreate, ReservaUpdate, ReservaInDB, ReservaWithPropiedad, CalendarioReserva
+from ...db.database import SessionLocal, get_db
+from ...models import Reserva, Propiedad, PlataformaEnum, EstadoReservaEnum, revision_actual
+from ...schemas import ReservaCreate, ReservaUpdate, ReservaInDB, ReservaWithPropiedad, CalendarioReserva, ReservaLoteRespuesta, DisponibilidadPropiedad
+from ...services.cache import obtener_propiedad
+from ...services.exportacion import FORMATOS, Columna, exportar
+from ...services.ocupacion import indice_ocupacion
+from ...services.reservas_lote import procesar_lote
+from ...services.resumen_mensual import registrar_reserva
+from ...services.superposiciones import es_superposicion, hay_superposicion, restriccion_en_base
+from ..conditional import calcular_etag, no_modificado, respuesta_no_modificada, cabeceras_cache
+from ..pagination import decodificar_cursor, paginar
 
 router = APIRouter()
 
+# Columnas de la exportación, en el orden de la consulta de exportar_reservas
+COLUMNAS_RESERVAS = [
+    Columna("id", "entero"),
+    Columna("propiedad_id", "entero"),
+    Columna("propiedad", "texto"),
+    Columna("fecha_ingreso", "fecha"),
+    Columna("fecha_salida", "fecha"),
+    Columna("nombre_huesped", "texto"),
+    Columna("plataforma", "texto"),
+    Columna("estado", "texto"),
+    Columna("monto_total_usd", "decimal"),
+    Columna("monto_sena_usd", "decimal"),
+    Columna("id_externo", "texto"),
+    Columna("notas", "texto"),
+]
+
+# Cantidad máxima de reservas aceptadas por /reservas/bulk
+MAX_RESERVAS_LOTE = 10000
+
 # Mapeo de colores para cada plataforma
 PLATAFORMA_COLORES = {
     PlataformaEnum.AIRBNB: "#FF5A5F",
@@ -17,44 +47,66 @@ PLATAFORMA_COLORES = {
     PlataformaEnum.OTRO: "#F39C12",
 }
 
+def _confirmar(db: Session, detalle: str):
+    # Traduce la violación de la restricción de exclusión a la misma respuesta 400 de siempre
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if es_superposicion(e):
+            raise HTTPException(status_code=400, detail=detalle)
+        raise
+
 @router.post("/", response_model=ReservaInDB, status_code=status.HTTP_201_CREATED)
 def create_reserva(reserva: ReservaCreate, db: Session = Depends(get_db)):
     # Verificar que la propiedad existe
-    db_propiedad = db.query(Propiedad).filter(Propiedad.id == reserva.propiedad_id).first()
+    db_propiedad = obtener_propiedad(db, reserva.propiedad_id)
     if not db_propiedad:
         raise HTTPException(status_code=404, detail="Propiedad no encontrada")
     
-    # Verificar que no haya reservas superpuestas
-    reservas_superpuestas = db.query(Reserva).filter(
-        Reserva.propiedad_id == reserva.propiedad_id,
-        Reserva.fecha_salida > reserva.fecha_ingreso,
-        Reserva.fecha_ingreso < reserva.fecha_salida
-    ).first()
+    if reserva.fecha_salida <= reserva.fecha_ingreso:
+        raise HTTPException(status_code=400, detail="La fecha de salida debe ser posterior a la fecha de ingreso")
     
-    if reservas_superpuestas:
-        raise HTTPException(
-            status_code=400, 
-            detail="Ya existe una reserva para la propiedad en el período solicitado"
-        )
+    # Verificar que no haya reservas superpuestas (las canceladas no ocupan la propiedad).
+    # En Postgres lo garantiza la restricción de exclusión al confirmar, también frente a
+    # escrituras concurrentes.
+    detalle = "Ya existe una reserva para la propiedad en el período solicitado"
+    if (
+        reserva.estado != EstadoReservaEnum.CANCELADA
+        and not restriccion_en_base(db)
+        and hay_superposicion(db, reserva.propiedad_id, reserva.fecha_ingreso, reserva.fecha_salida)
+    ):
+        raise HTTPException(status_code=400, detail=detalle)
     
     db_reserva = Reserva(**reserva.dict())
     db.add(db_reserva)
-    db.commit()
+    registrar_reserva(db, db_reserva)
+    _confirmar(db, detalle)
     db.refresh(db_reserva)
+    indice_ocupacion.registrar(db_reserva)
     return db_reserva
 
-@router.get("/", response_model=List[ReservaWithPropiedad])
-def read_reservas(
-    skip: int = 0, 
-    limit: int = 100, 
-    propiedad_id: Optional[int] = None,
-    desde: Optional[date] = None,
-    hasta: Optional[date] = None,
-    plataforma: Optional[PlataformaEnum] = None,
+@router.post("/bulk", response_model=ReservaLoteRespuesta)
+def create_reservas_bulk(
+    reservas: List[Any] = Body(..., description="Lista de reservas con el formato de ReservaCreate"),
+    actualizar: bool = Query(False, description="Actualizar la reserva existente con la misma propiedad y fechas"),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Reserva)
+    if len(reservas) > MAX_RESERVAS_LOTE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote no puede superar las {MAX_RESERVAS_LOTE} reservas"
+        )
     
+    # Valida, resuelve conflictos e inserta en bloque; todo el lote se confirma en una transacción
+    respuesta = procesar_lote(db, reservas, actualizar=actualizar)
+    _confirmar(db, "Otra operación ocupó alguno de los períodos del lote durante la importación; reintente el lote")
+    if respuesta.creadas or respuesta.actualizadas:
+        indice_ocupacion.invalidar()
+    return respuesta
+
+def _filtrar_reservas(query, propiedad_id, desde, hasta, plataforma):
+    # Filtros comunes al listado y a la exportación
     if propiedad_id:
         query = query.filter(Reserva.propiedad_id == propiedad_id)
     
@@ -67,14 +119,94 @@ def read_reservas(
     if plataforma:
         query = query.filter(Reserva.plataforma == plataforma)
     
-    # Ordenar por fecha de ingreso descendente
-    query = query.order_by(Reserva.fecha_ingreso.desc())
+    return query
+
+@router.get("/", response_model=List[ReservaWithPropiedad])
+def read_reservas(
+    response: Response,
+    skip: int = 0, 
+    limit: int = 100, 
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor por la página anterior"),
+    propiedad_id: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    plataforma: Optional[PlataformaEnum] = None,
+    db: Session = Depends(get_db)
+):
+    query = _filtrar_reservas(db.query(Reserva), propiedad_id, desde, hasta, plataforma)
     
-    reservas = query.offset(skip).limit(limit).all()
-    return reservas
+    # Ordenar por fecha de ingreso descendente (id como desempate para un orden total)
+    query = query.order_by(Reserva.fecha_ingreso.desc(), Reserva.id.desc())
+    
+    # Con cursor se continúa después de la última fila vista (keyset), sin recorrer las anteriores
+    if cursor:
+        fecha_cursor, id_cursor = decodificar_cursor(cursor)
+        query = query.filter(tuple_(Reserva.fecha_ingreso, Reserva.id) < tuple_(fecha_cursor, id_cursor))
+    else:
+        query = query.offset(skip)
+    
+    reservas = query.options(joinedload(Reserva.propiedad)).limit(limit + 1).all()
+    return paginar(reservas, limit, response, lambda r: (r.fecha_ingreso, r.id))
+
+@router.get("/exportar")
+def exportar_reservas(
+    formato: str = Query("csv", description="csv o parquet"),
+    propiedad_id: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    plataforma: Optional[PlataformaEnum] = None
+):
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail="Formato no soportado, usar csv o parquet")
+    
+    consulta = _filtrar_reservas(select(
+        Reserva.id,
+        Reserva.propiedad_id,
+        Propiedad.nombre,
+        Reserva.fecha_ingreso,
+        Reserva.fecha_salida,
+        Reserva.nombre_huesped,
+        Reserva.plataforma,
+        Reserva.estado,
+        Reserva.monto_total_usd,
+        Reserva.monto_sena_usd,
+        Reserva.id_externo,
+        Reserva.notas,
+    ).join(
+        Propiedad, Propiedad.id == Reserva.propiedad_id
+    ), propiedad_id, desde, hasta, plataforma)
+    consulta = consulta.order_by(Reserva.fecha_ingreso, Reserva.id)
+    
+    return StreamingResponse(
+        exportar(formato, SessionLocal, consulta, COLUMNAS_RESERVAS),
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="reservas_{date.today().isoformat()}.{formato}"'}
+    )
+
+def _evento_calendario(fila) -> dict:
+    # Serializador liviano: evita construir un CalendarioReserva por evento
+    color = PLATAFORMA_COLORES.get(fila.plataforma, "#3788D8")
+    return {
+        "id": fila.id,
+        "title": f"{fila.nombre_huesped} ({fila.propiedad_nombre})",
+        "start": fila.fecha_ingreso.isoformat(),
+        "end": fila.fecha_salida.isoformat(),
+        "backgroundColor": color,
+        "borderColor": color,
+        "textColor": "#FFFFFF",
+        "extendedProps": {
+            "plataforma": fila.plataforma,
+            "monto_total_usd": fila.monto_total_usd,
+            "monto_sena_usd": fila.monto_sena_usd,
+            "notas": fila.notas,
+            "propiedad": fila.propiedad_nombre,
+            "estado": fila.estado,
+        },
+    }
 
-@router.get("/calendario")
+@router.get("/calendario", response_model=List[CalendarioReserva])
 def get_reservas_calendario(
+    request: Request,
     desde: Optional[date] = Query(None, description="Fecha de inicio para el calendario"),
     hasta: Optional[date] = Query(None, description="Fecha de fin para el calendario"),
     propiedad_id: Optional[int] = None,
@@ -87,45 +219,80 @@ def get_reservas_calendario(
     
     if not hasta:
         next_month = desde.replace(day=28) + timedelta(days=4)
-        hasta = next_month.replace(day=1) - timedelta(days=1)
         hasta = date(next_month.year, next_month.month, 1) - timedelta(days=1)
     
-    query = db.query(Reserva).filter(
-        Reserva.fecha_salida > desde,
-        Reserva.fecha_ingreso < hasta
-    )
+    def filtrar(query):
+        query = query.join(Propiedad, Propiedad.id == Reserva.propiedad_id).filter(
+            Reserva.fecha_salida > desde,
+            Reserva.fecha_ingreso < hasta
+        )
+        if propiedad_id:
+            query = query.filter(Reserva.propiedad_id == propiedad_id)
+        return query
     
-    if propiedad_id:
-        query = query.filter(Reserva.propiedad_id == propiedad_id)
+    # Huella de los datos del rango: si no cambió, responder 304 sin armar los eventos. Toda alta,
+    # cambio o llegada al rango deja la revisión de la fila como máxima (models.revision); las
+    # bajas y salidas del rango que no compensa un alta bajan la cantidad.
+    total, revision_reservas, revision_propiedades = filtrar(db.query(
+        func.count(Reserva.id),
+        func.max(Reserva.revision),
+        func.max(Propiedad.revision),
+    )).one()
+    etag = calcular_etag("calendario", desde, hasta, propiedad_id, total, revision_reservas, revision_propiedades)
     
-    reservas = query.all()
-    
-    # Convertir a formato de calendario
-    eventos = []
-    for reserva in reservas:
-        propiedad = db.query(Propiedad).filter(Propiedad.id == reserva.propiedad_id).first()
-        color = PLATAFORMA_COLORES.get(reserva.plataforma, "#3788D8")
-        
-        evento = CalendarioReserva(
-            id=reserva.id,
-            title=f"{reserva.nombre_huesped} ({propiedad.nombre})",
-            start=reserva.fecha_ingreso,
-            end=reserva.fecha_salida,
-            backgroundColor=color,
-            borderColor=color,
-            textColor="#FFFFFF",
-            extendedProps={
-                "plataforma": reserva.plataforma,
-                "monto_total_usd": reserva.monto_total_usd,
-                "monto_sena_usd": reserva.monto_sena_usd,
-                "notas": reserva.notas,
-                "propiedad": propiedad.nombre,
-                "estado": reserva.estado,
-            }
-        )
-        eventos.append(evento)
+    # Sin Last-Modified: borrar una reserva no avanza la última modificación, solo el ETag lo refleja
+    if no_modificado(request, etag):
+        return respuesta_no_modificada(etag)
     
-    return eventos
+    # Una sola consulta con la propiedad unida en lugar de una búsqueda por evento
+    filas = filtrar(db.query(
+        Reserva.id,
+        Reserva.nombre_huesped,
+        Reserva.fecha_ingreso,
+        Reserva.fecha_salida,
+        Reserva.plataforma,
+        Reserva.estado,
+        Reserva.monto_total_usd,
+        Reserva.monto_sena_usd,
+        Reserva.notas,
+        Propiedad.nombre.label("propiedad_nombre"),
+    )).order_by(Reserva.fecha_ingreso, Reserva.id).all()
+    
+    eventos = [_evento_calendario(fila) for fila in filas]
+    return JSONResponse(content=eventos, headers=cabeceras_cache(etag))
+
+@router.get("/disponibilidad", response_model=List[DisponibilidadPropiedad])
+def get_disponibilidad(
+    desde: date = Query(..., description="Fecha de ingreso buscada"),
+    hasta: date = Query(..., description="Fecha de salida buscada"),
+    noches: int = Query(1, ge=1, description="Mínimo de noches de los huecos libres informados"),
+    propiedad_id: Optional[int] = None,
+    solo_disponibles: bool = Query(False, description="Devolver solo las propiedades libres en todo el período"),
+    db: Session = Depends(get_db)
+):
+    if hasta <= desde:
+        raise HTTPException(status_code=400, detail="La fecha de salida debe ser posterior a la fecha de ingreso")
+    
+    # Se responde desde el índice en memoria; la base solo se consulta para comparar la revisión
+    # de reservas y, si otro proceso escribió, recargarlo
+    indice_ocupacion.asegurar(db)
+    disponibilidad = indice_ocupacion.disponibilidad(
+        desde, hasta, noches,
+        propiedad_ids=[propiedad_id] if propiedad_id is not None else None
+    )
+    
+    return [
+        {
+            "propiedad_id": id,
+            "disponible": disponible,
+            "huecos": [
+                {"desde": inicio, "hasta": fin, "noches": (fin - inicio).days}
+                for inicio, fin in huecos
+            ],
+        }
+        for id, (disponible, huecos) in disponibilidad.items()
+        if disponible or not solo_disponibles
+    ]
 
 @router.get("/{reserva_id}", response_model=ReservaWithPropiedad)
 def read_reserva(reserva_id: int, db: Session = Depends(get_db)):
@@ -142,7 +309,7 @@ def update_reserva(reserva_id: int, reserva: ReservaUpdate, db: Session = Depend
     
     # Si se actualiza la propiedad, verificar que exista
     if reserva.propiedad_id is not None:
-        db_propiedad = db.query(Propiedad).filter(Propiedad.id == reserva.propiedad_id).first()
+        db_propiedad = obtener_propiedad(db, reserva.propiedad_id)
         if not db_propiedad:
             raise HTTPException(status_code=404, detail="Propiedad no encontrada")
     
@@ -151,26 +318,26 @@ def update_reserva(reserva_id: int, reserva: ReservaUpdate, db: Session = Depend
     fecha_salida = reserva.fecha_salida or db_reserva.fecha_salida
     propiedad_id = reserva.propiedad_id or db_reserva.propiedad_id
     
-    if reserva.fecha_ingreso or reserva.fecha_salida or reserva.propiedad_id:
-        reservas_superpuestas = db.query(Reserva).filter(
-            Reserva.id != reserva_id,
-            Reserva.propiedad_id == propiedad_id,
-            Reserva.fecha_salida > fecha_ingreso,
-            Reserva.fecha_ingreso < fecha_salida
-        ).first()
-        
-        if reservas_superpuestas:
-            raise HTTPException(
-                status_code=400, 
-                detail="Ya existe una reserva para la propiedad en el período actualizado"
-            )
+    if fecha_salida <= fecha_ingreso:
+        raise HTTPException(status_code=400, detail="La fecha de salida debe ser posterior a la fecha de ingreso")
+    
+    # Las reservas canceladas no ocupan la propiedad
+    estado = reserva.estado or db_reserva.estado
+    detalle = "Ya existe una reserva para la propiedad en el período actualizado"
+    if (reserva.fecha_ingreso or reserva.fecha_salida or reserva.propiedad_id or reserva.estado) and estado != EstadoReservaEnum.CANCELADA:
+        if not restriccion_en_base(db) and hay_superposicion(db, propiedad_id, fecha_ingreso, fecha_salida, excluir_id=reserva_id):
+            raise HTTPException(status_code=400, detail=detalle)
+    
+    registrar_reserva(db, db_reserva, -1)
     
     update_data = reserva.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_reserva, key, value)
     
-    db.commit()
+    registrar_reserva(db, db_reserva)
+    _confirmar(db, detalle)
     db.refresh(db_reserva)
+    indice_ocupacion.registrar(db_reserva)
     return db_reserva
 
 @router.delete("/{reserva_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -179,6 +346,9 @@ def delete_reserva(reserva_id: int, db: Session = Depends(get_db)):
     if db_reserva is None:
         raise HTTPException(status_code=404, detail="Reserva no encontrada")
     
+    registrar_reserva(db, db_reserva, -1)
     db.delete(db_reserva)
     db.commit()
+    # La baja no deja fila con su revisión: si la actual es la siguiente a la del índice, es esta
+    indice_ocupacion.quitar(reserva_id, revision_actual(db))
     return None
\ No newline at end of file
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
+
+from ...db.database import get_db
+from ...models import TipoCambio
+from ...schemas import TipoCambioCreate, TipoCambioUpdate, TipoCambioInDB
+from ...services.cache import cache_tipos_cambio, tabla_tipos_cambio
+
+router = APIRouter()
+
+@router.post("/", response_model=TipoCambioInDB, status_code=status.HTTP_201_CREATED)
+def create_tipo_cambio(tipo_cambio: TipoCambioCreate, db: Session = Depends(get_db)):
+    if db.get(TipoCambio, tipo_cambio.fecha) is not None:
+        raise HTTPException(status_code=400, detail="Ya hay un tipo de cambio cargado para esa fecha")
+
+    db_tipo_cambio = TipoCambio(**tipo_cambio.dict())
+    db.add(db_tipo_cambio)
+    db.commit()
+    db.refresh(db_tipo_cambio)
+    cache_tipos_cambio.invalidar()
+    return db_tipo_cambio
+
+@router.get("/", response_model=List[TipoCambioInDB])
+def read_tipos_cambio(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    query = db.query(TipoCambio)
+
+    if desde:
+        query = query.filter(TipoCambio.fecha >= desde)
+
+    if hasta:
+        query = query.filter(TipoCambio.fecha <= hasta)
+
+    return query.order_by(TipoCambio.fecha).all()
+
+@router.get("/vigente", response_model=TipoCambioInDB)
+def read_tipo_cambio_vigente(
+    fecha: Optional[date] = Query(None, description="Por defecto, hoy"),
+    db: Session = Depends(get_db)
+):
+    # Se resuelve sobre la tabla en memoria, sin consultar la base
+    cotizacion = tabla_tipos_cambio(db).cotizacion(fecha or date.today())
+    if cotizacion is None:
+        raise HTTPException(status_code=404, detail="No hay un tipo de cambio vigente para esa fecha")
+    return cotizacion
+
+@router.put("/{fecha}", response_model=TipoCambioInDB)
+def update_tipo_cambio(fecha: date, tipo_cambio: TipoCambioUpdate, db: Session = Depends(get_db)):
+    db_tipo_cambio = db.get(TipoCambio, fecha)
+    if db_tipo_cambio is None:
+        raise HTTPException(status_code=404, detail="Tipo de cambio no encontrado")
+
+    for key, value in tipo_cambio.dict(exclude_unset=True).items():
+        setattr(db_tipo_cambio, key, value)
+
+    db.commit()
+    db.refresh(db_tipo_cambio)
+    cache_tipos_cambio.invalidar()
+    return db_tipo_cambio
+
+@router.delete("/{fecha}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_tipo_cambio(fecha: date, db: Session = Depends(get_db)):
+    db_tipo_cambio = db.get(TipoCambio, fecha)
+    if db_tipo_cambio is None:
+        raise HTTPException(status_code=404, detail="Tipo de cambio no encontrado")
+
+    db.delete(db_tipo_cambio)
+    db.commit()
+    cache_tipos_cambio.invalidar()
+    return None
@@ -0,0 +1,277 @@
+"""
+Métricas por ruta en formato de texto de Prometheus.
+
+MetricasMiddleware mide cada request a una ruta de api_router: cantidad por estado, latencia,
+requests en curso, tamaño de la respuesta y tiempo y cantidad de consultas a la base. Las
+rutas se etiquetan con su plantilla (/api/v1/reservas/{reserva_id}), no con la URL concreta,
+para que la cantidad de series quede acotada.
+
+El tiempo de base se acumula con eventos de SQLAlchemy sobre todos los engines (sincrónicos y
+asincrónicos) en una medición guardada en un ContextVar: los endpoints sincrónicos corren en
+el threadpool con una copia del contexto, que apunta a la misma medición.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import compile_path
+
+PREFIJO = "reservas"
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    pares = [f'{nombre}="{_escapar(str(valor))}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = f"{PREFIJO}_{nombre}"
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def lineas(self) -> List[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"] + [
+            linea for valores, serie in series for linea in self._lineas_serie(valores, serie)
+        ]
+
+    def _lineas_serie(self, valores, serie) -> Iterable[str]:
+        yield f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(serie)}"
+
+
+class Contador(Metrica):
+    tipo = "counter"
+
+    def sumar(self, valores: Tuple[str, ...], cantidad: float = 1):
+        with self._lock:
+            self._series[valores] = self._series.get(valores, 0) + cantidad
+
+
+class Medidor(Contador):
+    tipo = "gauge"
+
+
+class Histograma(Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str], buckets: Sequence[float]):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valores: Tuple[str, ...], valor: float):
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                # Conteo por bucket (el último es +Inf) y suma
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][bisect_left(self.buckets, valor)] += 1
+            serie[1] += valor
+
+    def _lineas_serie(self, valores, serie) -> Iterable[str]:
+        conteos, suma = serie[0][:], serie[1]
+        acumulado = 0
+        for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+            acumulado += conteo
+            le = "+Inf" if limite == float("inf") else _numero(limite)
+            etiquetas = _etiquetas(self.etiquetas, valores, f'le="{le}"')
+            yield f"{self.nombre}_bucket{etiquetas} {acumulado}"
+        yield f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {_numero(suma)}"
+        yield f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {acumulado}"
+
+
+RUTA = ("metodo", "ruta")
+
+requests_total = Contador("http_requests_total", "Requests atendidos por ruta y código de estado.", RUTA + ("estado",))
+requests_en_curso = Medidor("http_requests_en_curso", "Requests en curso por ruta.", RUTA)
+duracion_request = Histograma(
+    "http_request_duracion_segundos", "Latencia de los requests por ruta.", RUTA, BUCKETS_LATENCIA
+)
+bytes_respuesta = Histograma(
+    "http_respuesta_bytes", "Tamaño del cuerpo de las respuestas por ruta.", RUTA, BUCKETS_BYTES
+)
+duracion_db = Histograma(
+    "db_duracion_por_request_segundos", "Tiempo total de consultas a la base por request.", RUTA, BUCKETS_LATENCIA
+)
+consultas_db = Contador("db_consultas_total", "Consultas a la base ejecutadas por ruta.", RUTA)
+
+# Tareas programadas (services.tareas), en el worker que ejecutó cada una
+ejecuciones_tarea = Contador(
+    "tarea_ejecuciones_total",
+    "Ejecuciones de tareas programadas por resultado (ok, error u omitida si la corrió otro worker).",
+    ("tarea", "resultado")
+)
+duracion_tarea = Histograma(
+    "tarea_duracion_segundos", "Duración de las tareas programadas.", ("tarea",), BUCKETS_LATENCIA + (30.0, 60.0, 300.0)
+)
+filas_tarea = Contador("tarea_filas_total", "Filas modificadas por las tareas programadas.", ("tarea",))
+
+METRICAS: List[Metrica] = [
+    requests_total, requests_en_curso, duracion_request, bytes_respuesta, duracion_db, consultas_db,
+    ejecuciones_tarea, duracion_tarea, filas_tarea,
+]
+
+
+class MedicionDB:
+    __slots__ = ("segundos", "consultas")
+
+    def __init__(self):
+        self.segundos = 0.0
+        self.consultas = 0
+
+
+medicion_db: ContextVar[Optional[MedicionDB]] = ContextVar("medicion_db", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    if medicion_db.get() is not None:
+        conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    medicion = medicion_db.get()
+    inicios = conn.info.get("metricas_inicio")
+    if medicion is not None and inicios:
+        medicion.segundos += time.perf_counter() - inicios.pop()
+        medicion.consultas += 1
+
+
+class TablaRutas:
+    """
+    Resuelve el método y la ruta de un request a la plantilla de la ruta de la API que lo
+    atiende (/api/v1/reservas/{reserva_id}), sin pasar por el router de la aplicación.
+    """
+
+    def __init__(self, routers: Sequence[Tuple[str, APIRouter]], prefijo: str = ""):
+        self.routers = routers
+        self.prefijo = prefijo
+        self._tabla: Optional[List[Tuple[Pattern, frozenset, str]]] = None
+
+    def _rutas(self) -> List[Tuple[Pattern, frozenset, str]]:
+        # (expresión, métodos, plantilla) en el orden de declaración, que es el orden de resolución
+        if self._tabla is None:
+            self._tabla = []
+            for prefijo_router, router in self.routers:
+                for ruta in router.routes:
+                    if isinstance(ruta, APIRoute):
+                        plantilla = self.prefijo + prefijo_router + ruta.path
+                        expresion, _, _ = compile_path(plantilla)
+                        self._tabla.append((expresion, frozenset(ruta.methods), plantilla))
+        return self._tabla
+
+    def plantilla(self, metodo: str, path: str) -> Optional[str]:
+        if not path.startswith(self.prefijo):
+            return None
+        for expresion, metodos, plantilla in self._rutas():
+            if metodo in metodos and expresion.match(path):
+                return plantilla
+        return None
+
+    def resolver(self, scope) -> Optional[str]:
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        return self.plantilla(scope["method"], path)
+
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI puro (no envuelve la respuesta en memoria, así que sirve también para
+    respuestas en streaming). Solo mide las rutas de los routers indicados.
+    """
+
+    def __init__(self, app, routers: Sequence[Tuple[str, APIRouter]], prefijo: str = ""):
+        self.app = app
+        self.rutas = TablaRutas(routers, prefijo)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        ruta = self.rutas.resolver(scope)
+        if ruta is None:
+            await self.app(scope, receive, send)
+            return
+
+        etiquetas = (scope["method"], ruta)
+        estado = [500]
+        tamano = [0]
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado[0] = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                tamano[0] += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        medicion = MedicionDB()
+        token = medicion_db.set(medicion)
+        requests_en_curso.sumar(etiquetas)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            medicion_db.reset(token)
+            requests_en_curso.sumar(etiquetas, -1)
+            requests_total.sumar(etiquetas + (str(estado[0]),))
+            duracion_request.observar(etiquetas, duracion)
+            bytes_respuesta.observar(etiquetas, tamano[0])
+            duracion_db.observar(etiquetas, medicion.segundos)
+            consultas_db.sumar(etiquetas, medicion.consultas)
+
+
+def _metricas_pool(pools: Dict[str, dict]) -> List[str]:
+    """
+    Estado de los pools de conexiones (ver db.pool.estadisticas_pool) como métricas.
+    """
+    campos = (
+        ("conexiones_en_uso", "gauge", "Conexiones del pool en uso."),
+        ("overflow", "gauge", "Conexiones abiertas por encima de pool_size."),
+        ("checkouts", "counter", "Conexiones entregadas por el pool."),
+        ("esperas", "counter", "Checkouts que tuvieron que esperar una conexión libre."),
+        ("timeouts", "counter", "Checkouts que agotaron pool_timeout."),
+    )
+    lineas = []
+    for campo, tipo, ayuda in campos:
+        nombre = f"{PREFIJO}_db_pool_{campo}" + ("_total" if tipo == "counter" else "")
+        lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+        lineas += [
+            f'{nombre}{{pool="{pool}"}} {_numero(estadisticas[campo])}'
+            for pool, estadisticas in pools.items() if campo in estadisticas
+        ]
+    return lineas
+
+
+def exponer_metricas(pools: Optional[Dict[str, dict]] = None) -> str:
+    lineas = [linea for metrica in METRICAS for linea in metrica.lineas()]
+    if pools:
+        lineas += _metricas_pool(pools)
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,36 @@
+import base64
+import json
+from datetime import date
+from typing import Any, List, Tuple
+
+from fastapi import HTTPException, Response
+
+# Cabecera con el cursor de la página siguiente (ausente en la última página)
+CABECERA_CURSOR = "X-Next-Cursor"
+
+
+def codificar_cursor(fecha: date, id: int) -> str:
+    """
+    Genera un cursor opaco a partir de la clave de orden (fecha, id) de la última fila de la página.
+    """
+    crudo = json.dumps([fecha.isoformat(), id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        fecha, id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return date.fromisoformat(fecha), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+
+def paginar(filas: List[Any], limit: int, response: Response, clave) -> List[Any]:
+    """
+    Recorta la fila extra pedida (limit + 1) y publica el cursor siguiente en la respuesta.
+    """
+    if len(filas) > limit:
+        filas = filas[:limit]
+        response.headers[CABECERA_CURSOR] = codificar_cursor(*clave(filas[-1]))
+    return filas
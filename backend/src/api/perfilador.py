@@ -0,0 +1,217 @@
+"""
+Perfilador de consultas SQL por request (opcional, se activa con PERFILADOR_SQL).
+
+Cuenta y cronometra cada sentencia que ejecuta un request y marca como sospechosas de N+1
+las sentencias idénticas que se repiten con parámetros distintos (la misma consulta por
+cada fila de un listado). El resumen va en cabeceras de la respuesta y en el log:
+
+    X-SQL-Consultas: 4
+    X-SQL-Tiempo-Ms: 12.31
+    X-SQL-Repetidas: 1
+    X-SQL-Presupuesto: 3
+
+Las rutas pueden tener un presupuesto de consultas (PRESUPUESTOS_CONSULTAS); si un request lo
+supera se registra una advertencia, y el benchmark (benchmarks/suite.py) falla.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from fastapi import APIRouter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metricas import TablaRutas
+
+logger = logging.getLogger(__name__)
+
+# Consultas máximas por request, por "MÉTODO plantilla". Las rutas que no figuran no tienen
+# límite; las que dependen del tamaño de la entrada (lotes, importaciones) no se listan.
+# Los valores son el peor caso con las caches de propiedades, categorías y tipos de cambio vacías.
+PRESUPUESTOS_CONSULTAS: Dict[str, int] = {
+    "GET /api/v1/propiedades/": 1,
+    "GET /api/v1/propiedades/{propiedad_id}": 1,
+    "GET /api/v1/reservas/": 1,
+    "GET /api/v1/reservas/exportar": 1,
+    "GET /api/v1/reservas/calendario": 2,
+    "GET /api/v1/reservas/disponibilidad": 3,
+    "GET /api/v1/reservas/{reserva_id}": 2,
+    "POST /api/v1/reservas/": 6,  # Incluye el incremento de la revisión de reservas
+    "GET /api/v1/categorias/": 1,
+    "GET /api/v1/categorias/{categoria_id}": 1,
+    "DELETE /api/v1/categorias/{categoria_id}": 4,
+    "GET /api/v1/caja/": 1,
+    "GET /api/v1/caja/exportar": 1,
+    "GET /api/v1/caja/resumen": 1,
+    "GET /api/v1/caja/resumen-mensual": 1,
+    "GET /api/v1/caja/liquidacion": 1,
+    "GET /api/v1/caja/resumen-moneda": 1,
+    "GET /api/v1/caja/{movimiento_id}": 2,
+    "POST /api/v1/caja/": 6,
+    "GET /api/v1/caja/saldos-socios": 7,
+    "GET /api/v1/caja/libro-socios": 8,
+    "GET /api/v1/tipos-cambio/": 1,
+    "GET /api/v1/tipos-cambio/vigente": 1,
+    "GET /api/v1/integraciones/canales": 1,
+    "GET /api/v1/analitica/rendimiento": 2,
+    "GET /api/v1/buscar/": 1,
+}
+
+
+class Sentencia:
+    __slots__ = ("cantidad", "segundos", "parametros")
+
+    def __init__(self):
+        self.cantidad = 0
+        self.segundos = 0.0
+        self.parametros = set()
+
+
+class Repeticion(NamedTuple):
+    sql: str
+    cantidad: int
+    parametros_distintos: int
+    segundos: float
+
+
+class PerfilSQL:
+    def __init__(self, umbral_repeticiones: int = 5, presupuesto: Optional[int] = None):
+        self.umbral_repeticiones = umbral_repeticiones
+        self.presupuesto = presupuesto
+        self.consultas = 0
+        self.segundos = 0.0
+        self.sentencias: Dict[str, Sentencia] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, sql: str, parametros, executemany: bool, segundos: float):
+        # Un executemany es una sola ida a la base: cuenta como una consulta con parámetros propios
+        clave = ("executemany", id(parametros)) if executemany else repr(parametros)
+        with self._lock:
+            sentencia = self.sentencias.get(sql)
+            if sentencia is None:
+                sentencia = self.sentencias[sql] = Sentencia()
+            sentencia.cantidad += 1
+            sentencia.segundos += segundos
+            sentencia.parametros.add(clave)
+            self.consultas += 1
+            self.segundos += segundos
+
+    def repetidas(self) -> List[Repeticion]:
+        """
+        Sentencias ejecutadas al menos umbral_repeticiones veces con parámetros distintos:
+        el patrón típico de N+1. Ordenadas por cantidad.
+        """
+        with self._lock:
+            repetidas = [
+                Repeticion(sql, sentencia.cantidad, len(sentencia.parametros), sentencia.segundos)
+                for sql, sentencia in self.sentencias.items()
+                if sentencia.cantidad >= self.umbral_repeticiones and len(sentencia.parametros) > 1
+            ]
+        return sorted(repetidas, key=lambda repeticion: repeticion.cantidad, reverse=True)
+
+    @property
+    def excedido(self) -> bool:
+        return self.presupuesto is not None and self.consultas > self.presupuesto
+
+    def cabeceras(self) -> List[Tuple[bytes, bytes]]:
+        cabeceras = [
+            (b"x-sql-consultas", str(self.consultas).encode()),
+            (b"x-sql-tiempo-ms", f"{self.segundos * 1000:.2f}".encode()),
+            (b"x-sql-repetidas", str(len(self.repetidas())).encode()),
+        ]
+        if self.presupuesto is not None:
+            cabeceras.append((b"x-sql-presupuesto", str(self.presupuesto).encode()))
+        return cabeceras
+
+
+perfil_sql: ContextVar[Optional[PerfilSQL]] = ContextVar("perfil_sql", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    if perfil_sql.get() is not None:
+        conn.info.setdefault("perfilador_inicio", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    perfil = perfil_sql.get()
+    inicios = conn.info.get("perfilador_inicio")
+    if perfil is not None and inicios:
+        perfil.registrar(statement, parameters, executemany, time.perf_counter() - inicios.pop())
+
+
+@contextmanager
+def perfilar(umbral_repeticiones: int = 5, presupuesto: Optional[int] = None) -> Iterator[PerfilSQL]:
+    """
+    Perfila las consultas del bloque, fuera de un request (scripts, consola, pruebas):
+
+        with perfilar(presupuesto=3) as perfil:
+            listar_reservas(db)
+        assert not perfil.excedido and not perfil.repetidas()
+    """
+    perfil = PerfilSQL(umbral_repeticiones, presupuesto)
+    token = perfil_sql.set(perfil)
+    try:
+        yield perfil
+    finally:
+        perfil_sql.reset(token)
+
+
+def _registrar_en_log(metodo: str, ruta: str, perfil: PerfilSQL):
+    logger.debug(
+        "%s %s: %d consultas en %.2f ms", metodo, ruta, perfil.consultas, perfil.segundos * 1000
+    )
+    for repeticion in perfil.repetidas():
+        logger.warning(
+            "%s %s: posible N+1, %d ejecuciones (%d parámetros distintos, %.2f ms) de: %s",
+            metodo, ruta, repeticion.cantidad, repeticion.parametros_distintos,
+            repeticion.segundos * 1000, " ".join(repeticion.sql.split())[:300]
+        )
+    if perfil.excedido:
+        logger.warning(
+            "%s %s: %d consultas, presupuesto %d", metodo, ruta, perfil.consultas, perfil.presupuesto
+        )
+
+
+class PerfiladorMiddleware:
+    """
+    Middleware ASGI que perfila los requests a las rutas de los routers indicados. Las
+    cabeceras se agregan al iniciar la respuesta; en respuestas en streaming no incluyen las
+    consultas hechas mientras se envía el cuerpo, que sí quedan en el log.
+    """
+
+    def __init__(
+        self,
+        app,
+        routers: Sequence[Tuple[str, APIRouter]],
+        prefijo: str = "",
+        umbral_repeticiones: int = 5
+    ):
+        self.app = app
+        self.rutas = TablaRutas(routers, prefijo)
+        self.umbral_repeticiones = umbral_repeticiones
+
+    async def __call__(self, scope, receive, send):
+        ruta = self.rutas.resolver(scope) if scope["type"] == "http" else None
+        if ruta is None:
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        perfil = PerfilSQL(self.umbral_repeticiones, PRESUPUESTOS_CONSULTAS.get(f"{metodo} {ruta}"))
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                mensaje = {**mensaje, "headers": list(mensaje.get("headers", [])) + perfil.cabeceras()}
+            await send(mensaje)
+
+        token = perfil_sql.set(perfil)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            perfil_sql.reset(token)
+            _registrar_en_log(metodo, ruta, perfil)
@@ -32,7 +32,34 @@ class Settings(BaseSettings):
         
         # Construir la URL de conexión manualmente
         return f"postgresql://{user}:{password}@{host}:{port}/{db}"
+
+    # Pool de conexiones (sobrescribibles por variables de entorno)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # segundos de espera por una conexión libre
+    DB_POOL_RECYCLE: int = 1800  # segundos antes de renovar una conexión
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # 0 desactiva el límite por sentencia
+
+    # Cache en memoria de propiedades y categorías
+    CACHE_TTL_SEGUNDOS: float = 300.0
+    CACHE_MAX_ENTRADAS: int = 1024
     
+    # Partes de cada socio en el resultado para la liquidación (se normalizan a 1)
+    LIQUIDACION_PARTES: Dict[str, float] = {"Maxy": 1.0, "Oso": 1.0, "Laura": 1.0}
+
+    # Perfilador de consultas SQL por request (cabeceras X-SQL-* y log); solo para desarrollo
+    PERFILADOR_SQL: bool = False
+    PERFILADOR_UMBRAL_REPETICIONES: int = 5  # Ejecuciones de una misma sentencia para sospechar N+1
+
+    # Tareas programadas en segundo plano (services.tareas); con varios workers, cada ejecución
+    # la hace uno solo
+    TAREAS_PROGRAMADAS: bool = True
+    TAREAS_DEMORA_INICIAL_SEGUNDOS: float = 60.0  # Primera ejecución después del arranque
+    TAREAS_INTERVALO_ESTADOS_SEGUNDOS: float = 900.0  # Completar y cancelar reservas
+    TAREAS_INTERVALO_RESUMENES_SEGUNDOS: float = 86400.0  # Resumen mensual y saldos de socios
+    RESERVAS_PENDIENTES_DIAS_GRACIA: int = 1  # Días después del ingreso para cancelar una pendiente
+
     # Configuración CORS
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
@@ -47,6 +74,14 @@ class Settings(BaseSettings):
     BOOKING_API_URL: Optional[str] = os.getenv("BOOKING_API_URL")
     BOOKING_API_KEY: Optional[str] = os.getenv("BOOKING_API_KEY")
 
+    # Sincronización con canales
+    SYNC_CONCURRENCIA: int = 8  # Publicaciones consultadas en paralelo
+    SYNC_REINTENTOS: int = 3
+    SYNC_BACKOFF_SEGUNDOS: float = 0.5  # Espera base, se duplica en cada reintento
+    SYNC_TIMEOUT_SEGUNDOS: float = 10.0
+    SYNC_ESPERA_MAXIMA_SEGUNDOS: float = 60.0  # Tope para el Retry-After del canal
+    SYNC_CORRIDAS_CON_FALLAS_MAXIMAS: int = 5  # Corridas que la marca de agua espera a una reserva que falla
+
     class Config:
         case_sensitive = True
 
@@ -1,22 +1,53 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from ..core.config import settings
+from .pool import MetricasAsyncQueuePool, MetricasQueuePool
 
-POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
-POSTGRES_SERVER = os.getenv("POSTGRES_SERVER", "db")
-POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
-POSTGRES_DB = os.getenv("POSTGRES_DB", "reservas_abby")
+SQLALCHEMY_DATABASE_URL = make_url(str(settings.SQLALCHEMY_DATABASE_URI))
 
-SQLALCHEMY_DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+# Mismo servidor con el driver asyncpg, para los endpoints asíncronos
+ASYNC_SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.set(drivername="postgresql+asyncpg")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+def _opciones_engine(url: URL, asincronico: bool) -> dict:
+    """
+    Parámetros de pool y de conexión tomados de la configuración.
+    """
+    opciones = {
+        "poolclass": MetricasAsyncQueuePool if asincronico else MetricasQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0 and url.get_backend_name() == "postgresql":
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if asincronico:
+            opciones["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            opciones["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return opciones
+
+
+def crear_engine(url: URL = SQLALCHEMY_DATABASE_URL):
+    return create_engine(url, **_opciones_engine(url, asincronico=False))
+
+
+def crear_async_engine(url: URL = ASYNC_SQLALCHEMY_DATABASE_URL):
+    return create_async_engine(url, **_opciones_engine(url, asincronico=True))
+
+
+engine = crear_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = crear_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -24,4 +55,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,89 @@
+"""
+Pools de conexiones con estadísticas de uso.
+
+Además de lo que ya expone QueuePool (conexiones en uso, libres y overflow), se cuentan
+los checkouts, cuántos tuvieron que esperar por estar el pool saturado, el tiempo de
+espera y los timeouts. Los contadores se reinician si el engine hace dispose().
+"""
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class _MetricasPool:
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self._lock_metricas = threading.Lock()
+        self.checkouts = 0
+        self.esperas = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def _saturado(self) -> bool:
+        # Mismo criterio que QueuePool._do_get para decidir si el checkout bloquea
+        return (
+            self._max_overflow > -1
+            and self._overflow >= self._max_overflow
+            and self.checkedin() == 0
+        )
+
+    def _registrar(self, espero: bool, segundos: float, timeout: bool = False):
+        with self._lock_metricas:
+            self.checkouts += 1
+            if espero:
+                self.esperas += 1
+                self.espera_total += segundos
+                self.espera_max = max(self.espera_max, segundos)
+            if timeout:
+                self.timeouts += 1
+
+    def connect(self):
+        espero = self._saturado()
+        inicio = time.perf_counter()
+        try:
+            conexion = super().connect()
+        except exc.TimeoutError:
+            self._registrar(True, time.perf_counter() - inicio, timeout=True)
+            raise
+        self._registrar(espero, time.perf_counter() - inicio)
+        return conexion
+
+
+class MetricasQueuePool(_MetricasPool, QueuePool):
+    pass
+
+
+class MetricasAsyncQueuePool(_MetricasPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def estadisticas_pool(pool: Pool) -> Dict[str, Any]:
+    """
+    Estado actual y acumulado de un pool, para dimensionar workers contra la saturación real.
+    """
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__, "estado": pool.status()}
+
+    estadisticas = {
+        "pool": type(pool).__name__,
+        "tamano": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "timeout_segundos": pool.timeout(),
+        "conexiones_en_uso": pool.checkedout(),
+        "conexiones_libres": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    if isinstance(pool, _MetricasPool):
+        with pool._lock_metricas:
+            estadisticas.update({
+                "checkouts": pool.checkouts,
+                "esperas": pool.esperas,
+                "timeouts": pool.timeouts,
+                "espera_promedio_ms": round(1000 * pool.espera_total / pool.esperas, 3) if pool.esperas else 0.0,
+                "espera_max_ms": round(1000 * pool.espera_max, 3),
+            })
+    return estadisticas
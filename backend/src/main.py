@@ -1,20 +1,42 @@
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import func
+from sqlalchemy.orm import Session
 from typing import List
 import os
 
-from .api.api import api_router
+from .api.api import ROUTERS, api_router
+from .api.metricas import MetricasMiddleware, exponer_metricas
+from .api.perfilador import PerfiladorMiddleware
 from .core.config import settings
-from .db.database import engine, Base
+from .db.database import engine, async_engine, get_db
+from .db.pool import estadisticas_pool
+from .models import EjecucionTarea
+from .schemas import EjecucionTareaInDB
+from .services.cache import estadisticas_cache
+from .services.tareas import Planificador
 
-# Crear tablas en la base de datos
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El esquema se crea y actualiza con migraciones (alembic upgrade head), no al importar la
+    # aplicación: el worker arranca sin conectarse y la primera conexión la abre un request (o
+    # las tareas programadas, pasada su demora inicial).
+    planificador = Planificador() if settings.TAREAS_PROGRAMADAS else None
+    if planificador:
+        planificador.iniciar()
+    yield
+    if planificador:
+        await planificador.detener()
+    engine.dispose()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Reservas Abby API",
     description="API para el sistema de reservas",
     version="1.0.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Configurar CORS para permitir peticiones desde el frontend
@@ -24,8 +46,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor", "X-SQL-Consultas", "X-SQL-Tiempo-Ms", "X-SQL-Repetidas", "X-SQL-Presupuesto"],
 )
 
+# Latencia, volumen y tiempo de base por ruta de la API (ver /api/v1/metrics)
+app.add_middleware(MetricasMiddleware, routers=ROUTERS, prefijo=settings.API_V1_STR)
+
+# Conteo de consultas, N+1 y presupuestos por ruta (cabeceras X-SQL-*), solo si se pide
+if settings.PERFILADOR_SQL:
+    app.add_middleware(
+        PerfiladorMiddleware,
+        routers=ROUTERS,
+        prefijo=settings.API_V1_STR,
+        umbral_repeticiones=settings.PERFILADOR_UMBRAL_REPETICIONES
+    )
+
 # Incluir las rutas de la API
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -35,4 +70,30 @@ async def root():
 
 @app.get("/api/v1/health")
 async def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/api/v1/health/pool")
+async def pool_stats():
+    return {
+        "sincronico": estadisticas_pool(engine.pool),
+        "asincronico": estadisticas_pool(async_engine.pool),
+    }
+
+@app.get("/api/v1/health/cache")
+async def cache_stats():
+    return estadisticas_cache()
+
+@app.get("/api/v1/health/tareas", response_model=List[EjecucionTareaInDB])
+def tareas_stats(db: Session = Depends(get_db)):
+    # Última ejecución de cada tarea programada, de cualquier worker
+    ultimas = db.query(func.max(EjecucionTarea.id)).group_by(EjecucionTarea.tarea)
+    return db.query(EjecucionTarea).filter(EjecucionTarea.id.in_(ultimas)).order_by(EjecucionTarea.tarea).all()
+
+@app.get("/api/v1/metrics", response_class=Response)
+async def metrics():
+    # Formato de texto de Prometheus
+    cuerpo = exponer_metricas(pools={
+        "sincronico": estadisticas_pool(engine.pool),
+        "asincronico": estadisticas_pool(async_engine.pool),
+    })
+    return Response(content=cuerpo, media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,2 +1,6 @@
 from .reserva import Propiedad, Reserva, PlataformaEnum, EstadoReservaEnum
-from .caja import CategoriaMovimiento, MovimientoCaja, TipoMovimientoEnum, MonedaEnum, SocioEnum
\ No newline at end of file
+from .caja import CategoriaMovimiento, MovimientoCaja, ResumenMensualCaja, SaldoSocioMensual, TipoCambio, TipoMovimientoEnum, MonedaEnum, SocioEnum
+from .canal import SincronizacionCanal
+from .tarea import EjecucionTarea
+from .revision import Revision, revision_actual
+from . import busqueda  # Índices de búsqueda de texto sobre reservas y movimientos
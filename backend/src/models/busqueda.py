@@ -0,0 +1,53 @@
+from sqlalchemy import DDL, Index, event, func, literal_column
+from ..db.database import Base
+from .reserva import Reserva
+from .caja import MovimientoCaja
+
+# Expresiones de la búsqueda de texto (services.busqueda) e índices GIN de Postgres sobre ellas.
+# Las consultas usan estas mismas expresiones para que el planificador elija los índices.
+
+# Letras con acento y su equivalente sin acento; translate() es inmutable y puede indexarse.
+# services.busqueda aplica la misma tabla al texto buscado.
+CON_ACENTO = "ÁÀÂÄÉÈÊËÍÌÎÏÓÒÔÖÚÙÛÜÑÇáàâäéèêëíìîïóòôöúùûüñç"
+SIN_ACENTO = "AAAAEEEEIIIIOOOOUUUUNCaaaaeeeeiiiioooouuuunc"
+
+
+def sin_acentos(expresion):
+    return func.translate(expresion, literal_column(f"'{CON_ACENTO}'"), literal_column(f"'{SIN_ACENTO}'"))
+
+
+def _documento(expresion):
+    return func.to_tsvector(literal_column("'simple'::regconfig"), expresion)
+
+
+# Reservas: nombre del huésped y notas como documento, y trigramas del nombre para coincidencias
+# parciales o con errores de tipeo
+NOMBRE_HUESPED = sin_acentos(Reserva.nombre_huesped)
+DOCUMENTO_RESERVA = _documento(
+    NOMBRE_HUESPED.concat(literal_column("' '")).concat(sin_acentos(func.coalesce(Reserva.notas, literal_column("''"))))
+)
+
+# Movimientos de caja: la descripción, igual que en reservas
+DESCRIPCION_MOVIMIENTO = sin_acentos(MovimientoCaja.descripcion)
+DOCUMENTO_MOVIMIENTO = _documento(func.coalesce(DESCRIPCION_MOVIMIENTO, literal_column("''")))
+
+for tabla, nombre, expresion, operadores in (
+    (Reserva, "ix_reservas_busqueda", DOCUMENTO_RESERVA, None),
+    (Reserva, "ix_reservas_nombre_huesped_trgm", NOMBRE_HUESPED, "gin_trgm_ops"),
+    (MovimientoCaja, "ix_movimientos_caja_busqueda", DOCUMENTO_MOVIMIENTO, None),
+    (MovimientoCaja, "ix_movimientos_caja_descripcion_trgm", DESCRIPCION_MOVIMIENTO, "gin_trgm_ops"),
+):
+    expresion = expresion.label(nombre)
+    tabla.__table__.append_constraint(Index(
+        nombre,
+        expresion,
+        postgresql_using="gin",
+        postgresql_ops={nombre: operadores} if operadores else {},
+    ).ddl_if(dialect="postgresql"))
+
+# pg_trgm provee la clase de operadores gin_trgm_ops
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Enum, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Enum, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 import enum
 from ..db.database import Base
@@ -29,6 +29,13 @@ class CategoriaMovimiento(Base):
 
 class MovimientoCaja(Base):
     __tablename__ = "movimientos_caja"
+    __table_args__ = (
+        # Índices alineados con el orden (fecha desc, id desc) de los listados y sus filtros
+        Index("ix_movimientos_caja_fecha_id", "fecha", "id"),
+        Index("ix_movimientos_caja_socio_fecha_id", "socio", "fecha", "id"),
+        Index("ix_movimientos_caja_moneda_fecha_id", "moneda", "fecha", "id"),
+        Index("ix_movimientos_caja_categoria_fecha_id", "categoria_id", "fecha", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     fecha = Column(Date, nullable=False)
@@ -42,4 +49,33 @@ class MovimientoCaja(Base):
     relacionado_reserva_id = Column(Integer, ForeignKey("reservas.id"), nullable=True)
     
     categoria = relationship("CategoriaMovimiento", back_populates="movimientos")
-    reserva = relationship("Reserva", backref="movimientos_caja")
\ No newline at end of file
+    reserva = relationship("Reserva", backref="movimientos_caja")
+
+class ResumenMensualCaja(Base):
+    __tablename__ = "resumen_mensual_caja"
+    
+    # Acumulado mensual mantenido incrementalmente por los endpoints de caja y reservas
+    anio = Column(Integer, primary_key=True)
+    mes = Column(Integer, primary_key=True)
+    total_ingresos_pesos = Column(Float, nullable=False, default=0.0)  # USD convertido con tipo_cambio
+    total_egresos_pesos = Column(Float, nullable=False, default=0.0)
+    reservas_total = Column(Integer, nullable=False, default=0)
+
+class SaldoSocioMensual(Base):
+    __tablename__ = "saldos_socio"
+    
+    # Punto de control del libro de socios: saldo acumulado (ingresos - egresos, en la moneda
+    # original) de cada socio al cierre del mes. Se borra desde el mes de un movimiento editado.
+    anio = Column(Integer, primary_key=True)
+    mes = Column(Integer, primary_key=True)
+    socio = Column(Enum(SocioEnum), primary_key=True)
+    moneda = Column(Enum(MonedaEnum), primary_key=True)
+    saldo = Column(Float, nullable=False, default=0.0)
+
+class TipoCambio(Base):
+    __tablename__ = "tipos_cambio"
+    
+    # Pesos por dólar vigentes desde la fecha hasta la próxima cotización cargada
+    fecha = Column(Date, primary_key=True)
+    valor = Column(Float, nullable=False)
+    fuente = Column(String, nullable=True)
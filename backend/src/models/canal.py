@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy.orm import relationship
+from ..db.database import Base
+from .reserva import PlataformaEnum
+
+class SincronizacionCanal(Base):
+    """
+    Vínculo de una propiedad con su publicación en un canal y marca de agua de la última sincronización.
+    """
+    __tablename__ = "sincronizaciones_canal"
+    __table_args__ = (
+        UniqueConstraint("propiedad_id", "plataforma", name="uq_sincronizaciones_canal_propiedad_plataforma"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    propiedad_id = Column(Integer, ForeignKey("propiedades.id"), nullable=False)
+    plataforma = Column(Enum(PlataformaEnum), nullable=False)
+    id_externo = Column(String, nullable=False)  # Id de la publicación en el canal
+    ultima_modificacion = Column(DateTime, nullable=True)  # Mayor fecha de modificación ya incorporada
+    ultima_sincronizacion = Column(DateTime, nullable=True)
+    ultimo_error = Column(String, nullable=True)
+    corridas_con_fallas = Column(Integer, nullable=False, default=0)  # Seguidas con la marca retenida por reservas que fallan
+    
+    propiedad = relationship("Propiedad")
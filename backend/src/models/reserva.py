@@ -1,7 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Boolean, Enum
+from sqlalchemy import BigInteger, Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Enum, Index, DDL, event, func, literal_column
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 from sqlalchemy.orm import relationship
 import enum
 from ..db.database import Base
+from .revision import revision_en_curso
 
 class PlataformaEnum(str, enum.Enum):
     AIRBNB = "Airbnb"
@@ -15,17 +19,45 @@ class EstadoReservaEnum(str, enum.Enum):
     CANCELADA = "Cancelada"
     COMPLETADA = "Completada"
 
+class ahora_utc(FunctionElement):
+    """
+    Fecha y hora actual en UTC. Las columnas son timestamp sin zona: now() de Postgres las
+    guardaría en la zona horaria de la sesión.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(ahora_utc)
+def _ahora_utc(element, compiler, **kw):
+    # CURRENT_TIMESTAMP de SQLite ya es UTC
+    return "CURRENT_TIMESTAMP"
+
+@compiles(ahora_utc, "postgresql")
+def _ahora_utc_postgresql(element, compiler, **kw):
+    return "timezone('UTC', now())"
+
 class Propiedad(Base):
     __tablename__ = "propiedades"
     
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String, nullable=False)
     descripcion = Column(String, nullable=True)
+    actualizado_en = Column(DateTime, nullable=False, server_default=ahora_utc(), onupdate=ahora_utc())  # UTC
+    # Revisión de la transacción que escribió la fila por última vez (models.revision)
+    revision = Column(BigInteger, nullable=False, server_default="0", default=revision_en_curso, onupdate=revision_en_curso)
     
     reservas = relationship("Reserva", back_populates="propiedad")
 
 class Reserva(Base):
     __tablename__ = "reservas"
+    __table_args__ = (
+        # Índices alineados con el orden (fecha_ingreso desc, id desc) de los listados y sus filtros
+        Index("ix_reservas_fecha_ingreso_id", "fecha_ingreso", "id"),
+        Index("ix_reservas_propiedad_fecha_ingreso_id", "propiedad_id", "fecha_ingreso", "id"),
+        Index("ix_reservas_plataforma_fecha_ingreso_id", "plataforma", "fecha_ingreso", "id"),
+        # Identificador de la reserva en el canal de origen (Airbnb, Booking): clave de sincronización
+        Index("ux_reservas_plataforma_id_externo", "plataforma", "id_externo", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     fecha_ingreso = Column(Date, nullable=False)
@@ -37,5 +69,31 @@ class Reserva(Base):
     monto_sena_usd = Column(Float, nullable=True)
     notas = Column(String, nullable=True)
     propiedad_id = Column(Integer, ForeignKey("propiedades.id"))
+    id_externo = Column(String, nullable=True)
+    actualizado_en = Column(DateTime, nullable=False, server_default=ahora_utc(), onupdate=ahora_utc())  # UTC
+    # Revisión de la transacción que escribió la fila por última vez (models.revision)
+    revision = Column(BigInteger, nullable=False, server_default="0", default=revision_en_curso, onupdate=revision_en_curso)
     
-    propiedad = relationship("Propiedad", back_populates="reservas")
\ No newline at end of file
+    propiedad = relationship("Propiedad", back_populates="reservas")
+
+# Nombre de la restricción que impide reservas superpuestas para una misma propiedad
+RESERVA_SIN_SUPERPOSICION = "reservas_sin_superposicion"
+
+# Postgres garantiza la no superposición con un índice GiST sobre [fecha_ingreso, fecha_salida).
+# Las reservas canceladas no ocupan la propiedad.
+Reserva.__table__.append_constraint(
+    ExcludeConstraint(
+        (Reserva.propiedad_id, "="),
+        (func.daterange(Reserva.fecha_ingreso, Reserva.fecha_salida, literal_column("'[)'")), "&&"),
+        name=RESERVA_SIN_SUPERPOSICION,
+        using="gist",
+        where=Reserva.estado.is_distinct_from(literal_column(f"'{EstadoReservaEnum.CANCELADA.name}'")),
+    ).ddl_if(dialect="postgresql")
+)
+
+# btree_gist es necesaria para combinar la igualdad de propiedad_id con el operador && en GiST
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql")
+)
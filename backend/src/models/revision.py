@@ -0,0 +1,82 @@
+from sqlalchemy import BigInteger, Column, String, event, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql.dml import Delete, Insert, Update
+from ..db.database import Base
+
+# Contador de las escrituras sobre reservas y propiedades
+REVISION_RESERVAS = "reservas"
+TABLAS_CON_REVISION = ("reservas", "propiedades")
+
+
+class Revision(Base):
+    """
+    Contador que solo sube, uno por cada transacción que escribe en reservas o propiedades.
+
+    La transacción lo incrementa antes de su primera escritura y retiene la fila hasta
+    confirmar, así las revisiones quedan en el orden en que se confirman (una secuencia no lo
+    garantiza). Cada fila escrita guarda la revisión de su transacción en su columna revision.
+    """
+    __tablename__ = "revisiones"
+
+    nombre = Column(String, primary_key=True)
+    valor = Column(BigInteger, nullable=False)
+
+
+def _insert(conn: Connection):
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(Revision)
+
+
+def _incrementar(conn: Connection) -> int:
+    """
+    Revisión de la transacción en curso: la primera vez la incrementa, después la reutiliza.
+    """
+    en_curso = conn.info.get("revision")
+    if en_curso is not None and en_curso[0] is conn.get_transaction():
+        return en_curso[1]
+    tabla = Revision.__table__
+    insert = _insert(conn).values(nombre=REVISION_RESERVAS, valor=1)
+    valor = conn.execute(
+        insert.on_conflict_do_update(
+            index_elements=[tabla.c.nombre], set_={"valor": tabla.c.valor + 1}
+        ).returning(tabla.c.valor)
+    ).scalar_one()
+    conn.info["revision"] = (conn.get_transaction(), valor)
+    return valor
+
+
+def revision_en_curso(context) -> int:
+    """
+    Default y onupdate de las columnas revision: la de la transacción que escribe la fila.
+    """
+    return _incrementar(context.connection)
+
+
+def revision_actual(conn) -> int:
+    """
+    Última revisión confirmada (0 si nunca se escribió): una lectura por clave primaria.
+    """
+    valor = conn.execute(
+        select(Revision.valor).where(Revision.nombre == REVISION_RESERVAS)
+    ).scalar_one_or_none()
+    return valor or 0
+
+
+@event.listens_for(Engine, "before_execute")
+def _antes_de_escribir(conn, clauseelement, multiparams, params, execution_options):
+    # Cualquier INSERT, UPDATE (incluidos los masivos) o DELETE sobre las tablas con revisión,
+    # del ORM o de Core, incrementa el contador antes de ejecutarse. Los borrados no dejan fila
+    # con revisión, pero igual avanzan el contador.
+    if isinstance(clauseelement, (Insert, Update, Delete)) and clauseelement.table.name in TABLAS_CON_REVISION:
+        _incrementar(conn)
+
+
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+@event.listens_for(Engine, "rollback_savepoint")
+def _fin_de_transaccion(conn, *args):
+    # Un savepoint deshecho pudo deshacer el incremento: la próxima escritura lo repite
+    conn.info.pop("revision", None)
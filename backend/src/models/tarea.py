@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from ..db.database import Base
+
+class EjecucionTarea(Base):
+    """
+    Registro de cada ejecución de una tarea programada (services.tareas), de cualquier worker.
+    """
+    __tablename__ = "ejecuciones_tarea"
+    __table_args__ = (
+        # Última ejecución de cada tarea
+        Index("ix_ejecuciones_tarea_tarea_inicio", "tarea", "inicio"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tarea = Column(String, nullable=False)
+    inicio = Column(DateTime, nullable=False)  # UTC
+    duracion_ms = Column(Float, nullable=False)
+    filas = Column(Integer, nullable=True)  # Filas modificadas; vacío si falló
+    error = Column(String, nullable=True)
@@ -1,10 +1,22 @@
 from .reserva import (
     PropiedadBase, PropiedadCreate, PropiedadUpdate, PropiedadInDB,
     ReservaBase, ReservaCreate, ReservaUpdate, ReservaInDB, ReservaWithPropiedad,
-    CalendarioReserva
+    CalendarioReserva, ReservaLoteResultado, ReservaLoteRespuesta,
+    HuecoDisponible, DisponibilidadPropiedad
 )
 from .caja import (
     CategoriaMovimientoBase, CategoriaMovimientoCreate, CategoriaMovimientoUpdate, CategoriaMovimientoInDB,
     MovimientoCajaBase, MovimientoCajaCreate, MovimientoCajaUpdate, MovimientoCajaInDB, MovimientoCajaWithRelaciones,
-    ResumenCaja, ResumenMensual
-)
\ No newline at end of file
+    ResumenCaja, ResumenMensual, SaldoSocio, MovimientoLibroSocio, LibroSocios,
+    LiquidacionSocio, TransferenciaSocios, Liquidacion,
+    TipoCambioBase, TipoCambioCreate, TipoCambioUpdate, TipoCambioInDB, GrupoEnMoneda, ResumenEnMoneda
+)
+from .analitica import (
+    MetricasRendimiento, RendimientoPropiedad, RendimientoMes, RendimientoPlataforma,
+    RendimientoPropiedadMes, ReporteRendimiento
+)
+from .canal import (
+    SincronizacionCanalCreate, SincronizacionCanalInDB, ResultadoSincronizacion, SincronizacionRespuesta
+)
+from .busqueda import CoincidenciaBusqueda
+from .tarea import EjecucionTareaInDB
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import date
+from ..models.reserva import PlataformaEnum
+
+class MetricasRendimiento(BaseModel):
+    noches_disponibles: int
+    noches_vendidas: int
+    ingresos_usd: float  # Monto de las reservas prorrateado por noche dentro del período
+    ocupacion: float  # noches_vendidas / noches_disponibles
+    adr_usd: float  # Tarifa promedio por noche vendida
+    revpar_usd: float  # Ingreso por noche disponible
+
+class RendimientoPropiedad(MetricasRendimiento):
+    propiedad_id: int
+    nombre: str
+
+class RendimientoMes(MetricasRendimiento):
+    mes: str  # AAAA-MM
+
+class RendimientoPlataforma(MetricasRendimiento):
+    plataforma: PlataformaEnum
+
+class RendimientoPropiedadMes(MetricasRendimiento):
+    propiedad_id: int
+    mes: str
+
+class ReporteRendimiento(BaseModel):
+    desde: date
+    hasta: date
+    total: MetricasRendimiento
+    por_propiedad: List[RendimientoPropiedad]
+    por_mes: List[RendimientoMes]
+    por_plataforma: List[RendimientoPlataforma]
+    por_propiedad_mes: List[RendimientoPropiedadMes]
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+
+class CoincidenciaBusqueda(BaseModel):
+    tipo: str  # "reserva" o "movimiento"
+    id: int
+    fecha: date  # Ingreso de la reserva o fecha del movimiento
+    titulo: str  # Huésped de la reserva o descripción del movimiento
+    detalle: Optional[str] = None  # Notas de la reserva o categoría del movimiento
+    relevancia: float
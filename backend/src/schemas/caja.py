@@ -77,4 +77,86 @@ class ResumenMensual(BaseModel):
     total_ingresos_pesos: float
     total_egresos_pesos: float
     balance_pesos: float
-    reservas_total: int
\ No newline at end of file
+    reservas_total: int
+
+class SaldoSocio(BaseModel):
+    socio: SocioEnum
+    moneda: MonedaEnum
+    saldo: float
+
+class MovimientoLibroSocio(BaseModel):
+    id: int
+    fecha: date
+    socio: SocioEnum
+    moneda: MonedaEnum
+    tipo: TipoMovimientoEnum
+    categoria: str
+    descripcion: Optional[str] = None
+    monto: float
+    saldo: float  # Saldo del socio en la moneda después del movimiento
+
+class LibroSocios(BaseModel):
+    desde: date
+    hasta: date
+    saldos_iniciales: List[SaldoSocio]
+    movimientos: List[MovimientoLibroSocio]
+    saldos_finales: List[SaldoSocio]
+
+class LiquidacionSocio(BaseModel):
+    socio: SocioEnum
+    parte: float
+    ingresos_pesos: float  # Cobrado por el socio; lo cobrado en USD va convertido
+    egresos_pesos: float
+    ingresos_usd: float
+    egresos_usd: float
+    en_mano_pesos: float  # Cobrado - pagado, más su parte de los movimientos de Todos
+    corresponde_pesos: float  # Su parte del resultado del período
+    saldo_pesos: float  # Positivo: debe recibir; negativo: debe entregar
+
+class TransferenciaSocios(BaseModel):
+    de: SocioEnum
+    a: SocioEnum
+    monto_pesos: float
+
+class Liquidacion(BaseModel):
+    desde: date
+    hasta: date
+    resultado_pesos: float
+    compartido_pesos: float
+    compartido_usd: float
+    movimientos_usd_sin_tipo_cambio: int
+    socios: List[LiquidacionSocio]
+    transferencias: List[TransferenciaSocios]
+
+class TipoCambioBase(BaseModel):
+    valor: float = Field(gt=0)  # Pesos por dólar
+    fuente: Optional[str] = None
+
+class TipoCambioCreate(TipoCambioBase):
+    fecha: date
+
+class TipoCambioUpdate(TipoCambioBase):
+    pass
+
+class TipoCambioInDB(TipoCambioBase):
+    fecha: date
+    
+    class Config:
+        from_attributes = True
+
+class GrupoEnMoneda(BaseModel):
+    grupo: str
+    ingresos: float
+    egresos: float
+    balance: float
+
+class ResumenEnMoneda(BaseModel):
+    desde: date
+    hasta: date
+    moneda: MonedaEnum
+    agrupar: str
+    total_ingresos: float
+    total_egresos: float
+    balance: float
+    movimientos_sin_tipo_cambio: int  # No se pudieron convertir y no están en los totales
+    grupos: List[GrupoEnMoneda]
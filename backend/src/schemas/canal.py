@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+from ..models.reserva import PlataformaEnum
+
+class SincronizacionCanalCreate(BaseModel):
+    propiedad_id: int
+    plataforma: PlataformaEnum
+    id_externo: str  # Id de la publicación en el canal
+
+class SincronizacionCanalInDB(SincronizacionCanalCreate):
+    id: int
+    ultima_modificacion: Optional[datetime] = None
+    ultima_sincronizacion: Optional[datetime] = None
+    ultimo_error: Optional[str] = None
+    corridas_con_fallas: int = 0
+    
+    class Config:
+        from_attributes = True
+
+class ResultadoSincronizacion(BaseModel):
+    propiedad_id: int
+    plataforma: PlataformaEnum
+    recibidas: int = 0
+    creadas: int = 0
+    actualizadas: int = 0
+    conflictos: int = 0
+    invalidas: int = 0
+    ultima_modificacion: Optional[datetime] = None
+    error: Optional[str] = None
+
+class SincronizacionRespuesta(BaseModel):
+    canales: List[ResultadoSincronizacion]
+    creadas: int
+    actualizadas: int
+    conflictos: int
+    invalidas: int
+    errores: int
@@ -29,6 +29,7 @@ class ReservaBase(BaseModel):
     monto_sena_usd: Optional[float] = Field(default=None, ge=0)
     notas: Optional[str] = None
     propiedad_id: int
+    id_externo: Optional[str] = None  # Id de la reserva en el canal de origen
 
 class ReservaCreate(ReservaBase):
     pass
@@ -64,4 +65,28 @@ class CalendarioReserva(BaseModel):
     backgroundColor: Optional[str] = None  # Color según plataforma
     borderColor: Optional[str] = None
     textColor: Optional[str] = "#ffffff"
-    extendedProps: dict  # Datos adicionales
\ No newline at end of file
+    extendedProps: dict  # Datos adicionales
+
+class ReservaLoteResultado(BaseModel):
+    indice: int  # Posición del ítem en el lote recibido
+    resultado: str  # creada | actualizada | conflicto | invalida
+    reserva_id: Optional[int] = None  # Reserva creada/actualizada o reserva existente en conflicto
+    conflicto_con_indice: Optional[int] = None  # Ítem del mismo lote con el que se superpone
+    detalle: Optional[str] = None
+
+class ReservaLoteRespuesta(BaseModel):
+    creadas: int
+    actualizadas: int
+    conflictos: int
+    invalidas: int
+    resultados: List[ReservaLoteResultado]
+
+class HuecoDisponible(BaseModel):
+    desde: date
+    hasta: date  # Exclusiva: día de salida de la estadía
+    noches: int
+
+class DisponibilidadPropiedad(BaseModel):
+    propiedad_id: int
+    disponible: bool  # Libre durante todo el período consultado
+    huecos: List[HuecoDisponible]  # Períodos libres de al menos las noches pedidas
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class EjecucionTareaInDB(BaseModel):
+    id: int
+    tarea: str
+    inicio: datetime
+    duracion_ms: float
+    filas: Optional[int] = None
+    error: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,145 @@
+"""
+Ocupación, tarifa promedio (ADR) y RevPAR por propiedad, mes y plataforma.
+
+Las reservas del período se leen en una sola consulta y se pasan a arreglos NumPy. Cada
+estadía se expande en sus noches, el monto_total_usd se reparte en partes iguales entre
+ellas y las noches fuera del período se descartan; así una estadía que cruza de mes aporta
+a cada mes solo lo que le corresponde. Las noches e ingresos se acumulan con bincount en un
+cubo propiedad × mes × plataforma del que salen todos los desgloses.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Propiedad, Reserva, PlataformaEnum, EstadoReservaEnum
+
+PLATAFORMAS = list(PlataformaEnum)
+
+
+def _metricas(disponibles, vendidas, ingresos) -> Dict[str, float]:
+    disponibles = int(disponibles)
+    vendidas = int(vendidas)
+    ingresos = float(ingresos)
+    return {
+        "noches_disponibles": disponibles,
+        "noches_vendidas": vendidas,
+        "ingresos_usd": round(ingresos, 2),
+        "ocupacion": round(vendidas / disponibles, 4) if disponibles else 0.0,
+        "adr_usd": round(ingresos / vendidas, 2) if vendidas else 0.0,
+        "revpar_usd": round(ingresos / disponibles, 2) if disponibles else 0.0,
+    }
+
+
+def _noches_por_mes(desde: date, hasta: date):
+    """
+    Meses que toca [desde, hasta) y cuántas noches de cada uno caen dentro del período.
+    """
+    inicio = np.datetime64(desde, "D")
+    fin = np.datetime64(hasta, "D")
+    meses = np.arange(inicio.astype("datetime64[M]"), (fin - 1).astype("datetime64[M]") + 1)
+    desde_mes = np.maximum(meses.astype("datetime64[D]"), inicio)
+    hasta_mes = np.minimum((meses + 1).astype("datetime64[D]"), fin)
+    return meses, (hasta_mes - desde_mes).astype(np.int64)
+
+
+def calcular_rendimiento(
+    db: Session,
+    desde: date,
+    hasta: date,
+    propiedad_id: Optional[int] = None,
+    plataforma: Optional[PlataformaEnum] = None
+) -> dict:
+    propiedades_query = select(Propiedad.id, Propiedad.nombre).order_by(Propiedad.id)
+    if propiedad_id is not None:
+        propiedades_query = propiedades_query.where(Propiedad.id == propiedad_id)
+    propiedades = db.execute(propiedades_query).all()
+
+    reservas_query = select(
+        Reserva.propiedad_id, Reserva.fecha_ingreso, Reserva.fecha_salida,
+        Reserva.monto_total_usd, Reserva.plataforma
+    ).where(
+        Reserva.fecha_salida > desde,
+        Reserva.fecha_ingreso < hasta,
+        Reserva.fecha_salida > Reserva.fecha_ingreso,
+        Reserva.propiedad_id.isnot(None),
+        Reserva.estado.is_distinct_from(EstadoReservaEnum.CANCELADA)
+    )
+    if propiedad_id is not None:
+        reservas_query = reservas_query.where(Reserva.propiedad_id == propiedad_id)
+    if plataforma is not None:
+        reservas_query = reservas_query.where(Reserva.plataforma == plataforma)
+    filas = db.execute(reservas_query).all()
+
+    meses, disponibles_mes = _noches_por_mes(desde, hasta)
+    ids = np.array([id for id, _ in propiedades], dtype=np.int64)
+    n_prop, n_mes, n_plat = len(ids), len(meses), len(PLATAFORMAS)
+
+    noches = np.zeros(n_prop * n_mes * n_plat, dtype=np.int64)
+    ingresos = np.zeros(n_prop * n_mes * n_plat, dtype=np.float64)
+
+    if filas and n_prop:
+        propiedad_ids, ingresos_r, salidas_r, montos, plataformas = zip(*filas)
+        ingreso = np.array(ingresos_r, dtype="datetime64[D]")
+        salida = np.array(salidas_r, dtype="datetime64[D]")
+        monto = np.array(montos, dtype=np.float64)
+        prop = np.searchsorted(ids, np.array(propiedad_ids, dtype=np.int64))
+        codigos = {p: i for i, p in enumerate(PLATAFORMAS)}
+        plat = np.fromiter((codigos[p] for p in plataformas), dtype=np.int64, count=len(filas))
+
+        # Expandir cada estadía en sus noches con la tarifa prorrateada
+        duracion = (salida - ingreso).astype(np.int64)
+        estadia = np.repeat(np.arange(len(filas)), duracion)
+        primera = np.repeat(np.cumsum(duracion) - duracion, duracion)
+        noche = ingreso[estadia] + (np.arange(len(estadia)) - primera)
+        tarifa = (monto / duracion)[estadia]
+
+        dentro = (noche >= np.datetime64(desde, "D")) & (noche < np.datetime64(hasta, "D"))
+        estadia, noche, tarifa = estadia[dentro], noche[dentro], tarifa[dentro]
+        mes = (noche.astype("datetime64[M]") - meses[0]).astype(np.int64)
+
+        celda = (prop[estadia] * n_mes + mes) * n_plat + plat[estadia]
+        noches = np.bincount(celda, minlength=noches.size)
+        ingresos = np.bincount(celda, weights=tarifa, minlength=ingresos.size)
+
+    noches = noches.reshape(n_prop, n_mes, n_plat)
+    ingresos = ingresos.reshape(n_prop, n_mes, n_plat)
+    disponibles_total = int(disponibles_mes.sum())
+
+    por_propiedad: List[dict] = []
+    por_propiedad_mes: List[dict] = []
+    for i, (id, nombre) in enumerate(propiedades):
+        por_propiedad.append({
+            "propiedad_id": id,
+            "nombre": nombre,
+            **_metricas(disponibles_total, noches[i].sum(), ingresos[i].sum()),
+        })
+        for j, mes in enumerate(meses):
+            por_propiedad_mes.append({
+                "propiedad_id": id,
+                "mes": str(mes),
+                **_metricas(disponibles_mes[j], noches[i, j].sum(), ingresos[i, j].sum()),
+            })
+
+    por_mes = [
+        {"mes": str(mes), **_metricas(n_prop * disponibles_mes[j], noches[:, j].sum(), ingresos[:, j].sum())}
+        for j, mes in enumerate(meses)
+    ]
+    # Por plataforma, la ocupación y el RevPAR se miden sobre todas las noches disponibles
+    por_plataforma = [
+        {"plataforma": p, **_metricas(n_prop * disponibles_total, noches[:, :, k].sum(), ingresos[:, :, k].sum())}
+        for k, p in enumerate(PLATAFORMAS)
+        if plataforma is None or p == plataforma
+    ]
+
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "total": _metricas(n_prop * disponibles_total, noches.sum(), ingresos.sum()),
+        "por_propiedad": por_propiedad,
+        "por_mes": por_mes,
+        "por_plataforma": por_plataforma,
+        "por_propiedad_mes": por_propiedad_mes,
+    }
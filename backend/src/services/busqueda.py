@@ -0,0 +1,105 @@
+"""
+Búsqueda de reservas (por huésped y notas) y movimientos de caja (por descripción).
+
+En Postgres cada palabra se busca como prefijo en un documento tsvector, y el texto completo
+además por similitud de trigramas (pg_trgm) con el nombre del huésped o la descripción, lo que
+encuentra nombres parciales o mal escritos. Las dos condiciones usan índices GIN (ver
+models.busqueda), así que el costo depende de la cantidad de coincidencias y no del tamaño de
+las tablas. La relevancia es la mayor entre ts_rank y la similitud de trigramas. Los acentos
+no cuentan: "Gonzalez" encuentra a "González".
+
+En otras bases (SQLite en desarrollo y en los benchmarks) cada palabra se busca como subcadena,
+también sin acentos, pero sin índice.
+"""
+import re
+from functools import reduce
+from typing import List, Sequence
+
+from sqlalchemy import Select, and_, case, func, literal, literal_column, or_, select, union_all
+
+from ..models import CategoriaMovimiento, MovimientoCaja, Reserva
+from ..models.busqueda import (
+    CON_ACENTO, SIN_ACENTO, DESCRIPCION_MOVIMIENTO, DOCUMENTO_MOVIMIENTO, DOCUMENTO_RESERVA, NOMBRE_HUESPED,
+)
+
+TIPOS = ("reserva", "movimiento")
+
+_SIN_ACENTOS = str.maketrans(CON_ACENTO, SIN_ACENTO)
+
+
+def normalizar(texto: str) -> str:
+    return texto.translate(_SIN_ACENTOS).lower()
+
+
+def palabras(texto: str) -> List[str]:
+    return re.findall(r"\w+", normalizar(texto))
+
+
+def _prefijos(texto: str):
+    # "gonz mar" -> gonz:* & mar:* (las palabras solo tienen letras, dígitos y _)
+    return func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{p}:*" for p in palabras(texto)))
+
+
+# Sin translate() fuera de Postgres: un replace() por letra, solo las del castellano (SQLite no
+# admite anidar uno por cada letra de CON_ACENTO)
+_ACENTOS_CASTELLANO = [(con, sin) for con, sin in zip(CON_ACENTO, SIN_ACENTO) if con in "ÁÉÍÓÚÜÑáéíóúüñ"]
+
+
+def _contiene(columna, texto: str):
+    normalizada = reduce(lambda expresion, par: func.replace(expresion, *par), _ACENTOS_CASTELLANO, columna)
+    return and_(*(func.lower(normalizada).contains(p, autoescape=True) for p in palabras(texto)))
+
+
+def _reservas(texto: str, postgres: bool) -> Select:
+    if postgres:
+        consulta = _prefijos(texto)
+        coincide = or_(DOCUMENTO_RESERVA.op("@@")(consulta), NOMBRE_HUESPED.op("%>")(normalizar(texto)))
+        relevancia = func.greatest(
+            func.ts_rank(DOCUMENTO_RESERVA, consulta), func.word_similarity(normalizar(texto), NOMBRE_HUESPED)
+        )
+    else:
+        completo = Reserva.nombre_huesped.concat(" ").concat(func.coalesce(Reserva.notas, ""))
+        coincide = _contiene(completo, texto)
+        relevancia = case((_contiene(Reserva.nombre_huesped, texto), 1.0), else_=0.5)
+    return select(
+        literal("reserva").label("tipo"),
+        Reserva.id,
+        Reserva.fecha_ingreso.label("fecha"),
+        Reserva.nombre_huesped.label("titulo"),
+        Reserva.notas.label("detalle"),
+        relevancia.label("relevancia"),
+    ).where(coincide)
+
+
+def _movimientos(texto: str, postgres: bool) -> Select:
+    if postgres:
+        consulta = _prefijos(texto)
+        coincide = or_(DOCUMENTO_MOVIMIENTO.op("@@")(consulta), DESCRIPCION_MOVIMIENTO.op("%>")(normalizar(texto)))
+        relevancia = func.greatest(
+            func.ts_rank(DOCUMENTO_MOVIMIENTO, consulta), func.word_similarity(normalizar(texto), DESCRIPCION_MOVIMIENTO)
+        )
+    else:
+        coincide = _contiene(MovimientoCaja.descripcion, texto)
+        relevancia = literal(1.0)
+    return select(
+        literal("movimiento").label("tipo"),
+        MovimientoCaja.id,
+        MovimientoCaja.fecha,
+        MovimientoCaja.descripcion.label("titulo"),
+        CategoriaMovimiento.nombre.label("detalle"),
+        relevancia.label("relevancia"),
+    ).join(
+        CategoriaMovimiento, CategoriaMovimiento.id == MovimientoCaja.categoria_id
+    ).where(coincide)
+
+
+def consulta_busqueda(texto: str, tipos: Sequence[str], postgres: bool) -> Select:
+    """
+    Coincidencias de los tipos pedidos en una sola consulta, de mayor a menor relevancia y, a
+    igual relevancia, de la más reciente a la más antigua. El llamador aplica offset y limit.
+    """
+    partes = {"reserva": _reservas, "movimiento": _movimientos}
+    resultados = union_all(*(partes[tipo](texto, postgres) for tipo in tipos)).subquery()
+    return select(resultados).order_by(
+        resultados.c.relevancia.desc(), resultados.c.fecha.desc(), resultados.c.tipo, resultados.c.id.desc()
+    )
@@ -0,0 +1,127 @@
+"""
+Cache en memoria de datos de referencia (propiedades, categorías de movimiento y tipos de cambio).
+
+Son tablas chicas que cambian pocas veces al mes y se consultan en cada validación. Las
+lecturas pasan por el cache (read-through); los endpoints que las modifican lo invalidan
+después de confirmar. El TTL acota cuánto tarda en verse un cambio hecho por otro proceso.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import Propiedad, CategoriaMovimiento
+from ..schemas import PropiedadInDB, CategoriaMovimientoInDB
+from .tipos_cambio import TablaTiposCambio, cargar_tabla
+
+# Clave con la tabla completa, además de las entradas por id
+TODAS = "todas"
+
+
+class CacheTTL:
+    """
+    Cache LRU acotado en cantidad de entradas y con vencimiento por TTL.
+    Los valores None no se guardan, para no recordar ids inexistentes.
+    """
+
+    def __init__(self, nombre: str, max_entradas: int, ttl: float):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+        # Cambia en cada invalidación: descarta cargas que empezaron antes de ella
+        self._generacion = 0
+
+    def obtener(self, clave: Hashable, cargar: Callable[[], Any]) -> Any:
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] > ahora:
+                self._entradas.move_to_end(clave)
+                self.hits += 1
+                return entrada[1]
+            self.misses += 1
+            generacion = self._generacion
+
+        valor = cargar()
+        if valor is not None:
+            with self._lock:
+                if generacion != self._generacion:
+                    return valor
+                self._entradas[clave] = (ahora + self.ttl, valor)
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+        return valor
+
+    def invalidar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._generacion += 1
+            self.invalidaciones += 1
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "tasa_hits": round(self.hits / consultas, 4) if consultas else 0.0,
+                "invalidaciones": self.invalidaciones,
+            }
+
+
+cache_propiedades = CacheTTL("propiedades", settings.CACHE_MAX_ENTRADAS, settings.CACHE_TTL_SEGUNDOS)
+cache_categorias = CacheTTL("categorias", settings.CACHE_MAX_ENTRADAS, settings.CACHE_TTL_SEGUNDOS)
+# Una sola entrada: la tabla completa ordenada por fecha
+cache_tipos_cambio = CacheTTL("tipos_cambio", 1, settings.CACHE_TTL_SEGUNDOS)
+
+
+def listar_propiedades(db: Session) -> List[PropiedadInDB]:
+    return cache_propiedades.obtener(TODAS, lambda: [
+        PropiedadInDB.model_validate(propiedad)
+        for propiedad in db.query(Propiedad).order_by(Propiedad.id).all()
+    ])
+
+
+def obtener_propiedad(db: Session, propiedad_id: int) -> Optional[PropiedadInDB]:
+    def cargar():
+        propiedad = db.query(Propiedad).filter(Propiedad.id == propiedad_id).first()
+        return PropiedadInDB.model_validate(propiedad) if propiedad else None
+    return cache_propiedades.obtener(propiedad_id, cargar)
+
+
+def listar_categorias(db: Session) -> List[CategoriaMovimientoInDB]:
+    return cache_categorias.obtener(TODAS, lambda: [
+        CategoriaMovimientoInDB.model_validate(categoria)
+        for categoria in db.query(CategoriaMovimiento).order_by(CategoriaMovimiento.nombre).all()
+    ])
+
+
+def obtener_categoria(db: Session, categoria_id: int) -> Optional[CategoriaMovimientoInDB]:
+    def cargar():
+        categoria = db.query(CategoriaMovimiento).filter(CategoriaMovimiento.id == categoria_id).first()
+        return CategoriaMovimientoInDB.model_validate(categoria) if categoria else None
+    return cache_categorias.obtener(categoria_id, cargar)
+
+
+def tabla_tipos_cambio(db: Session) -> TablaTiposCambio:
+    return cache_tipos_cambio.obtener(TODAS, lambda: cargar_tabla(db))
+
+
+def tipo_cambio_vigente(db: Session, fecha) -> Optional[float]:
+    return tabla_tipos_cambio(db).vigente(fecha)
+
+
+def estadisticas_cache() -> Dict[str, Any]:
+    return {cache.nombre: cache.estadisticas() for cache in (cache_propiedades, cache_categorias, cache_tipos_cambio)}
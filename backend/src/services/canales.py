@@ -0,0 +1,351 @@
+"""
+Sincronización incremental de reservas con los canales (Airbnb, Booking).
+
+Cada propiedad se vincula a su publicación en un canal (tabla sincronizaciones_canal), que
+guarda además la marca de agua: la mayor fecha de modificación ya incorporada. En cada
+corrida se piden al canal solo las reservas modificadas desde esa marca; las publicaciones
+se descargan en paralelo (acotado por SYNC_CONCURRENCIA) con reintentos y backoff
+exponencial (o la espera que pida el canal con Retry-After, hasta SYNC_ESPERA_MAXIMA_SEGUNDOS),
+y cada una se aplica con procesar_lote en su propia transacción junto con la nueva marca de
+agua, en un hilo con una sesión sincrónica para no frenar el event loop. Un error al descargar o aplicar una publicación queda registrado en ella y no corta
+las demás.
+
+modificadas_desde es inclusivo: el canal vuelve a enviar las reservas modificadas justo en
+la marca, así no se pierden las que comparten esa fecha de modificación con otras ya
+incorporadas. Volver a aplicarlas no duplica nada (procesar_lote las encuentra por id
+externo y las deja igual).
+
+Si alguna reserva no puede aplicarse (conflicto o inválida), la marca queda en ella para
+reintentarla en la corrida siguiente. Después de SYNC_CORRIDAS_CON_FALLAS_MAXIMAS corridas
+seguidas así, la marca avanza igual y las reservas omitidas quedan informadas en ultimo_error:
+una reserva que no se puede aplicar nunca no frena la sincronización para siempre.
+
+Contrato HTTP esperado en AIRBNB_API_URL / BOOKING_API_URL:
+
+    GET /publicaciones/{id_externo}/reservas?modificadas_desde=<ISO 8601, inclusivo>&cursor=<cursor>
+    Authorization: Bearer <API_KEY>
+
+    {"reservas": [{"id", "fecha_ingreso", "fecha_salida", "huesped", "monto_total_usd",
+                   "monto_sena_usd", "estado", "modificada_en"}, ...],
+     "siguiente": "<cursor de la página siguiente>" | null}
+"""
+import asyncio
+import logging
+import random
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..db.database import SessionLocal
+from ..models import SincronizacionCanal, PlataformaEnum, EstadoReservaEnum
+from ..schemas import ResultadoSincronizacion, SincronizacionRespuesta
+from .ocupacion import indice_ocupacion
+from .reservas_lote import CONFLICTO, INVALIDA, procesar_lote
+from .superposiciones import es_superposicion
+
+logger = logging.getLogger(__name__)
+
+# Estados informados por los canales y su equivalente local
+ESTADOS_CANAL = {
+    "confirmed": EstadoReservaEnum.CONFIRMADA,
+    "accepted": EstadoReservaEnum.CONFIRMADA,
+    "pending": EstadoReservaEnum.PENDIENTE,
+    "request": EstadoReservaEnum.PENDIENTE,
+    "cancelled": EstadoReservaEnum.CANCELADA,
+    "canceled": EstadoReservaEnum.CANCELADA,
+    "completed": EstadoReservaEnum.COMPLETADA,
+    **{estado.value.lower(): estado for estado in EstadoReservaEnum},
+}
+
+
+class ErrorCanal(Exception):
+    pass
+
+
+def configuracion_canal(plataforma: PlataformaEnum) -> Optional[Tuple[str, str]]:
+    """
+    URL base y clave de API del canal, o None si no está configurado.
+    """
+    if plataforma == PlataformaEnum.AIRBNB:
+        url, clave = settings.AIRBNB_API_URL, settings.AIRBNB_API_KEY
+    elif plataforma == PlataformaEnum.BOOKING:
+        url, clave = settings.BOOKING_API_URL, settings.BOOKING_API_KEY
+    else:
+        return None
+    return (url, clave) if url and clave else None
+
+
+def _ahora() -> datetime:
+    # UTC sin zona horaria, como el resto de las columnas DateTime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _retry_after(valor: str) -> Optional[float]:
+    """
+    Segundos pedidos por Retry-After, que puede ser un número o una fecha HTTP.
+    """
+    try:
+        return float(valor)
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return (fecha - datetime.now(timezone.utc)).total_seconds()
+
+
+def _espera_reintento(intento: int, respuesta: Optional[httpx.Response]) -> float:
+    espera = None
+    if respuesta is not None and "Retry-After" in respuesta.headers:
+        espera = _retry_after(respuesta.headers["Retry-After"])
+    if espera is None:
+        espera = settings.SYNC_BACKOFF_SEGUNDOS * (2 ** intento) * random.uniform(0.5, 1.0)
+    # Un Retry-After enorme (o en el pasado) no puede dejar colgada la sincronización
+    return min(max(espera, 0.0), settings.SYNC_ESPERA_MAXIMA_SEGUNDOS)
+
+
+async def _get(cliente: httpx.AsyncClient, url: str, params: Dict[str, str]) -> dict:
+    """
+    GET con reintentos ante errores de red, 429 y 5xx. Los demás 4xx no se reintentan.
+    """
+    for intento in range(settings.SYNC_REINTENTOS + 1):
+        respuesta = None
+        try:
+            respuesta = await cliente.get(url, params=params)
+        except httpx.TransportError as e:
+            error = f"Error de conexión con el canal: {type(e).__name__}"
+        else:
+            if respuesta.status_code == 429 or respuesta.status_code >= 500:
+                error = f"El canal respondió {respuesta.status_code}"
+            elif respuesta.status_code >= 400:
+                raise ErrorCanal(f"El canal respondió {respuesta.status_code}")
+            else:
+                return respuesta.json()
+
+        if intento == settings.SYNC_REINTENTOS:
+            raise ErrorCanal(f"{error} ({intento + 1} intentos)")
+        await asyncio.sleep(_espera_reintento(intento, respuesta))
+
+
+async def descargar_publicacion(
+    cliente: httpx.AsyncClient,
+    id_externo: str,
+    modificadas_desde: Optional[datetime]
+) -> List[dict]:
+    """
+    Reservas de una publicación modificadas desde la marca de agua (inclusive), recorriendo
+    todas las páginas.
+    """
+    params: Dict[str, str] = {}
+    if modificadas_desde is not None:
+        params["modificadas_desde"] = modificadas_desde.replace(tzinfo=timezone.utc).isoformat()
+
+    reservas: List[dict] = []
+    while True:
+        pagina = await _get(cliente, f"/publicaciones/{id_externo}/reservas", params)
+        reservas.extend(pagina.get("reservas") or [])
+        siguiente = pagina.get("siguiente")
+        if not siguiente:
+            return reservas
+        params["cursor"] = siguiente
+
+
+def _fecha_modificacion(valor: Any) -> Optional[datetime]:
+    # Se guarda en UTC sin zona horaria, como el resto de las columnas DateTime
+    if valor is None:
+        return None
+    try:
+        fecha = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    return fecha
+
+
+def _a_reserva(item: dict, propiedad_id: int, plataforma: PlataformaEnum) -> Tuple[dict, Optional[datetime]]:
+    estado = str(item.get("estado") or "").strip().lower()
+    reserva = {
+        "propiedad_id": propiedad_id,
+        "plataforma": plataforma,
+        "id_externo": str(item["id"]) if item.get("id") is not None else None,
+        "fecha_ingreso": item.get("fecha_ingreso"),
+        "fecha_salida": item.get("fecha_salida"),
+        "nombre_huesped": item.get("huesped") or item.get("nombre_huesped"),
+        "monto_total_usd": item.get("monto_total_usd"),
+        "monto_sena_usd": item.get("monto_sena_usd"),
+        "estado": ESTADOS_CANAL.get(estado, item.get("estado")),
+    }
+    return reserva, _fecha_modificacion(item.get("modificada_en"))
+
+
+def _nueva_marca(canal, lote, respuesta) -> Tuple[Optional[datetime], int, Optional[str]]:
+    """
+    Marca de agua, corridas con fallas y error a guardar después de aplicar el lote.
+    """
+    # Si algún ítem no pudo aplicarse, la marca queda en él para reintentarlo en la próxima corrida,
+    # salvo que ya lleve SYNC_CORRIDAS_CON_FALLAS_MAXIMAS corridas retenida
+    fallidas = [
+        (modificada, reserva["id_externo"]) for (reserva, modificada), item in zip(lote, respuesta.resultados)
+        if item.resultado in (CONFLICTO, INVALIDA) and modificada is not None
+    ]
+    modificadas = [modificada for _, modificada in lote if modificada is not None]
+    corridas_con_fallas = canal.corridas_con_fallas + 1 if fallidas else 0
+    error = None
+    if corridas_con_fallas >= settings.SYNC_CORRIDAS_CON_FALLAS_MAXIMAS:
+        error = (
+            f"Reservas omitidas después de {corridas_con_fallas} corridas sin poder aplicarlas: "
+            + ", ".join(sorted({id_externo or "?" for _, id_externo in fallidas}))
+        )[:500]
+        corridas_con_fallas = 0
+        marca = max(modificadas, default=None)
+    else:
+        marca = min(modificada for modificada, _ in fallidas) if fallidas else max(modificadas, default=None)
+    if marca is None or (canal.ultima_modificacion and marca < canal.ultima_modificacion):
+        marca = canal.ultima_modificacion
+    return marca, corridas_con_fallas, error
+
+
+def _aplicar(canal, items: List[dict]) -> ResultadoSincronizacion:
+    """
+    Inserta o actualiza las reservas descargadas y avanza la marca de agua en la misma transacción.
+    Es sincrónica: se ejecuta en un hilo (asyncio.to_thread) con su propia sesión.
+    """
+    resultado = ResultadoSincronizacion(
+        propiedad_id=canal.propiedad_id, plataforma=canal.plataforma, recibidas=len(items)
+    )
+    lote = [_a_reserva(item, canal.propiedad_id, canal.plataforma) for item in items]
+    if canal.ultima_modificacion is not None:
+        # Un canal que no filtra por modificadas_desde no hace retroceder nada
+        lote = [
+            (reserva, modificada) for reserva, modificada in lote
+            if modificada is None or modificada >= canal.ultima_modificacion
+        ]
+    with SessionLocal() as db:
+        respuesta = procesar_lote(db, [reserva for reserva, _ in lote], actualizar=True)
+        marca, corridas_con_fallas, error = _nueva_marca(canal, lote, respuesta)
+
+        db.execute(update(SincronizacionCanal).where(SincronizacionCanal.id == canal.id).values(
+            ultima_modificacion=marca,
+            ultima_sincronizacion=_ahora(),
+            ultimo_error=error,
+            corridas_con_fallas=corridas_con_fallas
+        ))
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if not es_superposicion(e):
+                raise
+            resultado.error = "Otra operación ocupó alguno de los períodos durante la sincronización; se reintentará"
+            return resultado
+
+    resultado.error = error
+    resultado.creadas = respuesta.creadas
+    resultado.actualizadas = respuesta.actualizadas
+    resultado.conflictos = respuesta.conflictos
+    resultado.invalidas = respuesta.invalidas
+    resultado.ultima_modificacion = marca
+    return resultado
+
+
+async def _registrar_error(db: AsyncSession, canal, error: str) -> ResultadoSincronizacion:
+    await db.execute(update(SincronizacionCanal).where(SincronizacionCanal.id == canal.id).values(
+        ultima_sincronizacion=_ahora(),
+        ultimo_error=error
+    ))
+    await db.commit()
+    return ResultadoSincronizacion(
+        propiedad_id=canal.propiedad_id, plataforma=canal.plataforma,
+        ultima_modificacion=canal.ultima_modificacion, error=error
+    )
+
+
+async def sincronizar_canales(
+    db: AsyncSession,
+    plataformas: Optional[Iterable[PlataformaEnum]] = None,
+    propiedad_id: Optional[int] = None
+) -> SincronizacionRespuesta:
+    """
+    Sincroniza todas las publicaciones vinculadas (o las de las plataformas/propiedad indicadas).
+    """
+    query = select(
+        SincronizacionCanal.id, SincronizacionCanal.propiedad_id, SincronizacionCanal.plataforma,
+        SincronizacionCanal.id_externo, SincronizacionCanal.ultima_modificacion,
+        SincronizacionCanal.corridas_con_fallas
+    ).order_by(SincronizacionCanal.id)
+    if plataformas is not None:
+        query = query.where(SincronizacionCanal.plataforma.in_(list(plataformas)))
+    if propiedad_id is not None:
+        query = query.where(SincronizacionCanal.propiedad_id == propiedad_id)
+    canales = (await db.execute(query)).all()
+
+    resultados: Dict[int, ResultadoSincronizacion] = {}
+    pendientes = []
+    for canal in canales:
+        if configuracion_canal(canal.plataforma) is None:
+            resultados[canal.id] = await _registrar_error(db, canal, f"Canal {canal.plataforma.value} no configurado")
+        else:
+            pendientes.append(canal)
+
+    semaforo = asyncio.Semaphore(settings.SYNC_CONCURRENCIA)
+
+    async with AsyncExitStack() as pila:
+        clientes: Dict[PlataformaEnum, httpx.AsyncClient] = {}
+        for plataforma in {canal.plataforma for canal in pendientes}:
+            url, clave = configuracion_canal(plataforma)
+            clientes[plataforma] = await pila.enter_async_context(httpx.AsyncClient(
+                base_url=url,
+                headers={"Authorization": f"Bearer {clave}"},
+                timeout=settings.SYNC_TIMEOUT_SEGUNDOS,
+                limits=httpx.Limits(max_connections=settings.SYNC_CONCURRENCIA),
+            ))
+
+        async def descargar(canal):
+            async with semaforo:
+                try:
+                    items = await descargar_publicacion(
+                        clientes[canal.plataforma], canal.id_externo, canal.ultima_modificacion
+                    )
+                    return canal, items, None
+                except (ErrorCanal, ValueError) as e:
+                    return canal, None, str(e) or type(e).__name__
+                except Exception as e:
+                    logger.exception("Falló la descarga de la publicación %s", canal.id_externo)
+                    return canal, None, f"{type(e).__name__}: {e}"
+
+        # Las descargas corren en paralelo; las publicaciones se aplican de a una por vez
+        for tarea in asyncio.as_completed([descargar(canal) for canal in pendientes]):
+            canal, items, error = await tarea
+            if error is None:
+                try:
+                    resultados[canal.id] = await asyncio.to_thread(_aplicar, canal, items)
+                    continue
+                except Exception as e:
+                    # Un error inesperado en una publicación no corta las demás
+                    logger.exception("Falló la sincronización de la publicación %s", canal.id_externo)
+                    error = f"Error al aplicar las reservas: {type(e).__name__}: {e}"[:500]
+            resultados[canal.id] = await _registrar_error(db, canal, error)
+
+    lista = [resultados[canal.id] for canal in canales]
+    if any(r.creadas or r.actualizadas for r in lista):
+        indice_ocupacion.invalidar()
+
+    return SincronizacionRespuesta(
+        canales=lista,
+        creadas=sum(r.creadas for r in lista),
+        actualizadas=sum(r.actualizadas for r in lista),
+        conflictos=sum(r.conflictos for r in lista),
+        invalidas=sum(r.invalidas for r in lista),
+        errores=sum(1 for r in lista if r.error),
+    )
@@ -0,0 +1,111 @@
+"""
+Exportación en streaming de movimientos de caja y reservas a CSV o Parquet.
+
+Las filas se leen con un cursor del lado del servidor (yield_per) como tuplas de columnas, sin
+pasar por el ORM ni por pydantic, y se convierten en bloques que se envían a medida que se
+generan: la memoria queda acotada por el tamaño del bloque, no por la cantidad de filas.
+Cada bloque del cursor es un row group del archivo Parquet.
+"""
+import csv
+import enum
+import io
+from typing import Callable, Iterator, List, NamedTuple, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+
+# Filas por bloque del cursor (y por row group en Parquet)
+FILAS_POR_BLOQUE = 5000
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class Columna(NamedTuple):
+    nombre: str
+    # "entero", "decimal", "fecha" o "texto"; define el tipo de la columna en Parquet
+    tipo: str
+
+
+def _valor(valor):
+    return valor.value if isinstance(valor, enum.Enum) else valor
+
+
+def _bloques(sesion: Callable[[], Session], consulta: Select) -> Iterator[List[tuple]]:
+    # La sesión se abre dentro del generador: vive lo que dure el envío, no lo que dure el endpoint
+    with sesion() as db:
+        resultado = db.execute(consulta.execution_options(yield_per=FILAS_POR_BLOQUE))
+        for bloque in resultado.partitions():
+            yield [tuple(_valor(valor) for valor in fila) for fila in bloque]
+
+
+def exportar_csv(sesion: Callable[[], Session], consulta: Select, columnas: Sequence[Columna]) -> Iterator[bytes]:
+    """
+    CSV con BOM UTF-8 (Excel lo abre con los acentos correctos) y una línea de encabezados.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\r\n")
+    escritor.writerow([columna.nombre for columna in columnas])
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    for bloque in _bloques(sesion, consulta):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows(bloque)
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _Sumidero(io.RawIOBase):
+    """
+    Archivo de solo escritura que acumula lo escrito hasta que se lo retira con vaciar().
+    """
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+        self._posicion = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, datos) -> int:
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self) -> int:
+        return self._posicion
+
+    def vaciar(self) -> bytes:
+        datos, self._partes = b"".join(self._partes), []
+        return datos
+
+
+def exportar_parquet(sesion: Callable[[], Session], consulta: Select, columnas: Sequence[Columna]) -> Iterator[bytes]:
+    # pyarrow se importa recién al exportar, para no sumarlo al arranque de la aplicación
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tipos = {"entero": pa.int64(), "decimal": pa.float64(), "fecha": pa.date32(), "texto": pa.string()}
+    esquema = pa.schema([(columna.nombre, tipos[columna.tipo]) for columna in columnas])
+    sumidero = _Sumidero()
+    with pq.ParquetWriter(sumidero, esquema, compression="snappy") as escritor:
+        for bloque in _bloques(sesion, consulta):
+            valores = list(zip(*bloque))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores[i], type=campo.type) for i, campo in enumerate(esquema)], schema=esquema
+            ))
+            yield sumidero.vaciar()
+    # Al cerrar se escribe el pie del archivo con los metadatos
+    yield sumidero.vaciar()
+
+
+def exportar(
+    formato: str,
+    sesion: Callable[[], Session],
+    consulta: Select,
+    columnas: Sequence[Columna]
+) -> Iterator[bytes]:
+    if formato == "parquet":
+        return exportar_parquet(sesion, consulta, columnas)
+    return exportar_csv(sesion, consulta, columnas)
@@ -0,0 +1,146 @@
+"""
+Calendario iCalendar (.ics) de las reservas de cada propiedad.
+
+Los channel managers consultan el feed cada pocos minutos, así que cada calendario se guarda
+ya generado junto con la huella de las reservas que lo componen (cantidad y mayor revisión, ver
+models.revision). Mientras la huella no cambie se sirve el mismo contenido; cuando cambia, solo
+se vuelven a leer y formatear los eventos de las reservas cuya revisión cambió.
+"""
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import Reserva, EstadoReservaEnum
+
+PRODID = "-//Reservas Abby House//Reservas//ES"
+DOMINIO_UID = "reservasabby.com"
+
+# Las reservas que terminaron hace más de estos días no se publican
+DIAS_HISTORIA = 365
+
+# Cantidad de ids por consulta al releer las reservas modificadas
+LOTE_IDS = 500
+
+
+def _escapar(texto: str) -> str:
+    return (
+        texto.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _plegar(linea: str) -> str:
+    """
+    Corta las líneas de más de 75 octetos (RFC 5545 §3.1) sin partir caracteres UTF-8.
+    """
+    if len(linea.encode("utf-8")) <= 75:
+        return linea
+    partes, actual, largo = [], "", 0
+    for caracter in linea:
+        octetos = len(caracter.encode("utf-8"))
+        if largo + octetos > (75 if not partes else 74):
+            partes.append(actual)
+            actual, largo = "", 0
+        actual += caracter
+        largo += octetos
+    partes.append(actual)
+    return "\r\n ".join(partes)
+
+
+def _fecha(valor: date) -> str:
+    return valor.strftime("%Y%m%d")
+
+
+def _evento(fila) -> str:
+    estado = "TENTATIVE" if fila.estado == EstadoReservaEnum.PENDIENTE else "CONFIRMED"
+    lineas = [
+        "BEGIN:VEVENT",
+        f"UID:reserva-{fila.id}@{DOMINIO_UID}",
+        f"DTSTAMP:{fila.actualizado_en.strftime('%Y%m%dT%H%M%SZ')}",  # actualizado_en está en UTC
+        f"DTSTART;VALUE=DATE:{_fecha(fila.fecha_ingreso)}",
+        f"DTEND;VALUE=DATE:{_fecha(fila.fecha_salida)}",
+        f"SUMMARY:{_escapar(f'Reservado ({fila.plataforma.value})')}",
+        f"DESCRIPTION:{_escapar(f'Huésped: {fila.nombre_huesped}')}",
+        f"STATUS:{estado}",
+        "TRANSP:OPAQUE",
+        "END:VEVENT",
+    ]
+    return "".join(_plegar(linea) + "\r\n" for linea in lineas)
+
+
+def _filtro(propiedad_id: int):
+    return (
+        Reserva.propiedad_id == propiedad_id,
+        Reserva.estado.is_distinct_from(EstadoReservaEnum.CANCELADA),
+        Reserva.fecha_salida >= date.today() - timedelta(days=DIAS_HISTORIA),
+    )
+
+
+def huella_calendario(db: Session, propiedad_id: int) -> Tuple[int, Optional[int]]:
+    """
+    (cantidad, mayor revisión) de las reservas publicadas; una consulta agregada. Cada alta o
+    cambio deja su revisión como la mayor y las bajas o salidas del feed bajan la cantidad.
+    """
+    return tuple(db.query(
+        func.count(Reserva.id), func.max(Reserva.revision)
+    ).filter(*_filtro(propiedad_id)).one())
+
+
+class CacheCalendarios:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # propiedad_id -> {"huella", "cuerpo", "eventos": {reserva_id: (revision, texto)}}
+        self._calendarios: Dict[int, dict] = {}
+
+    def invalidar(self, propiedad_id: Optional[int] = None):
+        with self._lock:
+            if propiedad_id is None:
+                self._calendarios.clear()
+            else:
+                self._calendarios.pop(propiedad_id, None)
+
+    def obtener(self, db: Session, propiedad_id: int, nombre: str, huella: tuple) -> bytes:
+        clave_huella = (nombre, huella)
+        with self._lock:
+            entrada = self._calendarios.get(propiedad_id)
+        if entrada is not None and entrada["huella"] == clave_huella:
+            return entrada["cuerpo"]
+
+        previos = entrada["eventos"] if entrada is not None else {}
+        versiones = db.query(Reserva.id, Reserva.revision).filter(
+            *_filtro(propiedad_id)
+        ).order_by(Reserva.fecha_ingreso, Reserva.id).all()
+
+        # Releer solo las reservas nuevas o modificadas desde la última generación
+        cambiadas = [id for id, revision in versiones if previos.get(id, (None,))[0] != revision]
+        pendientes = set(cambiadas)
+        eventos = {id: previos[id] for id, _ in versiones if id not in pendientes}
+        for inicio in range(0, len(cambiadas), LOTE_IDS):
+            for fila in db.query(
+                Reserva.id, Reserva.fecha_ingreso, Reserva.fecha_salida, Reserva.nombre_huesped,
+                Reserva.plataforma, Reserva.estado, Reserva.actualizado_en, Reserva.revision
+            ).filter(Reserva.id.in_(cambiadas[inicio:inicio + LOTE_IDS])).all():
+                eventos[fila.id] = (fila.revision, _evento(fila))
+
+        cabecera = [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{_escapar(nombre)}",
+        ]
+        partes: List[str] = [_plegar(linea) + "\r\n" for linea in cabecera]
+        partes.extend(eventos[id][1] for id, _ in versiones if id in eventos)
+        partes.append("END:VCALENDAR\r\n")
+        cuerpo = "".join(partes).encode("utf-8")
+
+        with self._lock:
+            self._calendarios[propiedad_id] = {"huella": clave_huella, "cuerpo": cuerpo, "eventos": eventos}
+        return cuerpo
+
+
+cache_calendarios = CacheCalendarios()
@@ -0,0 +1,276 @@
+"""
+Importación vectorizada de reservas desde Excel.
+
+El archivo pasa por etapas sobre el DataFrame completo (sin iterar filas con pydantic ni
+consultar la base por fila):
+
+1. Mapeo de columnas: encabezados normalizados y alias (por ejemplo "Checkin" -> fecha_ingreso).
+2. Coerción de tipos: fechas y montos con errors="coerce".
+3. Normalización de plataforma y estado a los enums del modelo.
+4. Validación: cada fila inválida queda con su motivo de rechazo.
+5. Deduplicación contra el archivo y contra las claves (propiedad_id, fecha_ingreso, fecha_salida)
+   existentes, leídas en una sola consulta.
+6. Superposiciones con reservas existentes u otras filas del archivo.
+7. Inserción en bloque.
+"""
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models import Reserva, PlataformaEnum, EstadoReservaEnum
+from .cache import listar_propiedades
+from .ocupacion import OcupacionPropiedad
+from .resumen_mensual import registrar_reservas
+
+# Alias aceptados para cada columna, ya normalizados (minúsculas, sin tildes ni espacios repetidos)
+ALIAS_COLUMNAS: Dict[str, tuple] = {
+    "fecha_ingreso": ("fecha_ingreso", "fecha ingreso", "checkin", "check in", "check-in", "ingreso"),
+    "fecha_salida": ("fecha_salida", "fecha salida", "checkout", "check out", "check-out", "salida"),
+    "nombre_huesped": ("nombre_huesped", "usuario / huesped", "huesped", "nombre"),
+    "plataforma": ("plataforma",),
+    "estado": ("estado", "status"),
+    "monto_total_usd": ("monto_total_usd", "monto_total", "total u$s estadia bolsillo"),
+    "monto_sena_usd": ("monto_sena_usd", "monto_sena", "sena"),
+    "notas": ("notas", "observaciones"),
+    "propiedad": ("propiedad",),
+}
+
+COLUMNAS_REQUERIDAS = ("fecha_ingreso", "fecha_salida")
+
+COLUMNAS_RESERVA = (
+    "fecha_ingreso", "fecha_salida", "nombre_huesped", "plataforma", "estado",
+    "monto_total_usd", "monto_sena_usd", "notas", "propiedad_id",
+)
+
+# Hoja usada por defecto cuando el libro la contiene (formato de "RESERVAS ABBY HOUSE 2025.xlsx")
+HOJA_RESERVAS = "Reservas"
+
+
+class ErrorImportacion(ValueError):
+    pass
+
+
+def _normalizar_texto(valor) -> str:
+    texto = unicodedata.normalize("NFKD", str(valor)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(texto.strip().lower().split())
+
+
+def leer_excel(origen, hoja: Optional[str] = None) -> pd.DataFrame:
+    libro = pd.ExcelFile(origen)
+    if hoja is None:
+        hoja = HOJA_RESERVAS if HOJA_RESERVAS in libro.sheet_names else libro.sheet_names[0]
+    elif hoja not in libro.sheet_names:
+        raise ErrorImportacion(f"La hoja '{hoja}' no existe en el archivo")
+    return libro.parse(hoja)
+
+
+def mapear_columnas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Renombra las columnas reconocidas a sus nombres canónicos y descarta el resto.
+    La columna "fila" conserva el número de fila de Excel para el reporte de rechazos.
+    """
+    normalizadas = {_normalizar_texto(columna): columna for columna in df.columns}
+    renombres = {}
+    for canonica, alias in ALIAS_COLUMNAS.items():
+        for nombre in alias:
+            if nombre in normalizadas:
+                renombres[normalizadas[nombre]] = canonica
+                break
+
+    faltantes = [columna for columna in COLUMNAS_REQUERIDAS if columna not in renombres.values()]
+    if faltantes:
+        raise ErrorImportacion(f"El archivo no tiene las columnas requeridas: {', '.join(faltantes)}")
+
+    # Descartar filas completamente vacías (habituales al final de las planillas)
+    df = df.dropna(how="all")
+    mapeado = df[list(renombres)].rename(columns=renombres)
+    for canonica in ALIAS_COLUMNAS:
+        if canonica not in mapeado:
+            # Sin columna de monto se importa con 0, como hacía la importación original
+            mapeado[canonica] = 0.0 if canonica == "monto_total_usd" else np.nan
+    # Encabezado en la fila 1 de Excel: la fila de datos con índice i está en la fila i + 2
+    mapeado["fila"] = df.index + 2
+    mapeado["motivo"] = None
+    return mapeado.reset_index(drop=True)
+
+
+def coercionar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+    df["fecha_ingreso"] = pd.to_datetime(df["fecha_ingreso"], errors="coerce", dayfirst=True).dt.normalize()
+    df["fecha_salida"] = pd.to_datetime(df["fecha_salida"], errors="coerce", dayfirst=True).dt.normalize()
+    df["monto_total_usd"] = pd.to_numeric(df["monto_total_usd"], errors="coerce")
+    df["monto_sena_usd"] = pd.to_numeric(df["monto_sena_usd"], errors="coerce")
+    df["nombre_huesped"] = df["nombre_huesped"].where(df["nombre_huesped"].notna(), "Sin nombre").astype(str).str.strip()
+    df["notas"] = df["notas"].where(df["notas"].notna(), None)
+    return df
+
+
+def normalizar_enums(df: pd.DataFrame) -> pd.DataFrame:
+    plataforma = df["plataforma"].fillna("").astype(str).map(_normalizar_texto)
+    estado = df["estado"].fillna("").astype(str).map(_normalizar_texto)
+
+    df["plataforma"] = pd.Series(np.select(
+        [
+            plataforma.str.startswith("airbnb"),
+            plataforma.str.startswith("booking"),
+            plataforma.str.startswith("particular"),
+        ],
+        [PlataformaEnum.AIRBNB.value, PlataformaEnum.BOOKING.value, PlataformaEnum.PARTICULAR.value],
+        default=PlataformaEnum.OTRO.value
+    ), index=df.index).map(PlataformaEnum)
+    # En la planilla una reserva cancelada puede figurar en Status o directamente en Plataforma
+    df["cancelada"] = estado.str.contains("cancel") | plataforma.str.contains("cancel")
+    df["estado"] = pd.Series(np.select(
+        [
+            df["cancelada"],
+            estado.str.contains("finaliz") | estado.str.contains("complet"),
+            estado.str.contains("confirm") | estado.str.contains("por ingresar"),
+        ],
+        [EstadoReservaEnum.CANCELADA.value, EstadoReservaEnum.COMPLETADA.value, EstadoReservaEnum.CONFIRMADA.value],
+        default=EstadoReservaEnum.PENDIENTE.value
+    ), index=df.index).map(EstadoReservaEnum)
+    return df
+
+
+def _rechazar(df: pd.DataFrame, mascara: pd.Series, motivo: str):
+    df.loc[mascara & df["motivo"].isna(), "motivo"] = motivo
+
+
+def asignar_propiedades(db: Session, df: pd.DataFrame, propiedad_id: Optional[int]) -> pd.DataFrame:
+    if propiedad_id is not None:
+        df["propiedad_id"] = propiedad_id
+        return df
+
+    if df["propiedad"].isna().all():
+        raise ErrorImportacion("Debe indicar propiedad_id o incluir la columna Propiedad en el archivo")
+
+    # La tabla de propiedades es chica: se resuelve por nombre con un mapeo en memoria
+    por_nombre = {_normalizar_texto(propiedad.nombre): propiedad.id for propiedad in listar_propiedades(db)}
+    nombres = df["propiedad"].fillna("").astype(str).map(_normalizar_texto)
+    df["propiedad_id"] = nombres.map(por_nombre)
+    _rechazar(df, df["propiedad_id"].isna(), "Propiedad no encontrada")
+    return df
+
+
+def validar(df: pd.DataFrame) -> pd.DataFrame:
+    _rechazar(df, df["fecha_ingreso"].isna(), "Fecha de ingreso inválida")
+    _rechazar(df, df["fecha_salida"].isna(), "Fecha de salida inválida")
+    _rechazar(df, df["fecha_salida"] <= df["fecha_ingreso"], "La fecha de salida debe ser posterior a la fecha de ingreso")
+    _rechazar(df, df["monto_total_usd"].isna() | (df["monto_total_usd"] < 0), "Monto total inválido")
+    _rechazar(df, df["monto_sena_usd"] < 0, "Monto de seña inválido")
+    return df
+
+
+def deduplicar(db: Session, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rechaza filas repetidas en el archivo o ya cargadas. Una reserva cancelada y otra activa
+    con las mismas fechas se consideran reservas distintas. Devuelve también las reservas
+    existentes leídas, que se reutilizan para detectar superposiciones.
+    """
+    clave = ["propiedad_id", "fecha_ingreso", "fecha_salida", "cancelada"]
+
+    pendientes = df["motivo"].isna()
+    _rechazar(df, pendientes & df[pendientes].duplicated(clave, keep="first").reindex(df.index, fill_value=False),
+              "Duplicada en el archivo")
+
+    existentes = pd.DataFrame(columns=["id", "propiedad_id", "fecha_ingreso", "fecha_salida", "cancelada"])
+    pendientes = df[df["motivo"].isna()]
+    if pendientes.empty:
+        return df, existentes
+
+    # Claves existentes de las propiedades involucradas, en una sola consulta
+    filas = db.query(
+        Reserva.id, Reserva.propiedad_id, Reserva.fecha_ingreso, Reserva.fecha_salida,
+        Reserva.estado.is_not_distinct_from(EstadoReservaEnum.CANCELADA)
+    ).filter(
+        Reserva.propiedad_id.in_(pendientes["propiedad_id"].astype(int).unique().tolist()),
+        Reserva.fecha_salida > pendientes["fecha_ingreso"].min().date(),
+        Reserva.fecha_ingreso < pendientes["fecha_salida"].max().date()
+    ).all()
+    existentes = pd.DataFrame(filas, columns=["id", "propiedad_id", "fecha_ingreso", "fecha_salida", "cancelada"])
+    existentes["fecha_ingreso"] = pd.to_datetime(existentes["fecha_ingreso"])
+    existentes["fecha_salida"] = pd.to_datetime(existentes["fecha_salida"])
+    existentes["cancelada"] = existentes["cancelada"].astype(bool)
+
+    cruce = pendientes[clave].assign(propiedad_id=pendientes["propiedad_id"].astype(int)).merge(
+        existentes[clave].drop_duplicates(), on=clave, how="left", indicator=True
+    )
+    duplicadas = pd.Series(cruce["_merge"].eq("both").to_numpy(), index=pendientes.index)
+    _rechazar(df, duplicadas.reindex(df.index, fill_value=False), "Ya existe una reserva con la misma propiedad y fechas")
+    return df, existentes
+
+
+def resolver_superposiciones(df: pd.DataFrame, existentes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rechaza las filas activas que se superponen con reservas existentes o con filas anteriores
+    del archivo, usando la misma lista ordenada de intervalos que /reservas/bulk.
+    """
+    activas = df[df["motivo"].isna() & ~df["cancelada"]]
+    if activas.empty:
+        return df
+
+    ocupaciones: Dict[int, OcupacionPropiedad] = {}
+    for propiedad_id in activas["propiedad_id"].astype(int).unique():
+        propias = existentes[(existentes["propiedad_id"] == propiedad_id) & ~existentes["cancelada"].astype(bool)]
+        ocupaciones[propiedad_id] = OcupacionPropiedad()
+        ocupaciones[propiedad_id].cargar(list(zip(
+            propias["fecha_ingreso"], propias["fecha_salida"], (("db", id) for id in propias["id"])
+        )))
+
+    rechazadas: List[int] = []
+    for indice, propiedad_id, fecha_ingreso, fecha_salida in zip(
+        activas.index, activas["propiedad_id"].astype(int), activas["fecha_ingreso"], activas["fecha_salida"]
+    ):
+        ocupacion = ocupaciones[propiedad_id]
+        if ocupacion.superposicion(fecha_ingreso, fecha_salida) is not None:
+            rechazadas.append(indice)
+        else:
+            ocupacion.agregar(fecha_ingreso, fecha_salida, ("archivo", indice))
+
+    _rechazar(df, df.index.isin(rechazadas), "Se superpone con otra reserva de la propiedad")
+    return df
+
+
+def insertar(db: Session, df: pd.DataFrame) -> int:
+    nuevas = df[df["motivo"].isna()]
+    if nuevas.empty:
+        return 0
+
+    registros = nuevas[list(COLUMNAS_RESERVA)].copy()
+    registros["fecha_ingreso"] = registros["fecha_ingreso"].dt.date
+    registros["fecha_salida"] = registros["fecha_salida"].dt.date
+    registros["propiedad_id"] = registros["propiedad_id"].astype(int)
+    registros = registros.astype(object).where(registros.notna(), None)
+
+    db.execute(insert(Reserva), registros.to_dict("records"))
+    registrar_reservas(db, registros["fecha_ingreso"])
+    return len(registros)
+
+
+def importar_reservas(db: Session, crudo: pd.DataFrame, propiedad_id: Optional[int] = None) -> dict:
+    """
+    Ejecuta las etapas sobre la hoja ya leída (ver leer_excel) y devuelve el reporte de la
+    importación. La transacción la confirma quien llama.
+    """
+    df = mapear_columnas(crudo)
+    df = coercionar_tipos(df)
+    df = normalizar_enums(df)
+    df = asignar_propiedades(db, df, propiedad_id)
+    df = validar(df)
+    df, existentes = deduplicar(db, df)
+    df = resolver_superposiciones(df, existentes)
+    nuevas = insertar(db, df)
+
+    rechazos = df[df["motivo"].notna()]
+    return {
+        "filas_leidas": len(df),
+        "nuevas_reservas": nuevas,
+        "rechazadas": len(rechazos),
+        "rechazos": [
+            {"fila": int(fila), "motivo": motivo}
+            for fila, motivo in zip(rechazos["fila"], rechazos["motivo"])
+        ],
+    }
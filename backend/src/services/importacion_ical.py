@@ -0,0 +1,277 @@
+"""
+Importación de reservas desde feeds iCalendar (.ics) con conciliación por diferencias.
+
+1. El feed se lee línea a línea (archivo subido o ruta local): se despliegan las líneas
+   plegadas y cada VEVENT se reduce a UID, fechas, resumen y si está cancelado. Nunca se
+   tiene el texto completo en memoria.
+2. Los eventos se comparan con las reservas de la propiedad: primero por UID (id_externo de
+   la plataforma) y, para las reservas activas cargadas a mano, por rango de fechas.
+3. Solo se escriben las diferencias: altas, cambios de fechas o de estado, y la cancelación
+   de las reservas futuras que desaparecieron del feed. Todo pasa por procesar_lote dentro
+   de la transacción de quien llama; reimportar un feed sin cambios no modifica ninguna fila.
+"""
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy.orm import Session
+
+from ..models import Reserva, PlataformaEnum, EstadoReservaEnum
+from .reservas_lote import CONFLICTO, INVALIDA, procesar_lote
+
+# Nombre de huésped para los eventos sin SUMMARY
+HUESPED_ICAL = "Reserva iCal"
+
+
+class ErrorIcal(ValueError):
+    pass
+
+
+class EventoIcal(NamedTuple):
+    uid: str
+    fecha_ingreso: date
+    fecha_salida: date
+    resumen: Optional[str]
+    cancelado: bool
+
+
+def _desplegar(lineas: Iterable[bytes]) -> Iterator[str]:
+    # Se une en bytes antes de decodificar: un pliegue puede partir un carácter multibyte
+    pendiente: Optional[bytes] = None
+    for cruda in lineas:
+        linea = cruda.rstrip(b"\r\n")
+        if linea[:1] in (b" ", b"\t") and pendiente is not None:
+            pendiente += linea[1:]
+            continue
+        if pendiente is not None:
+            yield pendiente.decode("utf-8", errors="replace")
+        pendiente = linea
+    if pendiente is not None:
+        yield pendiente.decode("utf-8", errors="replace")
+
+
+def _separar(linea: str) -> Tuple[str, str]:
+    """
+    "NOMBRE;PARAM=VALOR:contenido" -> (NOMBRE, contenido). Los dos puntos entre comillas
+    pertenecen a un parámetro.
+    """
+    entre_comillas = False
+    for posicion, caracter in enumerate(linea):
+        if caracter == '"':
+            entre_comillas = not entre_comillas
+        elif caracter == ":" and not entre_comillas:
+            cabecera, valor = linea[:posicion], linea[posicion + 1:]
+            break
+    else:
+        return linea.upper(), ""
+    return cabecera.split(";", 1)[0].upper(), valor
+
+
+def _texto(valor: str) -> str:
+    resultado, escapado = [], False
+    for caracter in valor:
+        if escapado:
+            resultado.append("\n" if caracter in "nN" else caracter)
+            escapado = False
+        elif caracter == "\\":
+            escapado = True
+        else:
+            resultado.append(caracter)
+    return "".join(resultado).strip()
+
+
+def _fecha(valor: str) -> Optional[date]:
+    try:
+        return datetime.strptime(valor.strip()[:8], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def leer_eventos(lineas: Iterable[bytes]) -> Iterator[EventoIcal]:
+    """
+    Recorre el feed y produce un EventoIcal por cada VEVENT válido (con UID y DTSTART).
+    """
+    evento: Optional[Dict[str, str]] = None
+    anidados = 0  # VALARM u otros componentes dentro del VEVENT
+    for linea in _desplegar(lineas):
+        nombre, valor = _separar(linea)
+        if nombre == "BEGIN":
+            if valor.strip().upper() == "VEVENT":
+                evento, anidados = {}, 0
+            elif evento is not None:
+                anidados += 1
+            continue
+        if nombre == "END":
+            if evento is not None and anidados:
+                anidados -= 1
+            elif evento is not None and valor.strip().upper() == "VEVENT":
+                inicio = _fecha(evento.get("DTSTART", ""))
+                fin = _fecha(evento.get("DTEND", "")) or (inicio + timedelta(days=1) if inicio else None)
+                if evento.get("UID") and inicio is not None:
+                    yield EventoIcal(
+                        uid=evento["UID"],
+                        fecha_ingreso=inicio,
+                        fecha_salida=fin,
+                        resumen=_texto(evento["SUMMARY"]) if evento.get("SUMMARY") else None,
+                        cancelado=evento.get("STATUS", "").strip().upper() == "CANCELLED",
+                    )
+                evento = None
+            continue
+        if evento is not None and not anidados and nombre in ("UID", "DTSTART", "DTEND", "SUMMARY", "STATUS"):
+            evento[nombre] = valor.strip() if nombre == "UID" else valor
+
+
+def leer_ical(origen: Union[str, Path, BinaryIO]) -> List[EventoIcal]:
+    """
+    Lee un feed desde una ruta o un archivo binario ya abierto. Si un UID aparece más de una
+    vez (por ejemplo, ocurrencias modificadas) vale la última.
+    """
+    if isinstance(origen, (str, Path)):
+        with open(origen, "rb") as archivo:
+            eventos = {evento.uid: evento for evento in leer_eventos(archivo)}
+    else:
+        eventos = {evento.uid: evento for evento in leer_eventos(origen)}
+    if not eventos:
+        raise ErrorIcal("El archivo no contiene eventos VEVENT válidos")
+    return list(eventos.values())
+
+
+def _item(fila, **cambios) -> dict:
+    item = {
+        "propiedad_id": fila.propiedad_id,
+        "plataforma": fila.plataforma,
+        "id_externo": fila.id_externo,
+        "fecha_ingreso": fila.fecha_ingreso,
+        "fecha_salida": fila.fecha_salida,
+        "nombre_huesped": fila.nombre_huesped,
+        "estado": fila.estado,
+        "monto_total_usd": fila.monto_total_usd,
+        "monto_sena_usd": fila.monto_sena_usd,
+        "notas": fila.notas,
+    }
+    item.update(cambios)
+    return item
+
+
+def importar_ical(
+    db: Session,
+    eventos: List[EventoIcal],
+    propiedad_id: int,
+    plataforma: PlataformaEnum = PlataformaEnum.OTRO
+) -> dict:
+    """
+    Concilia los eventos del feed con las reservas de la propiedad y devuelve el reporte.
+    La transacción la confirma quien llama.
+    """
+    columnas = (
+        Reserva.id, Reserva.propiedad_id, Reserva.plataforma, Reserva.id_externo,
+        Reserva.fecha_ingreso, Reserva.fecha_salida, Reserva.nombre_huesped, Reserva.estado,
+        Reserva.monto_total_usd, Reserva.monto_sena_usd, Reserva.notas,
+    )
+    uids = {evento.uid for evento in eventos}
+
+    # Reservas ya vinculadas a algún UID del feed (pueden ser de otra propiedad)
+    por_uid = {
+        fila.id_externo: fila
+        for fila in db.query(*columnas).filter(
+            Reserva.plataforma == plataforma, Reserva.id_externo.in_(uids)
+        ).all()
+    }
+
+    # Reservas activas de la propiedad sin UID, candidatas a vincularse por rango de fechas. Las
+    # canceladas no se vinculan: el evento se da de alta como reserva nueva
+    sin_uid = [evento for evento in eventos if evento.uid not in por_uid]
+    por_fechas = {}
+    if sin_uid:
+        for fila in db.query(*columnas).filter(
+            Reserva.propiedad_id == propiedad_id,
+            Reserva.id_externo.is_(None),
+            Reserva.estado.is_distinct_from(EstadoReservaEnum.CANCELADA),
+            Reserva.fecha_salida > min(evento.fecha_ingreso for evento in sin_uid),
+            Reserva.fecha_ingreso < max(evento.fecha_salida for evento in sin_uid)
+        ).order_by(Reserva.id).all():
+            por_fechas.setdefault((fila.fecha_ingreso, fila.fecha_salida), fila)
+
+    # Cada ítem lleva el id de la reserva conciliada (None para las altas), para que procesar_lote
+    # actualice esa misma fila y no otra con la misma clave
+    items: List[dict] = []
+    reserva_ids: List[Optional[int]] = []
+    tipos: List[str] = []
+    rechazos: List[dict] = []
+    sin_cambios = 0
+
+    for evento in eventos:
+        estado_evento = EstadoReservaEnum.CANCELADA if evento.cancelado else None
+        fila = por_uid.get(evento.uid)
+        if fila is not None and fila.propiedad_id != propiedad_id:
+            rechazos.append({"uid": evento.uid, "motivo": "El UID pertenece a una reserva de otra propiedad"})
+            continue
+
+        if fila is None:
+            fila = por_fechas.pop((evento.fecha_ingreso, evento.fecha_salida), None)
+            if fila is not None:
+                # Reserva cargada a mano con las mismas fechas: se vincula al UID
+                items.append(_item(fila, id_externo=evento.uid, plataforma=plataforma, estado=estado_evento or fila.estado))
+                reserva_ids.append(fila.id)
+                tipos.append("actualizada")
+                continue
+
+            if evento.cancelado:
+                sin_cambios += 1  # Cancelada y desconocida: no hay nada que registrar
+                continue
+            items.append({
+                "propiedad_id": propiedad_id,
+                "plataforma": plataforma,
+                "id_externo": evento.uid,
+                "fecha_ingreso": evento.fecha_ingreso,
+                "fecha_salida": evento.fecha_salida,
+                "nombre_huesped": evento.resumen or HUESPED_ICAL,
+                "estado": EstadoReservaEnum.CONFIRMADA,
+                "monto_total_usd": 0.0,
+            })
+            reserva_ids.append(None)
+            tipos.append("nueva")
+            continue
+
+        # Reserva conocida: solo fechas y cancelación vienen del feed
+        estado = estado_evento or (
+            EstadoReservaEnum.CONFIRMADA if fila.estado == EstadoReservaEnum.CANCELADA else fila.estado
+        )
+        if (fila.fecha_ingreso, fila.fecha_salida, fila.estado) == (evento.fecha_ingreso, evento.fecha_salida, estado):
+            sin_cambios += 1
+            continue
+        items.append(_item(fila, fecha_ingreso=evento.fecha_ingreso, fecha_salida=evento.fecha_salida, estado=estado))
+        reserva_ids.append(fila.id)
+        tipos.append("cancelada" if estado == EstadoReservaEnum.CANCELADA else "actualizada")
+
+    # Reservas futuras importadas de este feed que ya no figuran en él
+    for fila in db.query(*columnas).filter(
+        Reserva.propiedad_id == propiedad_id,
+        Reserva.plataforma == plataforma,
+        Reserva.id_externo.isnot(None),
+        Reserva.fecha_salida > date.today(),
+        Reserva.estado.is_distinct_from(EstadoReservaEnum.CANCELADA)
+    ).all():
+        if fila.id_externo not in uids:
+            items.append(_item(fila, estado=EstadoReservaEnum.CANCELADA))
+            reserva_ids.append(fila.id)
+            tipos.append("cancelada")
+
+    respuesta = procesar_lote(db, items, actualizar=True, reserva_ids=reserva_ids)
+
+    aplicados = {"nueva": 0, "actualizada": 0, "cancelada": 0}
+    for tipo, item, resultado in zip(tipos, items, respuesta.resultados):
+        if resultado.resultado in (CONFLICTO, INVALIDA):
+            rechazos.append({"uid": item["id_externo"], "motivo": resultado.detalle})
+        else:
+            aplicados[tipo] += 1
+
+    return {
+        "eventos_leidos": len(eventos),
+        "nuevas_reservas": aplicados["nueva"],
+        "actualizadas": aplicados["actualizada"],
+        "canceladas": aplicados["cancelada"],
+        "sin_cambios": sin_cambios,
+        "rechazadas": len(rechazos),
+        "rechazos": rechazos,
+    }
@@ -0,0 +1,154 @@
+"""
+Liquidación entre socios de un período.
+
+Todos los movimientos son del negocio; el socio de cada uno indica quién cobró o pagó. Al
+cierre, a cada socio le corresponde su parte del resultado del período (ingresos - egresos).
+Lo que tiene "en mano" es lo que cobró menos lo que pagó, más su parte de los movimientos de
+"Todos". La diferencia entre lo que le corresponde y lo que tiene es lo que debe recibir (o
+entregar, si es negativa), y las transferencias se arman cruzando deudores con acreedores.
+
+Todo se expresa en pesos: los movimientos en dólares se convierten con el tipo de cambio de
+cada movimiento o, si no lo tiene, con el vigente en su fecha (services.tipos_cambio). La
+agregación es una única consulta agrupada por socio, moneda y tipo, así que el costo no
+depende de la cantidad de movimientos del período.
+"""
+from datetime import date
+from typing import Dict, Iterable, List
+
+from sqlalchemy import Select, case, func, select
+
+from ..models import MovimientoCaja, MonedaEnum, SocioEnum, TipoMovimientoEnum
+from .tipos_cambio import monto_en_moneda, tasa_movimiento
+
+SOCIOS = [socio for socio in SocioEnum if socio != SocioEnum.TODOS]
+
+# Diferencias menores a un centavo no generan transferencias
+CENTAVO = 0.005
+
+
+class ErrorLiquidacion(ValueError):
+    pass
+
+
+def normalizar_partes(partes: Dict[str, float]) -> Dict[SocioEnum, float]:
+    """
+    Valida las partes por socio (nombre -> proporción) y las lleva a sumar 1. Los socios que no
+    figuran tienen parte 0.
+    """
+    normalizadas = {socio: 0.0 for socio in SOCIOS}
+    for nombre, parte in partes.items():
+        try:
+            socio = SocioEnum(nombre)
+        except ValueError:
+            raise ErrorLiquidacion(f"Socio desconocido en las partes: {nombre}")
+        if socio == SocioEnum.TODOS:
+            raise ErrorLiquidacion("Las partes se asignan a cada socio, no a Todos")
+        if parte < 0:
+            raise ErrorLiquidacion(f"La parte de {nombre} no puede ser negativa")
+        normalizadas[socio] = float(parte)
+    total = sum(normalizadas.values())
+    if total <= 0:
+        raise ErrorLiquidacion("Las partes de los socios deben sumar más que cero")
+    return {socio: parte / total for socio, parte in normalizadas.items()}
+
+
+def leer_partes(texto: str) -> Dict[str, float]:
+    """
+    "Maxy:2,Oso:1,Laura:1" -> {"Maxy": 2.0, "Oso": 1.0, "Laura": 1.0}
+    """
+    partes = {}
+    for par in texto.split(","):
+        nombre, _, valor = par.partition(":")
+        try:
+            partes[nombre.strip()] = float(valor)
+        except ValueError:
+            raise ErrorLiquidacion(f"Parte inválida: {par.strip()!r}, usar Socio:proporción")
+    return partes
+
+
+def consulta_liquidacion(desde: date, hasta: date) -> Select:
+    """
+    Totales en pesos por socio, moneda y tipo del período, y cuántos movimientos en dólares no
+    tienen tipo de cambio propio ni vigente (cuentan como 0).
+    """
+    en_pesos = monto_en_moneda(MonedaEnum.PESOS, tasa_movimiento())
+    sin_cambio = case((en_pesos.is_(None), 1), else_=0)
+    return select(
+        MovimientoCaja.socio,
+        MovimientoCaja.moneda,
+        MovimientoCaja.tipo,
+        func.coalesce(func.sum(MovimientoCaja.monto), 0.0),
+        func.coalesce(func.sum(en_pesos), 0.0),
+        func.sum(sin_cambio),
+    ).where(
+        MovimientoCaja.fecha >= desde,
+        MovimientoCaja.fecha <= hasta
+    ).group_by(MovimientoCaja.socio, MovimientoCaja.moneda, MovimientoCaja.tipo)
+
+
+def transferencias(saldos: Dict[SocioEnum, float]) -> List[dict]:
+    """
+    Cruza a quienes deben entregar (saldo negativo) con quienes deben recibir, de mayor a menor:
+    a lo sumo socios - 1 transferencias.
+    """
+    deudores = sorted(((-saldo, socio) for socio, saldo in saldos.items() if saldo < -CENTAVO), reverse=True)
+    acreedores = sorted(((saldo, socio) for socio, saldo in saldos.items() if saldo > CENTAVO), reverse=True)
+    resultado = []
+    i = j = 0
+    while i < len(deudores) and j < len(acreedores):
+        debe, deudor = deudores[i]
+        recibe, acreedor = acreedores[j]
+        monto = min(debe, recibe)
+        resultado.append({"de": deudor, "a": acreedor, "monto_pesos": round(monto, 2)})
+        deudores[i] = (debe - monto, deudor)
+        acreedores[j] = (recibe - monto, acreedor)
+        if deudores[i][0] <= CENTAVO:
+            i += 1
+        if acreedores[j][0] <= CENTAVO:
+            j += 1
+    return resultado
+
+
+def liquidar(desde: date, hasta: date, grupos: Iterable, partes: Dict[SocioEnum, float]) -> dict:
+    """
+    Arma la liquidación a partir de las filas de consulta_liquidacion y las partes normalizadas.
+    """
+    cero = {"ingresos_pesos": 0.0, "egresos_pesos": 0.0, "ingresos_usd": 0.0, "egresos_usd": 0.0}
+    por_socio = {socio: dict(cero) for socio in SocioEnum}
+    sin_tipo_cambio = 0
+    for socio, moneda, tipo, monto, monto_pesos, sin_cambio in grupos:
+        clave = "ingresos" if tipo == TipoMovimientoEnum.INGRESO else "egresos"
+        por_socio[socio][f"{clave}_pesos"] += monto_pesos
+        if moneda == MonedaEnum.DOLARES:
+            por_socio[socio][f"{clave}_usd"] += monto
+        sin_tipo_cambio += sin_cambio or 0
+
+    netos = {socio: totales["ingresos_pesos"] - totales["egresos_pesos"] for socio, totales in por_socio.items()}
+    resultado = sum(netos.values())
+
+    socios = []
+    saldos: Dict[SocioEnum, float] = {}
+    for socio in SOCIOS:
+        en_mano = netos[socio] + partes[socio] * netos[SocioEnum.TODOS]
+        corresponde = partes[socio] * resultado
+        saldos[socio] = corresponde - en_mano
+        socios.append({
+            "socio": socio,
+            "parte": partes[socio],
+            **{campo: round(valor, 2) for campo, valor in por_socio[socio].items()},
+            "en_mano_pesos": round(en_mano, 2),
+            "corresponde_pesos": round(corresponde, 2),
+            "saldo_pesos": round(saldos[socio], 2),
+        })
+
+    todos = por_socio[SocioEnum.TODOS]
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "resultado_pesos": round(resultado, 2),
+        "compartido_pesos": round(netos[SocioEnum.TODOS], 2),
+        "compartido_usd": round(todos["ingresos_usd"] - todos["egresos_usd"], 2),
+        "movimientos_usd_sin_tipo_cambio": sin_tipo_cambio,
+        "socios": socios,
+        "transferencias": transferencias(saldos),
+    }
@@ -0,0 +1,206 @@
+"""
+Ocupación de propiedades en memoria.
+
+OcupacionPropiedad guarda los intervalos [fecha_ingreso, fecha_salida) de una propiedad
+ordenados por ingreso, de modo que cada consulta de superposición es una búsqueda binaria.
+IndiceOcupacion mantiene uno por propiedad a partir de la tabla reservas; los endpoints lo
+actualizan después de confirmar cada escritura. Como cada worker tiene su propio índice, antes de
+usarlo se compara la revisión de reservas y propiedades (models.revision, una lectura por clave
+primaria) con la de la carga: si otro proceso escribió, se recarga completo. Las escrituras
+propias avanzan la revisión del índice cuando son la siguiente a la cargada, así no fuerzan una
+recarga. Además se recarga cuando supera RECARGA_SEGUNDOS.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models import Propiedad, Reserva, EstadoReservaEnum, revision_actual
+
+# Antigüedad máxima del índice antes de recargarlo desde la base
+RECARGA_SEGUNDOS = 300
+
+
+class OcupacionPropiedad:
+    """
+    Intervalos no superpuestos de una propiedad, ordenados por fecha de ingreso.
+    Cada intervalo recuerda su origen: ("db", reserva_id) o ("lote", indice).
+    """
+
+    def __init__(self):
+        self.inicios: List[date] = []
+        self.fines: List[date] = []
+        self.origenes: List[Tuple[str, int]] = []
+
+    def cargar(self, intervalos: Sequence[Tuple[date, date, Tuple[str, int]]]):
+        for inicio, fin, origen in sorted(intervalos, key=lambda i: i[0]):
+            self.inicios.append(inicio)
+            self.fines.append(fin)
+            self.origenes.append(origen)
+
+    def superposicion(self, inicio: date, fin: date) -> Optional[Tuple[str, int]]:
+        # Al no haber superposiciones entre los intervalos aceptados, basta con mirar los vecinos
+        pos = bisect_right(self.inicios, inicio)
+        if pos > 0 and self.fines[pos - 1] > inicio:
+            return self.origenes[pos - 1]
+        if pos < len(self.inicios) and self.inicios[pos] < fin:
+            return self.origenes[pos]
+        return None
+
+    def agregar(self, inicio: date, fin: date, origen: Tuple[str, int]):
+        pos = bisect_right(self.inicios, inicio)
+        self.inicios.insert(pos, inicio)
+        self.fines.insert(pos, fin)
+        self.origenes.insert(pos, origen)
+
+    def quitar(self, inicio: date, origen: Tuple[str, int]) -> bool:
+        pos = bisect_left(self.inicios, inicio)
+        while pos < len(self.inicios) and self.inicios[pos] == inicio:
+            if self.origenes[pos] == origen:
+                del self.inicios[pos], self.fines[pos], self.origenes[pos]
+                return True
+            pos += 1
+        return False
+
+    def huecos(self, desde: date, hasta: date, noches: int = 1) -> List[Tuple[date, date]]:
+        """
+        Períodos libres dentro de [desde, hasta) de al menos `noches` noches.
+        """
+        libres = []
+        cursor = desde
+        pos = max(bisect_right(self.inicios, desde) - 1, 0)
+        while pos < len(self.inicios) and self.inicios[pos] < hasta:
+            if self.fines[pos] > cursor:
+                if self.inicios[pos] > cursor:
+                    libres.append((cursor, self.inicios[pos]))
+                cursor = self.fines[pos]
+            pos += 1
+        if cursor < hasta:
+            libres.append((cursor, hasta))
+        return [(inicio, fin) for inicio, fin in libres if (fin - inicio).days >= noches]
+
+
+class IndiceOcupacion:
+    """
+    Ocupación de todas las propiedades, compartida por los requests del proceso.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._propiedades: Dict[int, OcupacionPropiedad] = {}
+        # reserva_id -> (propiedad_id, fecha_ingreso) para poder moverla o quitarla
+        self._reservas: Dict[int, Tuple[int, date]] = {}
+        self._cargado_en: Optional[float] = None
+        self._revision: Optional[int] = None
+
+    def _vigente(self, revision: int) -> bool:
+        return (
+            self._cargado_en is not None
+            and time.monotonic() - self._cargado_en < RECARGA_SEGUNDOS
+            and revision == self._revision
+        )
+
+    def cargar(self, db: Session, revision: Optional[int] = None):
+        # Se consulta con el lock tomado para no perder escrituras registradas durante la carga.
+        # La revisión se lee antes que las reservas: lo confirmado después fuerza otra recarga.
+        with self._lock:
+            self._revision = revision if revision is not None else revision_actual(db)
+            propiedad_ids = [id for (id,) in db.query(Propiedad.id).all()]
+            filas = db.query(
+                Reserva.id, Reserva.propiedad_id, Reserva.fecha_ingreso, Reserva.fecha_salida
+            ).filter(
+                Reserva.propiedad_id.isnot(None),
+                Reserva.estado.is_distinct_from(EstadoReservaEnum.CANCELADA)
+            ).all()
+
+            intervalos: Dict[int, List[Tuple[date, date, Tuple[str, int]]]] = {id: [] for id in propiedad_ids}
+            self._reservas = {}
+            for id, propiedad_id, fecha_ingreso, fecha_salida in filas:
+                intervalos.setdefault(propiedad_id, []).append((fecha_ingreso, fecha_salida, ("db", id)))
+                self._reservas[id] = (propiedad_id, fecha_ingreso)
+
+            self._propiedades = {}
+            for propiedad_id, lista in intervalos.items():
+                self._propiedades[propiedad_id] = OcupacionPropiedad()
+                self._propiedades[propiedad_id].cargar(lista)
+            self._cargado_en = time.monotonic()
+
+    def asegurar(self, db: Session):
+        with self._lock:
+            revision = revision_actual(db)
+            if not self._vigente(revision):
+                self.cargar(db, revision)
+
+    def _avanzar(self, revision: Optional[int]):
+        # Una escritura propia con la revisión siguiente a la cargada es la única confirmada desde
+        # la carga: reflejarla basta. Con cualquier otra la próxima consulta recarga.
+        if revision is not None and self._revision is not None and revision == self._revision + 1:
+            self._revision = revision
+
+    def invalidar(self):
+        """
+        Fuerza la recarga en la próxima consulta (escrituras masivas).
+        """
+        with self._lock:
+            self._cargado_en = None
+
+    def agregar_propiedad(self, propiedad_id: int, revision: Optional[int] = None):
+        with self._lock:
+            self._propiedades.setdefault(propiedad_id, OcupacionPropiedad())
+            self._avanzar(revision)
+
+    def quitar_propiedad(self, propiedad_id: int, revision: Optional[int] = None):
+        with self._lock:
+            self._propiedades.pop(propiedad_id, None)
+            self._reservas = {
+                id: valor for id, valor in self._reservas.items() if valor[0] != propiedad_id
+            }
+            self._avanzar(revision)
+
+    def quitar(self, reserva_id: int, revision: Optional[int] = None):
+        with self._lock:
+            anterior = self._reservas.pop(reserva_id, None)
+            if anterior is not None:
+                propiedad_id, fecha_ingreso = anterior
+                ocupacion = self._propiedades.get(propiedad_id)
+                if ocupacion is not None:
+                    ocupacion.quitar(fecha_ingreso, ("db", reserva_id))
+            self._avanzar(revision)
+
+    def registrar(self, reserva: Reserva):
+        """
+        Refleja el estado confirmado de una reserva (alta, cambio de fechas/propiedad o cancelación).
+        """
+        with self._lock:
+            self.quitar(reserva.id, reserva.revision)
+            if reserva.propiedad_id is None or reserva.estado == EstadoReservaEnum.CANCELADA:
+                return
+            ocupacion = self._propiedades.setdefault(reserva.propiedad_id, OcupacionPropiedad())
+            ocupacion.agregar(reserva.fecha_ingreso, reserva.fecha_salida, ("db", reserva.id))
+            self._reservas[reserva.id] = (reserva.propiedad_id, reserva.fecha_ingreso)
+
+    def disponibilidad(
+        self,
+        desde: date,
+        hasta: date,
+        noches: int = 1,
+        propiedad_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, Tuple[bool, List[Tuple[date, date]]]]:
+        """
+        Para cada propiedad: si está libre durante todo [desde, hasta) y sus huecos de al menos
+        `noches` noches dentro del período.
+        """
+        with self._lock:
+            ids = sorted(self._propiedades) if propiedad_ids is None else propiedad_ids
+            return {
+                id: (
+                    self._propiedades[id].superposicion(desde, hasta) is None,
+                    self._propiedades[id].huecos(desde, hasta, noches)
+                )
+                for id in ids if id in self._propiedades
+            }
+
+indice_ocupacion = IndiceOcupacion()
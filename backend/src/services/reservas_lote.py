@@ -0,0 +1,281 @@
+"""
+Alta/actualización masiva de reservas con resolución de conflictos dentro del lote.
+
+Cada propiedad se valida una sola vez, las reservas existentes se leen en una única consulta
+y los conflictos se detectan sobre una lista ordenada de intervalos [fecha_ingreso, fecha_salida)
+por propiedad. Las inserciones y actualizaciones se emiten en bloque; confirmar la transacción
+queda a cargo de quien llama.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, update
+from sqlalchemy.orm import Session
+
+from ..models import Reserva, PlataformaEnum, EstadoReservaEnum
+from ..schemas import ReservaCreate, ReservaLoteResultado, ReservaLoteRespuesta
+from .cache import listar_propiedades
+from .ocupacion import OcupacionPropiedad
+from .resumen_mensual import registrar_reservas
+
+CREADA = "creada"
+ACTUALIZADA = "actualizada"
+CONFLICTO = "conflicto"
+INVALIDA = "invalida"
+
+
+def _errores_validacion(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in detalle['loc'])}: {detalle['msg']}"
+        for detalle in error.errors()
+    )
+
+
+def _resultado_conflicto(indice: int, origen: Tuple[str, int], detalle: str) -> ReservaLoteResultado:
+    tipo, valor = origen
+    return ReservaLoteResultado(
+        indice=indice,
+        resultado=CONFLICTO,
+        reserva_id=valor if tipo == "db" else None,
+        conflicto_con_indice=valor if tipo == "lote" else None,
+        detalle=detalle
+    )
+
+
+def _detalle_superposicion(origen: Tuple[str, int]) -> str:
+    if origen[0] == "db":
+        return "Ya existe una reserva para la propiedad en el período solicitado"
+    return "Se superpone con otra reserva del lote"
+
+
+def procesar_lote(
+    db: Session,
+    items: Sequence[Any],
+    actualizar: bool = False,
+    reserva_ids: Optional[Sequence[Optional[int]]] = None
+) -> ReservaLoteRespuesta:
+    """
+    Valida e inserta un lote de reservas. Con actualizar=True, un ítem con el mismo id externo
+    (plataforma e id_externo) o con la misma propiedad y las mismas fechas que una reserva
+    existente la actualiza en lugar de generar conflicto. Dentro del lote tiene prioridad el
+    ítem que aparece primero.
+
+    reserva_ids (paralelo a items) es para lotes ya conciliados por quien llama: indica qué
+    reserva actualiza cada ítem, aunque otra tenga el mismo id externo o la misma clave, y los
+    ítems sin reserva (None) son altas que no se buscan por clave.
+    """
+    objetivos = {
+        indice: reserva_id for indice, reserva_id in enumerate(reserva_ids or ()) if reserva_id is not None
+    }
+    resultados: Dict[int, ReservaLoteResultado] = {}
+    validos: List[Tuple[int, ReservaCreate]] = []
+
+    for indice, item in enumerate(items):
+        try:
+            reserva = item if isinstance(item, ReservaCreate) else ReservaCreate(**item)
+        except ValidationError as e:
+            resultados[indice] = ReservaLoteResultado(indice=indice, resultado=INVALIDA, detalle=_errores_validacion(e))
+            continue
+        except TypeError:
+            resultados[indice] = ReservaLoteResultado(indice=indice, resultado=INVALIDA, detalle="Formato de reserva inválido")
+            continue
+
+        if reserva.fecha_salida <= reserva.fecha_ingreso:
+            resultados[indice] = ReservaLoteResultado(
+                indice=indice, resultado=INVALIDA,
+                detalle="La fecha de salida debe ser posterior a la fecha de ingreso"
+            )
+            continue
+        validos.append((indice, reserva))
+
+    # Validar cada propiedad una sola vez, contra el cache de propiedades
+    existentes_propiedad = {propiedad.id for propiedad in listar_propiedades(db)} if validos else set()
+
+    por_propiedad: Dict[int, List[Tuple[int, ReservaCreate]]] = {}
+    for indice, reserva in validos:
+        if reserva.propiedad_id not in existentes_propiedad:
+            resultados[indice] = ReservaLoteResultado(indice=indice, resultado=INVALIDA, detalle="Propiedad no encontrada")
+            continue
+        por_propiedad.setdefault(reserva.propiedad_id, []).append((indice, reserva))
+
+    # Reservas ya vinculadas a los ids externos del lote (sincronización con canales) y las
+    # indicadas en reserva_ids, en una consulta
+    externas_existentes: Dict[Tuple[PlataformaEnum, str], Any] = {}
+    por_id: Dict[int, Any] = {}
+    ids_externos = {
+        reserva.id_externo for pendientes in por_propiedad.values() for _, reserva in pendientes if reserva.id_externo
+    }
+    ids_objetivo = {
+        objetivos[indice] for pendientes in por_propiedad.values() for indice, _ in pendientes if indice in objetivos
+    }
+    if ids_externos or ids_objetivo:
+        for fila in db.query(
+            Reserva.id, Reserva.propiedad_id, Reserva.fecha_ingreso, Reserva.fecha_salida,
+            Reserva.plataforma, Reserva.id_externo
+        ).filter(or_(Reserva.id_externo.in_(ids_externos), Reserva.id.in_(ids_objetivo))).all():
+            por_id[fila.id] = fila
+            if fila.id_externo in ids_externos:
+                externas_existentes[(fila.plataforma, fila.id_externo)] = fila
+
+    # Reservas existentes de esas propiedades dentro del período cubierto por el lote, en una consulta
+    ocupaciones: Dict[int, OcupacionPropiedad] = {}
+    claves_existentes: Dict[Tuple[int, date, date], Tuple[int, Optional[str], EstadoReservaEnum]] = {}
+    if por_propiedad:
+        desde = min(reserva.fecha_ingreso for pendientes in por_propiedad.values() for _, reserva in pendientes)
+        hasta = max(reserva.fecha_salida for pendientes in por_propiedad.values() for _, reserva in pendientes)
+        filas = db.query(
+            Reserva.id, Reserva.propiedad_id, Reserva.fecha_ingreso, Reserva.fecha_salida, Reserva.estado,
+            Reserva.id_externo
+        ).filter(
+            Reserva.propiedad_id.in_(por_propiedad.keys()),
+            Reserva.fecha_salida > desde,
+            Reserva.fecha_ingreso < hasta
+        ).all()
+
+        intervalos: Dict[int, List[Tuple[date, date, Tuple[str, int]]]] = {}
+        for id, propiedad_id, fecha_ingreso, fecha_salida, estado, id_externo in filas:
+            # Con varias reservas para la misma clave, se actualiza la activa (hay a lo sumo una)
+            clave = (propiedad_id, fecha_ingreso, fecha_salida)
+            if clave not in claves_existentes or claves_existentes[clave][2] == EstadoReservaEnum.CANCELADA:
+                claves_existentes[clave] = (id, id_externo, estado)
+            if estado != EstadoReservaEnum.CANCELADA:
+                intervalos.setdefault(propiedad_id, []).append((fecha_ingreso, fecha_salida, ("db", id)))
+
+        for propiedad_id in por_propiedad:
+            ocupaciones[propiedad_id] = OcupacionPropiedad()
+            ocupaciones[propiedad_id].cargar(intervalos.get(propiedad_id, []))
+
+    nuevas: List[Tuple[int, ReservaCreate]] = []
+    actualizaciones: List[Tuple[int, int, dict]] = []
+    actualizadas_por: Dict[int, int] = {}
+    externas_en_lote: Dict[Tuple[PlataformaEnum, str], int] = {}
+    # Fechas de ingreso anteriores y nuevas de las actualizaciones que cambian de mes en el resumen
+    ingresos_quitados: List[date] = []
+    ingresos_agregados: List[date] = []
+
+    for propiedad_id, pendientes in por_propiedad.items():
+        ocupacion = ocupaciones[propiedad_id]
+        for indice, reserva in pendientes:
+            clave = (propiedad_id, reserva.fecha_ingreso, reserva.fecha_salida)
+            externa = (reserva.plataforma, reserva.id_externo) if reserva.id_externo else None
+            if externa in externas_en_lote:
+                resultados[indice] = _resultado_conflicto(
+                    indice, ("lote", externas_en_lote[externa]), "El id externo se repite en el lote"
+                )
+                continue
+
+            if indice in objetivos:
+                existente = por_id.get(objetivos[indice])
+                if existente is None:
+                    resultados[indice] = ReservaLoteResultado(
+                        indice=indice, resultado=INVALIDA, detalle="Reserva no encontrada"
+                    )
+                    continue
+            else:
+                existente = externas_existentes.get(externa) if externa else None
+            if existente is not None:
+                # Misma reserva del canal (o la indicada): se actualiza aunque haya cambiado de fechas
+                if not actualizar:
+                    resultados[indice] = _resultado_conflicto(
+                        indice, ("db", existente.id), "Ya existe una reserva con ese id externo"
+                    )
+                    continue
+                if existente.id in actualizadas_por:
+                    resultados[indice] = _resultado_conflicto(
+                        indice, ("lote", actualizadas_por[existente.id]),
+                        "La reserva ya fue actualizada por otro ítem del lote"
+                    )
+                    continue
+
+                anterior = ocupaciones.get(existente.propiedad_id)
+                liberada = anterior is not None and anterior.quitar(existente.fecha_ingreso, ("db", existente.id))
+                if reserva.estado != EstadoReservaEnum.CANCELADA:
+                    origen = ocupacion.superposicion(reserva.fecha_ingreso, reserva.fecha_salida)
+                    if origen is not None:
+                        if liberada:
+                            anterior.agregar(existente.fecha_ingreso, existente.fecha_salida, ("db", existente.id))
+                        resultados[indice] = _resultado_conflicto(indice, origen, _detalle_superposicion(origen))
+                        continue
+                    ocupacion.agregar(reserva.fecha_ingreso, reserva.fecha_salida, ("lote", indice))
+
+                if existente.fecha_ingreso != reserva.fecha_ingreso:
+                    ingresos_quitados.append(existente.fecha_ingreso)
+                    ingresos_agregados.append(reserva.fecha_ingreso)
+                actualizadas_por[existente.id] = indice
+                if externa:
+                    externas_en_lote[externa] = indice
+                actualizaciones.append((indice, existente.id, reserva.dict()))
+                continue
+
+            if actualizar and reserva_ids is None and clave in claves_existentes:
+                reserva_id, id_externo, estado_anterior = claves_existentes[clave]
+                if reserva_id in actualizadas_por:
+                    resultados[indice] = _resultado_conflicto(
+                        indice, ("lote", actualizadas_por[reserva_id]),
+                        "La reserva ya fue actualizada por otro ítem del lote"
+                    )
+                    continue
+                cancelada_antes = estado_anterior == EstadoReservaEnum.CANCELADA
+                cancelada_despues = reserva.estado == EstadoReservaEnum.CANCELADA
+                if cancelada_antes and not cancelada_despues:
+                    # Reactivar una cancelada vuelve a ocupar sus fechas: mismo control que un alta
+                    origen = ocupacion.superposicion(reserva.fecha_ingreso, reserva.fecha_salida)
+                    if origen is not None:
+                        resultados[indice] = _resultado_conflicto(indice, origen, _detalle_superposicion(origen))
+                        continue
+                    ocupacion.agregar(reserva.fecha_ingreso, reserva.fecha_salida, ("db", reserva_id))
+                elif cancelada_despues and not cancelada_antes:
+                    ocupacion.quitar(reserva.fecha_ingreso, ("db", reserva_id))
+                actualizadas_por[reserva_id] = indice
+                if externa:
+                    externas_en_lote[externa] = indice
+                actualizaciones.append((indice, reserva_id, {**reserva.dict(), "id_externo": reserva.id_externo or id_externo}))
+                continue
+
+            if externa:
+                externas_en_lote[externa] = indice
+
+            # Las reservas canceladas no ocupan la propiedad
+            if reserva.estado == EstadoReservaEnum.CANCELADA:
+                nuevas.append((indice, reserva))
+                continue
+
+            origen = ocupacion.superposicion(reserva.fecha_ingreso, reserva.fecha_salida)
+            if origen is not None:
+                if externa:
+                    del externas_en_lote[externa]
+                resultados[indice] = _resultado_conflicto(indice, origen, _detalle_superposicion(origen))
+                continue
+
+            ocupacion.agregar(reserva.fecha_ingreso, reserva.fecha_salida, ("lote", indice))
+            nuevas.append((indice, reserva))
+
+    # Escritura en bloque dentro de la transacción de quien llama
+    if nuevas:
+        ids = db.scalars(
+            insert(Reserva).returning(Reserva.id, sort_by_parameter_order=True),
+            [reserva.dict() for _, reserva in nuevas]
+        ).all()
+        for (indice, _), reserva_id in zip(nuevas, ids):
+            resultados[indice] = ReservaLoteResultado(indice=indice, resultado=CREADA, reserva_id=reserva_id)
+        registrar_reservas(db, (reserva.fecha_ingreso for _, reserva in nuevas))
+
+    if actualizaciones:
+        db.execute(
+            update(Reserva),
+            [{"id": reserva_id, **valores} for _, reserva_id, valores in actualizaciones]
+        )
+        for indice, reserva_id, _ in actualizaciones:
+            resultados[indice] = ReservaLoteResultado(indice=indice, resultado=ACTUALIZADA, reserva_id=reserva_id)
+        registrar_reservas(db, ingresos_quitados, -1)
+        registrar_reservas(db, ingresos_agregados)
+
+    ordenados = [resultados[indice] for indice in range(len(items))]
+    return ReservaLoteRespuesta(
+        creadas=sum(1 for r in ordenados if r.resultado == CREADA),
+        actualizadas=sum(1 for r in ordenados if r.resultado == ACTUALIZADA),
+        conflictos=sum(1 for r in ordenados if r.resultado == CONFLICTO),
+        invalidas=sum(1 for r in ordenados if r.resultado == INVALIDA),
+        resultados=ordenados
+    )
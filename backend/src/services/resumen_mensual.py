@@ -0,0 +1,152 @@
+"""
+Mantenimiento del acumulado mensual de caja y reservas (tabla resumen_mensual_caja).
+
+Los endpoints aplican deltas dentro de la misma transacción que la escritura original,
+de modo que el resumen mensual se lee con una sola consulta. Los montos en dólares se pasan
+a pesos con el tipo de cambio del movimiento o, si no lo tiene, con el vigente en su fecha,
+igual que los demás reportes (services.tipos_cambio). Para reconstruirlo desde
+el historial completo (también lo hace una vez por día la tarea programada de services.tareas):
+
+    python -m src.services.resumen_mensual
+"""
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from ..models import MovimientoCaja, Reserva, ResumenMensualCaja, TipoMovimientoEnum, MonedaEnum
+from .cache import tipo_cambio_vigente
+from .tipos_cambio import monto_en_moneda, tasa_movimiento
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(ResumenMensualCaja)
+
+
+def _aplicar_deltas(db: Session, deltas: List[dict]):
+    # Upsert atómico: suma los deltas sobre las filas de cada mes sin leerlas antes
+    stmt = _insert(db).values(deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResumenMensualCaja.anio, ResumenMensualCaja.mes],
+        set_={
+            "total_ingresos_pesos": ResumenMensualCaja.total_ingresos_pesos + stmt.excluded.total_ingresos_pesos,
+            "total_egresos_pesos": ResumenMensualCaja.total_egresos_pesos + stmt.excluded.total_egresos_pesos,
+            "reservas_total": ResumenMensualCaja.reservas_total + stmt.excluded.reservas_total,
+        }
+    )
+    db.execute(stmt)
+
+
+def _delta(fecha: date, ingresos: float = 0.0, egresos: float = 0.0, reservas: int = 0) -> dict:
+    return {
+        "anio": fecha.year,
+        "mes": fecha.month,
+        "total_ingresos_pesos": ingresos,
+        "total_egresos_pesos": egresos,
+        "reservas_total": reservas,
+    }
+
+
+def _aplicar_delta(db: Session, fecha: date, **valores):
+    _aplicar_deltas(db, [_delta(fecha, **valores)])
+
+
+def monto_en_pesos(monto: float, moneda: MonedaEnum, tipo_cambio) -> float:
+    if moneda == MonedaEnum.DOLARES:
+        return monto * (tipo_cambio or 0.0)
+    return monto
+
+
+def registrar_movimiento(db: Session, movimiento: MovimientoCaja, signo: int = 1):
+    """
+    Suma (signo=1) o resta (signo=-1) un movimiento del acumulado de su mes.
+    """
+    tipo_cambio = movimiento.tipo_cambio
+    if movimiento.moneda == MonedaEnum.DOLARES and tipo_cambio is None:
+        tipo_cambio = tipo_cambio_vigente(db, movimiento.fecha)
+    monto = signo * monto_en_pesos(movimiento.monto, movimiento.moneda, tipo_cambio)
+    if movimiento.tipo == TipoMovimientoEnum.INGRESO:
+        _aplicar_delta(db, movimiento.fecha, ingresos=monto)
+    else:
+        _aplicar_delta(db, movimiento.fecha, egresos=monto)
+
+
+def registrar_reserva(db: Session, reserva: Reserva, signo: int = 1):
+    """
+    Suma o resta una reserva del conteo del mes de su fecha de ingreso.
+    """
+    _aplicar_delta(db, reserva.fecha_ingreso, reservas=signo)
+
+
+def registrar_reservas(db: Session, fechas_ingreso: Iterable[date], signo: int = 1):
+    """
+    Versión por lotes de registrar_reserva: un único delta por mes afectado.
+    """
+    por_mes = Counter((fecha.year, fecha.month) for fecha in fechas_ingreso)
+    if por_mes:
+        _aplicar_deltas(db, [
+            _delta(date(anio, mes, 1), reservas=signo * total)
+            for (anio, mes), total in sorted(por_mes.items())
+        ])
+
+
+def reconstruir_resumen_mensual(db: Session) -> int:
+    """
+    Recalcula el acumulado completo a partir del historial, sin confirmar la transacción.
+    Devuelve la cantidad de meses generados.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Los deltas de otras transacciones esperan a que termine: si se aplicaran sobre las filas
+        # que se están reemplazando, se perderían. Los que ya estaban en curso terminan antes.
+        db.execute(text("LOCK TABLE resumen_mensual_caja IN SHARE ROW EXCLUSIVE MODE"))
+
+    anio_mov = func.extract("year", MovimientoCaja.fecha)
+    mes_mov = func.extract("month", MovimientoCaja.fecha)
+    movimientos = db.query(
+        anio_mov, mes_mov, MovimientoCaja.tipo, func.sum(monto_en_moneda(MonedaEnum.PESOS, tasa_movimiento()))
+    ).group_by(anio_mov, mes_mov, MovimientoCaja.tipo).all()
+
+    anio_res = func.extract("year", Reserva.fecha_ingreso)
+    mes_res = func.extract("month", Reserva.fecha_ingreso)
+    reservas = db.query(anio_res, mes_res, func.count(Reserva.id)).group_by(anio_res, mes_res).all()
+
+    meses: Dict[Tuple[int, int], dict] = {}
+
+    def fila(anio, mes) -> dict:
+        clave = (int(anio), int(mes))
+        if clave not in meses:
+            meses[clave] = {
+                "anio": clave[0], "mes": clave[1],
+                "total_ingresos_pesos": 0.0, "total_egresos_pesos": 0.0, "reservas_total": 0,
+            }
+        return meses[clave]
+
+    for anio, mes, tipo, monto in movimientos:
+        campo = "total_ingresos_pesos" if tipo == TipoMovimientoEnum.INGRESO else "total_egresos_pesos"
+        fila(anio, mes)[campo] += monto or 0.0
+
+    for anio, mes, total in reservas:
+        fila(anio, mes)["reservas_total"] += total
+
+    db.query(ResumenMensualCaja).delete(synchronize_session=False)
+    if meses:
+        db.execute(ResumenMensualCaja.__table__.insert(), list(meses.values()))
+    return len(meses)
+
+
+if __name__ == "__main__":
+    from ..db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        total = reconstruir_resumen_mensual(db)
+        db.commit()
+        print(f"Resumen mensual reconstruido: {total} meses")
+    finally:
+        db.close()
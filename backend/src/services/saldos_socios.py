@@ -0,0 +1,241 @@
+"""
+Libro de socios: saldo acumulado (ingresos - egresos) de cada socio y moneda a cualquier fecha.
+
+El saldo al cierre de cada mes ya terminado se guarda como punto de control (saldos_socio). El
+saldo a una fecha es el del último punto de control anterior más los movimientos posteriores,
+así que nunca se vuelve a sumar el historial completo. Los puntos de control que faltan se
+generan al consultar, a partir del último existente. Crear, editar o borrar un movimiento
+borra los puntos de control desde su mes en adelante (invalidar_saldos), en la misma
+transacción; los anteriores siguen valiendo.
+
+En Postgres, generar puntos de control y borrarlos se ordenan con un advisory lock de
+transacción: las escrituras de movimientos lo toman compartido (no se esperan entre sí) y la
+generación exclusivo. Así la generación espera a que confirmen los movimientos en curso y
+vuelve a leer, y un movimiento retroactivo que llega después espera a que la generación
+confirme para borrar lo generado. Sin el lock, una consulta podía guardar saldos calculados
+sin un movimiento que ya los había invalidado.
+
+Los saldos se llevan en la moneda de cada movimiento, sin convertir.
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..models import (
+    CategoriaMovimiento, MovimientoCaja, SaldoSocioMensual, MonedaEnum, SocioEnum, TipoMovimientoEnum,
+)
+
+Clave = Tuple[SocioEnum, MonedaEnum]
+Mes = Tuple[int, int]
+
+# Claves del advisory lock que ordena la generación de puntos de control con las invalidaciones
+LOCK_PUNTOS_DE_CONTROL = (0x5A1D05, 1)
+
+
+def _firmado():
+    return case(
+        (MovimientoCaja.tipo == TipoMovimientoEnum.INGRESO, MovimientoCaja.monto),
+        else_=-MovimientoCaja.monto
+    )
+
+
+def _saldos_en_cero() -> Dict[Clave, float]:
+    return {(socio, moneda): 0.0 for socio in SocioEnum for moneda in MonedaEnum}
+
+
+def _siguiente(mes: Mes) -> Mes:
+    return (mes[0] + 1, 1) if mes[1] == 12 else (mes[0], mes[1] + 1)
+
+
+def _cierre(mes: Mes) -> date:
+    anio, numero = _siguiente(mes)
+    return date(anio, numero, 1) - timedelta(days=1)
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(SaldoSocioMensual)
+
+
+def _bloquear(db: Session, compartido: bool) -> bool:
+    """
+    Toma el lock de los puntos de control hasta el fin de la transacción. Devuelve False si
+    la base no los soporta (SQLite ya serializa las escrituras).
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    funcion = func.pg_advisory_xact_lock_shared if compartido else func.pg_advisory_xact_lock
+    db.execute(select(funcion(*LOCK_PUNTOS_DE_CONTROL)))
+    return True
+
+
+def invalidar_saldos(db: Session, *fechas: date):
+    """
+    Borra los puntos de control desde el mes de la fecha más antigua. Para una edición se pasan
+    la fecha anterior y la nueva del movimiento.
+    """
+    fecha = min(fechas)
+    _bloquear(db, compartido=True)
+    db.query(SaldoSocioMensual).filter(
+        tuple_(SaldoSocioMensual.anio, SaldoSocioMensual.mes) >= tuple_(fecha.year, fecha.month)
+    ).delete(synchronize_session=False)
+
+
+def _ultimo_punto_de_control(db: Session, hasta: Mes) -> Optional[Mes]:
+    fila = db.query(SaldoSocioMensual.anio, SaldoSocioMensual.mes).filter(
+        tuple_(SaldoSocioMensual.anio, SaldoSocioMensual.mes) <= tuple_(*hasta)
+    ).order_by(SaldoSocioMensual.anio.desc(), SaldoSocioMensual.mes.desc()).first()
+    return (fila.anio, fila.mes) if fila else None
+
+
+def _saldos_del_punto(db: Session, mes: Mes) -> Dict[Clave, float]:
+    saldos = _saldos_en_cero()
+    for socio, moneda, saldo in db.query(
+        SaldoSocioMensual.socio, SaldoSocioMensual.moneda, SaldoSocioMensual.saldo
+    ).filter(SaldoSocioMensual.anio == mes[0], SaldoSocioMensual.mes == mes[1]):
+        saldos[(socio, moneda)] = saldo
+    return saldos
+
+
+def actualizar_puntos_de_control(db: Session, fecha: date) -> Optional[Mes]:
+    """
+    Genera los puntos de control que falten hasta el último mes terminado al que llega la fecha
+    (nunca el mes en curso) y devuelve ese mes, o None si todavía no hay movimientos. Solo recorre
+    los movimientos posteriores al último punto de control existente, con una consulta agrupada.
+    """
+    hoy = date.today()
+    objetivo = (fecha.year, fecha.month) if fecha == _cierre((fecha.year, fecha.month)) else (
+        (fecha.year - 1, 12) if fecha.month == 1 else (fecha.year, fecha.month - 1)
+    )
+    objetivo = min(objetivo, (hoy.year - 1, 12) if hoy.month == 1 else (hoy.year, hoy.month - 1))
+
+    base = _ultimo_punto_de_control(db, objetivo)
+    if base == objetivo:
+        return base
+    # Con el lock, los movimientos que estaban invalidando ya confirmaron: se vuelve a leer
+    if _bloquear(db, compartido=False):
+        base = _ultimo_punto_de_control(db, objetivo)
+        if base == objetivo:
+            return base
+
+    if base is None:
+        primera = db.query(func.min(MovimientoCaja.fecha)).scalar()
+        if primera is None or (primera.year, primera.month) > objetivo:
+            return None
+        saldos = _saldos_en_cero()
+        mes = (primera.year, primera.month)
+        filtro = [MovimientoCaja.fecha <= _cierre(objetivo)]
+    else:
+        saldos = _saldos_del_punto(db, base)
+        mes = _siguiente(base)
+        filtro = [MovimientoCaja.fecha > _cierre(base), MovimientoCaja.fecha <= _cierre(objetivo)]
+
+    anio = func.extract("year", MovimientoCaja.fecha)
+    numero = func.extract("month", MovimientoCaja.fecha)
+    por_mes: Dict[Mes, List[Tuple[Clave, float]]] = {}
+    for anio_mov, mes_mov, socio, moneda, total in db.query(
+        anio, numero, MovimientoCaja.socio, MovimientoCaja.moneda, func.sum(_firmado())
+    ).filter(*filtro).group_by(anio, numero, MovimientoCaja.socio, MovimientoCaja.moneda):
+        por_mes.setdefault((int(anio_mov), int(mes_mov)), []).append(((socio, moneda), total or 0.0))
+
+    filas = []
+    while mes <= objetivo:
+        for clave, total in por_mes.get(mes, ()):
+            saldos[clave] += total
+        filas.extend(
+            {"anio": mes[0], "mes": mes[1], "socio": socio, "moneda": moneda, "saldo": saldo}
+            for (socio, moneda), saldo in saldos.items()
+        )
+        mes = _siguiente(mes)
+
+    # Otro request pudo generar los mismos meses en paralelo: el resultado es idéntico
+    db.execute(_insert(db).on_conflict_do_nothing(), filas)
+    return objetivo
+
+
+def saldos_a_fecha(db: Session, fecha: date) -> Dict[Clave, float]:
+    """
+    Saldo de cada socio y moneda al final del día indicado.
+    """
+    punto = actualizar_puntos_de_control(db, fecha)
+    if punto is None:
+        saldos = _saldos_en_cero()
+        filtro = [MovimientoCaja.fecha <= fecha]
+    else:
+        saldos = _saldos_del_punto(db, punto)
+        filtro = [MovimientoCaja.fecha > _cierre(punto), MovimientoCaja.fecha <= fecha]
+
+    for socio, moneda, total in db.query(
+        MovimientoCaja.socio, MovimientoCaja.moneda, func.sum(_firmado())
+    ).filter(*filtro).group_by(MovimientoCaja.socio, MovimientoCaja.moneda):
+        saldos[(socio, moneda)] += total or 0.0
+    return saldos
+
+
+def libro_socios(
+    db: Session,
+    desde: date,
+    hasta: date,
+    socio: Optional[SocioEnum] = None,
+    moneda: Optional[MonedaEnum] = None
+) -> dict:
+    """
+    Movimientos del período con el saldo corrido de su socio y moneda. El acumulado dentro del
+    período lo calcula la base con una función de ventana; se le suma el saldo inicial.
+    """
+    iniciales = saldos_a_fecha(db, desde - timedelta(days=1))
+
+    acumulado = func.sum(_firmado()).over(
+        partition_by=(MovimientoCaja.socio, MovimientoCaja.moneda),
+        order_by=(MovimientoCaja.fecha, MovimientoCaja.id)
+    )
+    consulta = select(
+        MovimientoCaja.id, MovimientoCaja.fecha, MovimientoCaja.socio, MovimientoCaja.moneda,
+        MovimientoCaja.tipo, CategoriaMovimiento.nombre.label("categoria"), MovimientoCaja.descripcion,
+        MovimientoCaja.monto, acumulado.label("acumulado"),
+    ).join(
+        CategoriaMovimiento, CategoriaMovimiento.id == MovimientoCaja.categoria_id
+    ).where(
+        MovimientoCaja.fecha >= desde, MovimientoCaja.fecha <= hasta
+    ).order_by(MovimientoCaja.fecha, MovimientoCaja.id)
+    if socio:
+        consulta = consulta.where(MovimientoCaja.socio == socio)
+    if moneda:
+        consulta = consulta.where(MovimientoCaja.moneda == moneda)
+
+    finales = dict(iniciales)
+    movimientos = []
+    for fila in db.execute(consulta):
+        clave = (fila.socio, fila.moneda)
+        finales[clave] = iniciales[clave] + fila.acumulado
+        movimientos.append({
+            "id": fila.id,
+            "fecha": fila.fecha,
+            "socio": fila.socio,
+            "moneda": fila.moneda,
+            "tipo": fila.tipo,
+            "categoria": fila.categoria,
+            "descripcion": fila.descripcion,
+            "monto": fila.monto,
+            "saldo": finales[clave],
+        })
+
+    def listar(saldos: Dict[Clave, float]) -> List[dict]:
+        return [
+            {"socio": clave[0], "moneda": clave[1], "saldo": saldo}
+            for clave, saldo in saldos.items()
+            if (socio is None or clave[0] == socio) and (moneda is None or clave[1] == moneda)
+        ]
+
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "saldos_iniciales": listar(iniciales),
+        "movimientos": movimientos,
+        "saldos_finales": listar(finales),
+    }
@@ -0,0 +1,69 @@
+"""
+Detección de reservas superpuestas para una misma propiedad.
+
+En Postgres la regla la garantiza la restricción de exclusión reservas_sin_superposicion
+(índice GiST sobre daterange), por lo que basta con traducir su violación. En otros motores
+(por ejemplo SQLite en desarrollo) se mantiene la verificación previa por consulta.
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.reserva import Reserva, EstadoReservaEnum, RESERVA_SIN_SUPERPOSICION
+
+# SQLSTATE de Postgres para exclusion_violation
+EXCLUSION_VIOLATION = "23P01"
+
+
+def restriccion_en_base(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def rango_reserva(fecha_ingreso, fecha_salida):
+    return func.daterange(fecha_ingreso, fecha_salida, literal_column("'[)'"))
+
+
+def ocupa_propiedad():
+    # Las reservas canceladas no ocupan la propiedad (mismo criterio que la restricción)
+    return Reserva.estado.is_distinct_from(EstadoReservaEnum.CANCELADA)
+
+
+def filtro_superposicion(db: Session, fecha_ingreso: date, fecha_salida: date):
+    """
+    Condición de superposición con [fecha_ingreso, fecha_salida). En Postgres usa el operador
+    && para que la búsqueda la resuelva el índice GiST de la restricción.
+    """
+    if restriccion_en_base(db):
+        return rango_reserva(Reserva.fecha_ingreso, Reserva.fecha_salida).op("&&")(
+            rango_reserva(fecha_ingreso, fecha_salida)
+        )
+    return (Reserva.fecha_salida > fecha_ingreso) & (Reserva.fecha_ingreso < fecha_salida)
+
+
+def hay_superposicion(
+    db: Session,
+    propiedad_id: int,
+    fecha_ingreso: date,
+    fecha_salida: date,
+    excluir_id: Optional[int] = None
+) -> bool:
+    query = db.query(Reserva.id).filter(
+        Reserva.propiedad_id == propiedad_id,
+        ocupa_propiedad(),
+        filtro_superposicion(db, fecha_ingreso, fecha_salida)
+    )
+    if excluir_id is not None:
+        query = query.filter(Reserva.id != excluir_id)
+    return db.query(query.exists()).scalar()
+
+
+def es_superposicion(error: IntegrityError) -> bool:
+    """
+    Indica si el IntegrityError proviene de la restricción de exclusión de reservas.
+    """
+    original = getattr(error, "orig", None)
+    codigo = getattr(original, "pgcode", None) or getattr(original, "sqlstate", None)
+    return codigo == EXCLUSION_VIOLATION or RESERVA_SIN_SUPERPOSICION in str(original)
@@ -0,0 +1,199 @@
+"""
+Tareas programadas en segundo plano.
+
+Cada worker arranca un Planificador desde el lifespan de la aplicación, que ejecuta las tareas
+de TAREAS en un hilo aparte, cada una con su intervalo. Todas trabajan por conjuntos (un UPDATE
+o una consulta agrupada), así que el costo no depende de cuántas reservas cambian:
+
+- completar_reservas: las confirmadas cuya fecha de salida ya pasó quedan completadas.
+- cancelar_pendientes: las pendientes cuyo ingreso pasó hace más de RESERVAS_PENDIENTES_DIAS_GRACIA
+  días se cancelan.
+- puntos_de_control_socios: genera los saldos de cierre de los meses terminados (services.saldos_socios).
+- reconstruir_resumen: recalcula resumen_mensual_caja desde el historial (services.resumen_mensual).
+
+Con varios workers o réplicas, cada ejecución la hace uno solo. En Postgres la tarea toma un
+advisory lock de transacción y, si lo tiene otro worker, se omite; además no se ejecuta si la
+última ejecución registrada en ejecuciones_tarea es más reciente que su intervalo. El trabajo y
+su registro se confirman en la misma transacción, que es la que libera el lock.
+"""
+import asyncio
+import logging
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from ..api.metricas import duracion_tarea, ejecuciones_tarea, filas_tarea
+from ..core.config import settings
+from ..db.database import SessionLocal
+from ..models import EjecucionTarea, Reserva, SaldoSocioMensual, EstadoReservaEnum
+from .ocupacion import indice_ocupacion
+from .resumen_mensual import reconstruir_resumen_mensual
+from .saldos_socios import actualizar_puntos_de_control
+
+logger = logging.getLogger(__name__)
+
+# Primera clave de los advisory locks de las tareas; la segunda sale del nombre de cada una
+ESPACIO_LOCKS = 0x7A5EA5
+
+
+def completar_reservas(db: Session, hoy: date) -> int:
+    resultado = db.execute(
+        update(Reserva).where(
+            Reserva.estado == EstadoReservaEnum.CONFIRMADA,
+            Reserva.fecha_salida < hoy
+        ).values(estado=EstadoReservaEnum.COMPLETADA).execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount
+
+
+def cancelar_pendientes(db: Session, hoy: date) -> int:
+    limite = hoy - timedelta(days=settings.RESERVAS_PENDIENTES_DIAS_GRACIA)
+    resultado = db.execute(
+        update(Reserva).where(
+            Reserva.estado == EstadoReservaEnum.PENDIENTE,
+            Reserva.fecha_ingreso < limite
+        ).values(estado=EstadoReservaEnum.CANCELADA).execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount
+
+
+def puntos_de_control_socios(db: Session, hoy: date) -> int:
+    antes = db.query(func.count()).select_from(SaldoSocioMensual).scalar()
+    actualizar_puntos_de_control(db, hoy)
+    return db.query(func.count()).select_from(SaldoSocioMensual).scalar() - antes
+
+
+def reconstruir_resumen(db: Session, hoy: date) -> int:
+    return reconstruir_resumen_mensual(db)
+
+
+class Tarea(NamedTuple):
+    nombre: str
+    intervalo: float  # Segundos
+    funcion: Callable[[Session, date], int]  # Devuelve las filas modificadas
+    al_confirmar: Optional[Callable[[], None]] = None  # Se llama si la tarea modificó filas
+
+
+TAREAS: List[Tarea] = [
+    Tarea("completar_reservas", settings.TAREAS_INTERVALO_ESTADOS_SEGUNDOS, completar_reservas),
+    # Las canceladas liberan sus fechas en el índice de ocupación: este worker lo recarga ya y
+    # los demás al ver que avanzó la revisión de reservas (services.ocupacion)
+    Tarea(
+        "cancelar_pendientes", settings.TAREAS_INTERVALO_ESTADOS_SEGUNDOS, cancelar_pendientes,
+        indice_ocupacion.invalidar
+    ),
+    Tarea("puntos_de_control_socios", settings.TAREAS_INTERVALO_RESUMENES_SEGUNDOS, puntos_de_control_socios),
+    Tarea("reconstruir_resumen", settings.TAREAS_INTERVALO_RESUMENES_SEGUNDOS, reconstruir_resumen),
+]
+
+
+def _tomar_lock(db: Session, tarea: Tarea) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    clave = zlib.crc32(tarea.nombre.encode()) & 0x7FFFFFFF
+    return db.execute(select(func.pg_try_advisory_xact_lock(ESPACIO_LOCKS, clave))).scalar()
+
+
+def _ejecutada_hace_poco(db: Session, tarea: Tarea, inicio: datetime) -> bool:
+    ultima = db.query(func.max(EjecucionTarea.inicio)).filter(
+        EjecucionTarea.tarea == tarea.nombre,
+        EjecucionTarea.error.is_(None)
+    ).scalar()
+    return ultima is not None and ultima > inicio - timedelta(seconds=tarea.intervalo)
+
+
+def ejecutar_tarea(tarea: Tarea, sesion: Callable[[], Session] = SessionLocal) -> str:
+    """
+    Ejecuta la tarea si ningún otro worker la está ejecutando ni la ejecutó dentro de su
+    intervalo. Devuelve el resultado: "ok", "error" u "omitida".
+    """
+    inicio = datetime.now(timezone.utc).replace(tzinfo=None)  # La columna guarda UTC sin zona
+    reloj = time.perf_counter()
+    filas = None
+    error = None
+    with sesion() as db:
+        try:
+            if not _tomar_lock(db, tarea) or _ejecutada_hace_poco(db, tarea, inicio):
+                db.rollback()
+                ejecuciones_tarea.sumar((tarea.nombre, "omitida"))
+                return "omitida"
+            filas = tarea.funcion(db, date.today())
+            db.add(EjecucionTarea(
+                tarea=tarea.nombre, inicio=inicio, duracion_ms=(time.perf_counter() - reloj) * 1000, filas=filas
+            ))
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Falló la tarea programada %s", tarea.nombre)
+            error = f"{type(exc).__name__}: {exc}"[:500]
+
+    duracion = time.perf_counter() - reloj
+    duracion_tarea.observar((tarea.nombre,), duracion)
+    if error is not None:
+        ejecuciones_tarea.sumar((tarea.nombre, "error"))
+        # El registro del error va en otra transacción, la del trabajo ya se deshizo
+        with sesion() as db:
+            db.add(EjecucionTarea(tarea=tarea.nombre, inicio=inicio, duracion_ms=duracion * 1000, error=error))
+            db.commit()
+        return "error"
+
+    ejecuciones_tarea.sumar((tarea.nombre, "ok"))
+    filas_tarea.sumar((tarea.nombre,), filas or 0)
+    if filas and tarea.al_confirmar is not None:
+        tarea.al_confirmar()
+    return "ok"
+
+
+class Planificador:
+    """
+    Ejecuta las tareas en segundo plano dentro del event loop del worker. Cada tarea corre en
+    un hilo (asyncio.to_thread), una por vez, para no bloquear los requests.
+    """
+
+    def __init__(self, tareas: List[Tarea] = TAREAS, demora_inicial: float = settings.TAREAS_DEMORA_INICIAL_SEGUNDOS):
+        self.tareas = tareas
+        self.demora_inicial = demora_inicial
+        self._detener = asyncio.Event()
+        self._tarea: Optional[asyncio.Task] = None
+
+    def iniciar(self):
+        self._tarea = asyncio.create_task(self._ciclo())
+
+    async def detener(self):
+        # Espera a que termine la tarea en curso, si hay una
+        self._detener.set()
+        if self._tarea is not None:
+            await self._tarea
+
+    async def _esperar(self, segundos: float) -> bool:
+        """
+        Espera los segundos indicados; devuelve True si mientras tanto se pidió detener.
+        """
+        try:
+            await asyncio.wait_for(self._detener.wait(), timeout=max(segundos, 0))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _ciclo(self):
+        if await self._esperar(self.demora_inicial):
+            return
+        ahora = time.monotonic()
+        proximas = {tarea.nombre: ahora for tarea in self.tareas}
+        while not self._detener.is_set():
+            for tarea in self.tareas:
+                if self._detener.is_set():
+                    return
+                if proximas[tarea.nombre] <= time.monotonic():
+                    try:
+                        await asyncio.to_thread(ejecutar_tarea, tarea)
+                    except Exception:
+                        # Ni siquiera se pudo registrar el error (por ejemplo, la base no responde)
+                        logger.exception("No se pudo ejecutar la tarea programada %s", tarea.nombre)
+                    proximas[tarea.nombre] = time.monotonic() + tarea.intervalo
+            if await self._esperar(min(proximas.values()) - time.monotonic()):
+                return
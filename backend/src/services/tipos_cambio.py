@@ -0,0 +1,72 @@
+"""
+Tipos de cambio ARS/USD por fecha.
+
+Cada cotización (pesos por dólar) rige desde su fecha hasta la siguiente cargada. Hay dos
+formas de consultarlas:
+
+- TablaTiposCambio: la tabla completa en memoria, ordenada por fecha, para buscar la
+  cotización de una fecha con bisección (se guarda en services.cache).
+- tasa_movimiento() y monto_en_moneda(): expresiones SQL para llevar cualquier consulta de
+  movimientos a una sola moneda dentro de la misma consulta, sin trabajo por fila en Python.
+  La cotización vigente se busca por la clave primaria (fecha), con una búsqueda en el índice
+  por movimiento.
+
+La tasa de un movimiento es su propio tipo_cambio y, si no lo tiene, la vigente en su fecha.
+"""
+from bisect import bisect_right
+from datetime import date
+from typing import List, Optional, Sequence
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from ..models import MovimientoCaja, TipoCambio, MonedaEnum
+from ..schemas import TipoCambioInDB
+
+
+class TablaTiposCambio:
+    def __init__(self, filas: Sequence[TipoCambioInDB]):
+        self.filas: List[TipoCambioInDB] = list(filas)
+        self.fechas: List[date] = [fila.fecha for fila in self.filas]
+
+    def cotizacion(self, fecha: date) -> Optional[TipoCambioInDB]:
+        """
+        Cotización vigente en la fecha, o None si es anterior a la primera cargada.
+        """
+        posicion = bisect_right(self.fechas, fecha)
+        return self.filas[posicion - 1] if posicion else None
+
+    def vigente(self, fecha: date) -> Optional[float]:
+        cotizacion = self.cotizacion(fecha)
+        return cotizacion.valor if cotizacion is not None else None
+
+    def __len__(self) -> int:
+        return len(self.filas)
+
+
+def cargar_tabla(db: Session) -> TablaTiposCambio:
+    return TablaTiposCambio([
+        TipoCambioInDB.model_validate(fila) for fila in db.query(TipoCambio).order_by(TipoCambio.fecha).all()
+    ])
+
+
+def tasa_vigente(fecha):
+    """
+    Subconsulta con la cotización vigente en la fecha (la última cargada hasta ese día).
+    """
+    return select(TipoCambio.valor).where(
+        TipoCambio.fecha <= fecha
+    ).order_by(TipoCambio.fecha.desc()).limit(1).scalar_subquery()
+
+
+def tasa_movimiento():
+    return func.coalesce(MovimientoCaja.tipo_cambio, tasa_vigente(MovimientoCaja.fecha))
+
+
+def monto_en_moneda(moneda: MonedaEnum, tasa):
+    """
+    Monto del movimiento expresado en la moneda indicada; NULL si hace falta una tasa y no hay.
+    """
+    if moneda == MonedaEnum.PESOS:
+        return case((MovimientoCaja.moneda == MonedaEnum.DOLARES, MovimientoCaja.monto * tasa), else_=MovimientoCaja.monto)
+    return case((MovimientoCaja.moneda == MonedaEnum.DOLARES, MovimientoCaja.monto), else_=MovimientoCaja.monto / tasa)
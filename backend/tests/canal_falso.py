@@ -0,0 +1,89 @@
+"""
+Canal falso para los tests de services.canales: un servidor HTTP local que implementa el
+contrato de AIRBNB_API_URL / BOOKING_API_URL (modificadas_desde inclusivo, páginas con cursor)
+y permite programar respuestas de error por publicación.
+"""
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+def _fecha(valor: str) -> datetime:
+    fecha = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+    return fecha if fecha.tzinfo else fecha.replace(tzinfo=timezone.utc)
+
+
+class CanalFalso:
+    def __init__(self, tamano_pagina: int = 2):
+        self.tamano_pagina = tamano_pagina
+        self.publicaciones: Dict[str, List[dict]] = {}
+        # Respuestas de error que se devuelven antes que las normales: (status, cabeceras)
+        self.errores: Dict[str, List[Tuple[int, Dict[str, str]]]] = {}
+        # Publicaciones que responden siempre este status
+        self.caidas: Dict[str, int] = {}
+        # Pedidos recibidos: (publicación, parámetros)
+        self.pedidos: List[Tuple[str, Dict[str, str]]] = []
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), self._manejador())
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}"
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def pedidos_de(self, publicacion: str) -> List[Dict[str, str]]:
+        return [params for id_publicacion, params in self.pedidos if id_publicacion == publicacion]
+
+    def _responder(self, publicacion: str, params: Dict[str, str]) -> Tuple[int, Dict[str, str], Optional[dict]]:
+        self.pedidos.append((publicacion, params))
+        if publicacion in self.caidas:
+            return self.caidas[publicacion], {}, None
+        if self.errores.get(publicacion):
+            status, cabeceras = self.errores[publicacion].pop(0)
+            return status, cabeceras, None
+
+        reservas = self.publicaciones.get(publicacion, [])
+        if "modificadas_desde" in params:
+            desde = _fecha(params["modificadas_desde"])
+            reservas = [r for r in reservas if not isinstance(r, dict) or _fecha(r["modificada_en"]) >= desde]
+        inicio = int(params.get("cursor", 0))
+        fin = inicio + self.tamano_pagina
+        return 200, {}, {
+            "reservas": reservas[inicio:fin],
+            "siguiente": str(fin) if fin < len(reservas) else None,
+        }
+
+    def _manejador(self):
+        canal = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                partes = url.path.strip("/").split("/")
+                if len(partes) != 3 or partes[0] != "publicaciones" or partes[2] != "reservas":
+                    self.send_error(404)
+                    return
+                params = {clave: valores[0] for clave, valores in parse_qs(url.query).items()}
+                status, cabeceras, cuerpo = canal._responder(partes[1], params)
+                contenido = json.dumps(cuerpo or {}).encode()
+                self.send_response(status)
+                for clave, valor in cabeceras.items():
+                    self.send_header(clave, valor)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(contenido)))
+                self.end_headers()
+                self.wfile.write(contenido)
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
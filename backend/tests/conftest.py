@@ -0,0 +1,58 @@
+"""
+Fixtures comunes: cada test corre contra una base SQLite nueva en un directorio temporal, con
+la aplicación apuntando a ella (mismo mecanismo que benchmarks/suite.py) y las caches del
+proceso vacías.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import src.db.database as database
+from src.core.config import settings
+
+# Las tareas programadas modificarían los datos durante los tests
+settings.TAREAS_PROGRAMADAS = False
+
+import src.models  # noqa: E402,F401
+from src.services.cache import cache_categorias, cache_propiedades, cache_tipos_cambio  # noqa: E402
+from src.services.ocupacion import indice_ocupacion  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tests.sqlite'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    anteriores = (database.engine, database.async_engine)
+    database.engine, database.async_engine = engine, async_engine
+    database.SessionLocal.configure(bind=engine)
+    database.AsyncSessionLocal.configure(bind=async_engine)
+    database.Base.metadata.create_all(bind=engine)
+    for cache in (cache_propiedades, cache_categorias, cache_tipos_cambio):
+        cache.invalidar()
+    indice_ocupacion.invalidar()
+    yield engine
+    engine.dispose()
+    database.engine, database.async_engine = anteriores
+    database.SessionLocal.configure(bind=anteriores[0])
+    database.AsyncSessionLocal.configure(bind=anteriores[1])
+
+
+@pytest.fixture
+def db(engine):
+    with database.SessionLocal() as sesion:
+        yield sesion
+
+
+@pytest.fixture
+def cliente(engine):
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def propiedad(cliente):
+    return cliente.post("/api/v1/propiedades/", json={"nombre": "Casa Abby"}).json()
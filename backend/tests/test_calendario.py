@@ -0,0 +1,70 @@
+"""
+ETag del calendario de reservas (GET /reservas/calendario) y del feed iCalendar de cada propiedad.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from src.models import Reserva
+
+RANGO = {"desde": "2031-03-01", "hasta": "2031-03-31"}
+
+
+def _reserva(cliente, propiedad, ingreso, salida):
+    respuesta = cliente.post("/api/v1/reservas/", json={
+        "propiedad_id": propiedad["id"], "fecha_ingreso": ingreso, "fecha_salida": salida,
+        "nombre_huesped": "Ana", "plataforma": "Particular", "monto_total_usd": 100.0,
+    })
+    assert respuesta.status_code == 201, respuesta.text
+    return respuesta.json()
+
+
+def _etag(cliente):
+    respuesta = cliente.get("/api/v1/reservas/calendario", params=RANGO)
+    assert respuesta.status_code == 200
+    return respuesta.headers["etag"]
+
+
+def test_el_etag_cambia_con_cada_escritura_del_rango(cliente, db, propiedad):
+    primera = _reserva(cliente, propiedad, "2031-03-05", "2031-03-08")
+    _reserva(cliente, propiedad, "2031-03-10", "2031-03-15")
+    etag = _etag(cliente)
+    assert cliente.get(
+        "/api/v1/reservas/calendario", params=RANGO, headers={"If-None-Match": etag}
+    ).status_code == 304
+
+    # Cambio de fechas en el mismo segundo, sin altas ni bajas
+    db.execute(update(Reserva).where(Reserva.id == primera["id"]).values(
+        fecha_ingreso=date(2031, 3, 20), fecha_salida=date(2031, 3, 22)
+    ))
+    db.commit()
+    movida = _etag(cliente)
+    assert movida != etag
+
+    # Baja de una reserva compensada por un alta en el rango
+    cliente.delete(f"/api/v1/reservas/{primera['id']}")
+    _reserva(cliente, propiedad, "2031-03-25", "2031-03-28")
+    assert _etag(cliente) not in (etag, movida)
+
+
+def test_el_feed_ics_refleja_los_cambios_del_mismo_segundo(cliente, db, propiedad):
+    reserva = _reserva(cliente, propiedad, "2031-03-05", "2031-03-08")
+    url = f"/api/v1/propiedades/{propiedad['id']}/calendario.ics"
+    anterior = cliente.get(url)
+    assert "DTSTART;VALUE=DATE:20310305" in anterior.text
+
+    db.execute(update(Reserva).where(Reserva.id == reserva["id"]).values(
+        fecha_ingreso=date(2031, 3, 20), fecha_salida=date(2031, 3, 22)
+    ))
+    db.commit()
+    respuesta = cliente.get(url, headers={"If-None-Match": anterior.headers["etag"]})
+    assert respuesta.status_code == 200
+    assert "DTSTART;VALUE=DATE:20310320" in respuesta.text
+
+
+def test_el_dtstamp_del_feed_esta_en_utc(cliente, propiedad):
+    _reserva(cliente, propiedad, "2031-03-05", "2031-03-08")
+    texto = cliente.get(f"/api/v1/propiedades/{propiedad['id']}/calendario.ics").text
+    dtstamp = next(linea for linea in texto.splitlines() if linea.startswith("DTSTAMP:"))
+    publicado = datetime.strptime(dtstamp, "DTSTAMP:%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    assert abs(datetime.now(timezone.utc) - publicado) < timedelta(minutes=1)
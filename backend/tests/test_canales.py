@@ -0,0 +1,178 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from src.core.config import settings
+import src.services.canales as canales
+from src.models import Reserva, SincronizacionCanal, EstadoReservaEnum, PlataformaEnum
+from tests.canal_falso import CanalFalso
+
+
+@pytest.fixture
+def canal(monkeypatch):
+    canal = CanalFalso()
+    canal.iniciar()
+    monkeypatch.setattr(settings, "AIRBNB_API_URL", canal.url)
+    monkeypatch.setattr(settings, "AIRBNB_API_KEY", "clave-de-prueba")
+    monkeypatch.setattr(settings, "SYNC_BACKOFF_SEGUNDOS", 0.01)
+    monkeypatch.setattr(settings, "SYNC_ESPERA_MAXIMA_SEGUNDOS", 0.2)
+    yield canal
+    canal.detener()
+
+
+def _reserva_canal(id, ingreso, salida, modificada_en, estado="confirmed"):
+    return {
+        "id": id, "fecha_ingreso": ingreso, "fecha_salida": salida, "huesped": f"Huésped {id}",
+        "monto_total_usd": 300, "estado": estado, "modificada_en": modificada_en,
+    }
+
+
+def _vincular(cliente, nombre, publicacion):
+    propiedad = cliente.post("/api/v1/propiedades/", json={"nombre": nombre}).json()
+    respuesta = cliente.put("/api/v1/integraciones/canales", json={
+        "propiedad_id": propiedad["id"], "plataforma": "Airbnb", "id_externo": publicacion
+    })
+    assert respuesta.status_code == 200, respuesta.text
+    return propiedad
+
+
+def _sincronizar(cliente):
+    respuesta = cliente.post("/api/v1/integraciones/sync")
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()
+
+
+def _canal_de(db, propiedad):
+    db.expire_all()
+    return db.query(SincronizacionCanal).filter(SincronizacionCanal.propiedad_id == propiedad["id"]).one()
+
+
+def test_429_con_retry_after_espera_lo_pedido_hasta_el_tope(cliente, canal):
+    _vincular(cliente, "Casa", "pub-1")
+    canal.publicaciones["pub-1"] = [_reserva_canal("r1", "2025-05-01", "2025-05-04", "2025-04-01T10:00:00Z")]
+    # Pide una hora: la espera se acota a SYNC_ESPERA_MAXIMA_SEGUNDOS
+    canal.errores["pub-1"] = [(429, {"Retry-After": "3600"}), (503, {"Retry-After": "0"})]
+
+    inicio = time.perf_counter()
+    respuesta = _sincronizar(cliente)
+
+    assert time.perf_counter() - inicio < 5
+    assert (respuesta["creadas"], respuesta["errores"]) == (1, 0)
+    assert len(canal.pedidos_de("pub-1")) == 3
+
+
+def test_una_publicacion_que_falla_no_corta_las_demas(cliente, db, canal):
+    buena = _vincular(cliente, "Casa", "pub-ok")
+    caida = _vincular(cliente, "Cabaña", "pub-caida")
+    rota = _vincular(cliente, "Depto", "pub-rota")
+    canal.publicaciones["pub-ok"] = [
+        _reserva_canal("r1", "2025-05-01", "2025-05-04", "2025-04-01T10:00:00Z"),
+        _reserva_canal("r2", "2025-05-10", "2025-05-12", "2025-04-02T10:00:00Z"),
+    ]
+    canal.caidas["pub-caida"] = 500
+    # Una respuesta que no respeta el contrato falla al aplicarla, no al descargarla
+    canal.publicaciones["pub-rota"] = ["no es una reserva"]
+
+    respuesta = _sincronizar(cliente)
+
+    por_propiedad = {r["propiedad_id"]: r for r in respuesta["canales"]}
+    assert (respuesta["creadas"], respuesta["errores"]) == (2, 2)
+    assert por_propiedad[buena["id"]]["error"] is None
+    assert "500" in por_propiedad[caida["id"]]["error"]
+    assert por_propiedad[rota["id"]]["error"].startswith("Error al aplicar")
+    # Se rinde después de SYNC_REINTENTOS reintentos
+    assert len(canal.pedidos_de("pub-caida")) == settings.SYNC_REINTENTOS + 1
+    assert _canal_de(db, buena).ultima_modificacion == datetime(2025, 4, 2, 10)
+    assert _canal_de(db, caida).ultima_modificacion is None
+    assert _canal_de(db, caida).ultimo_error is not None
+
+
+def test_reanuda_desde_la_marca_de_agua_inclusive(cliente, db, canal):
+    propiedad = _vincular(cliente, "Casa", "pub-1")
+    canal.publicaciones["pub-1"] = [
+        _reserva_canal("r1", "2025-05-01", "2025-05-04", "2025-04-01T10:00:00Z"),
+        _reserva_canal("r2", "2025-05-10", "2025-05-12", "2025-04-02T10:00:00Z"),
+        _reserva_canal("r3", "2025-05-20", "2025-05-22", "2025-04-03T10:00:00Z"),
+    ]
+    assert _sincronizar(cliente)["creadas"] == 3
+    assert _canal_de(db, propiedad).ultima_modificacion == datetime(2025, 4, 3, 10)
+
+    # Una reserva nueva con la misma fecha de modificación que la marca y una cancelación posterior
+    canal.publicaciones["pub-1"] += [
+        _reserva_canal("r4", "2025-06-01", "2025-06-03", "2025-04-03T10:00:00Z"),
+        _reserva_canal("r1", "2025-05-01", "2025-05-04", "2025-04-05T08:00:00Z", estado="cancelled"),
+    ]
+    canal.pedidos.clear()
+    respuesta = _sincronizar(cliente)
+
+    assert canal.pedidos_de("pub-1")[0]["modificadas_desde"] == "2025-04-03T10:00:00+00:00"
+    resultado = respuesta["canales"][0]
+    assert (resultado["recibidas"], resultado["creadas"], resultado["conflictos"]) == (3, 1, 0)
+    assert _canal_de(db, propiedad).ultima_modificacion == datetime(2025, 4, 5, 8)
+    db.expire_all()
+    reservas = {r.id_externo: r for r in db.query(Reserva).filter(Reserva.propiedad_id == propiedad["id"])}
+    assert sorted(reservas) == ["r1", "r2", "r3", "r4"]
+    assert reservas["r1"].estado == EstadoReservaEnum.CANCELADA
+
+
+def test_una_reserva_que_nunca_se_aplica_retiene_la_marca_solo_hasta_el_maximo(cliente, db, canal, monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_CORRIDAS_CON_FALLAS_MAXIMAS", 2)
+    propiedad = _vincular(cliente, "Casa", "pub-1")
+    db.add(Reserva(
+        propiedad_id=propiedad["id"], fecha_ingreso=datetime(2025, 5, 1).date(), fecha_salida=datetime(2025, 5, 5).date(),
+        nombre_huesped="Directa", plataforma=PlataformaEnum.PARTICULAR, estado=EstadoReservaEnum.CONFIRMADA,
+        monto_total_usd=100
+    ))
+    db.commit()
+    canal.publicaciones["pub-1"] = [
+        _reserva_canal("choca", "2025-05-03", "2025-05-06", "2025-04-01T10:00:00Z"),
+        _reserva_canal("libre", "2025-05-10", "2025-05-12", "2025-04-02T10:00:00Z"),
+    ]
+
+    primera = _sincronizar(cliente)["canales"][0]
+    assert (primera["creadas"], primera["conflictos"], primera["error"]) == (1, 1, None)
+    sincronizacion = _canal_de(db, propiedad)
+    assert (sincronizacion.ultima_modificacion, sincronizacion.corridas_con_fallas) == (datetime(2025, 4, 1, 10), 1)
+
+    segunda = _sincronizar(cliente)["canales"][0]
+    assert (segunda["recibidas"], segunda["conflictos"]) == (2, 1)
+    assert "choca" in segunda["error"]
+    sincronizacion = _canal_de(db, propiedad)
+    assert (sincronizacion.ultima_modificacion, sincronizacion.corridas_con_fallas) == (datetime(2025, 4, 2, 10), 0)
+
+    # La marca ya pasó a la reserva que choca: no se vuelve a pedir
+    tercera = _sincronizar(cliente)["canales"][0]
+    assert (tercera["recibidas"], tercera["conflictos"], tercera["error"]) == (1, 0, None)
+
+
+def test_sincronizar_una_propiedad_como_la_llama_el_frontend(cliente, canal):
+    propiedad = _vincular(cliente, "Casa", "pub-1")
+    canal.publicaciones["pub-1"] = [_reserva_canal("r1", "2025-05-01", "2025-05-04", "2025-04-01T10:00:00Z")]
+
+    # integracionesService.syncAirbnb: sin cuerpo, la propiedad va en la query
+    respuesta = cliente.post("/api/v1/integraciones/airbnb/sync", params={"propiedad_id": propiedad["id"]})
+
+    assert respuesta.status_code == 200, respuesta.text
+    assert [c["creadas"] for c in respuesta.json()["canales"]] == [1]
+
+
+def test_las_reservas_se_aplican_fuera_del_event_loop(cliente, canal, monkeypatch):
+    _vincular(cliente, "Casa", "pub-1")
+    canal.publicaciones["pub-1"] = [_reserva_canal("r1", "2025-05-01", "2025-05-04", "2025-04-01T10:00:00Z")]
+    en_el_loop = []
+
+    def procesar_lote(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            en_el_loop.append(True)
+        except RuntimeError:
+            en_el_loop.append(False)
+        return original(*args, **kwargs)
+
+    original = canales.procesar_lote
+    monkeypatch.setattr(canales, "procesar_lote", procesar_lote)
+
+    assert _sincronizar(cliente)["creadas"] == 1
+    assert en_el_loop == [False]
@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+
+from src.models import Reserva, EstadoReservaEnum, PlataformaEnum
+
+
+def _feed(*eventos) -> bytes:
+    lineas = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Tests//ES"]
+    for uid, ingreso, salida, resumen in eventos:
+        lineas += [
+            "BEGIN:VEVENT",
+            f"UID:{uid}",
+            f"DTSTART;VALUE=DATE:{ingreso:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{salida:%Y%m%d}",
+            f"SUMMARY:{resumen}",
+            "END:VEVENT",
+        ]
+    lineas.append("END:VCALENDAR")
+    return "\r\n".join(lineas).encode()
+
+
+def _importar(cliente, propiedad_id, feed: bytes):
+    respuesta = cliente.post(
+        "/api/v1/integraciones/importar-ical",
+        data={"propiedad_id": propiedad_id, "plataforma": "Airbnb"},
+        files={"archivo": ("feed.ics", feed, "text/calendar")}
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()
+
+
+def _manual(propiedad_id, ingreso, salida, estado, nombre):
+    return Reserva(
+        propiedad_id=propiedad_id, fecha_ingreso=ingreso, fecha_salida=salida, nombre_huesped=nombre,
+        plataforma=PlataformaEnum.PARTICULAR, estado=estado, monto_total_usd=150
+    )
+
+
+def test_vincula_la_reserva_activa_y_no_la_cancelada_con_las_mismas_fechas(cliente, db, propiedad):
+    ingreso, salida = date(2025, 2, 10), date(2025, 2, 14)
+    cancelada = _manual(propiedad["id"], ingreso, salida, EstadoReservaEnum.CANCELADA, "Cancelado Juan")
+    activa = _manual(propiedad["id"], ingreso, salida, EstadoReservaEnum.CONFIRMADA, "Activa Ana")
+    db.add_all([cancelada, activa])
+    db.commit()
+
+    reporte = _importar(cliente, propiedad["id"], _feed(("uid-1@airbnb", ingreso, salida, "Reserved")))
+
+    assert (reporte["nuevas_reservas"], reporte["actualizadas"], reporte["rechazadas"]) == (0, 1, 0)
+    db.expire_all()
+    vinculada = db.get(Reserva, activa.id)
+    assert (vinculada.id_externo, vinculada.plataforma, vinculada.nombre_huesped) == (
+        "uid-1@airbnb", PlataformaEnum.AIRBNB, "Activa Ana"
+    )
+    intacta = db.get(Reserva, cancelada.id)
+    assert (intacta.estado, intacta.id_externo, intacta.plataforma) == (
+        EstadoReservaEnum.CANCELADA, None, PlataformaEnum.PARTICULAR
+    )
+
+
+def test_una_cancelada_con_las_mismas_fechas_no_se_reactiva(cliente, db, propiedad):
+    ingreso, salida = date(2025, 3, 1), date(2025, 3, 5)
+    cancelada = _manual(propiedad["id"], ingreso, salida, EstadoReservaEnum.CANCELADA, "Cancelado Juan")
+    db.add(cancelada)
+    db.commit()
+
+    reporte = _importar(cliente, propiedad["id"], _feed(("uid-2@airbnb", ingreso, salida, "Reserved")))
+
+    assert (reporte["nuevas_reservas"], reporte["actualizadas"]) == (1, 0)
+    db.expire_all()
+    assert db.get(Reserva, cancelada.id).estado == EstadoReservaEnum.CANCELADA
+    nueva = db.query(Reserva).filter(Reserva.id_externo == "uid-2@airbnb").one()
+    assert nueva.id != cancelada.id and nueva.estado == EstadoReservaEnum.CONFIRMADA
+
+
+def test_reimportar_sin_cambios_y_cancelar_lo_que_desaparece_del_feed(cliente, db, propiedad):
+    inicio = date.today() + timedelta(days=30)
+    eventos = [
+        ("uid-a@airbnb", inicio, inicio + timedelta(days=3), "Reserved"),
+        ("uid-b@airbnb", inicio + timedelta(days=5), inicio + timedelta(days=7), "Reserved"),
+    ]
+    assert _importar(cliente, propiedad["id"], _feed(*eventos))["nuevas_reservas"] == 2
+
+    reporte = _importar(cliente, propiedad["id"], _feed(*eventos))
+    assert (reporte["nuevas_reservas"], reporte["actualizadas"], reporte["canceladas"], reporte["sin_cambios"]) == (0, 0, 0, 2)
+
+    reporte = _importar(cliente, propiedad["id"], _feed(eventos[0]))
+    assert reporte["canceladas"] == 1
+    db.expire_all()
+    assert db.query(Reserva).filter(Reserva.id_externo == "uid-b@airbnb").one().estado == EstadoReservaEnum.CANCELADA
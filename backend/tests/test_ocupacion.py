@@ -0,0 +1,72 @@
+"""
+Índice de ocupación (services.ocupacion) y la revisión de reservas con la que decide si recargar.
+"""
+from datetime import date
+
+from sqlalchemy import event, update
+
+from src.models import Reserva, revision_actual
+from src.services.ocupacion import indice_ocupacion
+
+DISPONIBILIDAD = {"desde": "2031-03-01", "hasta": "2031-03-31"}
+
+
+def _reserva(cliente, propiedad, ingreso="2031-03-10", salida="2031-03-15"):
+    respuesta = cliente.post("/api/v1/reservas/", json={
+        "propiedad_id": propiedad["id"], "fecha_ingreso": ingreso, "fecha_salida": salida,
+        "nombre_huesped": "Ana", "plataforma": "Particular", "monto_total_usd": 100.0,
+    })
+    assert respuesta.status_code == 201, respuesta.text
+    return respuesta.json()
+
+
+def _disponible(cliente, propiedad, **params):
+    respuesta = cliente.get("/api/v1/reservas/disponibilidad", params={**DISPONIBILIDAD, **params})
+    return {fila["propiedad_id"]: fila["disponible"] for fila in respuesta.json()}[propiedad["id"]]
+
+
+def test_cada_transaccion_que_escribe_avanza_la_revision(cliente, db, propiedad):
+    inicial = revision_actual(db)
+    primera = _reserva(cliente, propiedad)
+    segunda = _reserva(cliente, propiedad, "2031-04-01", "2031-04-05")
+
+    revisiones = dict(db.query(Reserva.id, Reserva.revision).all())
+    assert inicial < revisiones[primera["id"]] < revisiones[segunda["id"]] == revision_actual(db)
+
+    # Un UPDATE masivo es una transacción más: todas sus filas comparten la revisión
+    db.execute(update(Reserva).values(notas="masivo"))
+    db.commit()
+    assert {revision for (revision,) in db.query(Reserva.revision)} == {revisiones[segunda["id"]] + 1}
+
+    # Las bajas no dejan fila, pero igual avanzan el contador
+    cliente.delete(f"/api/v1/reservas/{primera['id']}")
+    assert revision_actual(db) == revisiones[segunda["id"]] + 2
+
+
+def test_la_escritura_de_otro_proceso_recarga_el_indice(cliente, db, propiedad):
+    reserva = _reserva(cliente, propiedad)
+    assert not _disponible(cliente, propiedad)
+
+    # Otro proceso mueve la reserva en el mismo segundo: no cambian cantidad, ids ni estados
+    db.execute(update(Reserva).where(Reserva.id == reserva["id"]).values(
+        fecha_ingreso=date(2031, 5, 10), fecha_salida=date(2031, 5, 15)
+    ))
+    db.commit()
+    assert _disponible(cliente, propiedad)
+
+
+def test_las_escrituras_propias_no_recargan_el_indice(cliente, engine, db, propiedad):
+    _disponible(cliente, propiedad)
+    reserva = _reserva(cliente, propiedad)
+    cliente.put(f"/api/v1/reservas/{reserva['id']}", json={"fecha_salida": "2031-03-20"})
+
+    consultas = []
+    event.listen(engine, "before_cursor_execute", lambda *args: consultas.append(args[2]))
+    assert not _disponible(cliente, propiedad, desde="2031-03-16")
+    assert len(consultas) == 1  # Solo la lectura de la revisión
+
+    cliente.delete(f"/api/v1/reservas/{reserva['id']}")
+    consultas.clear()
+    assert _disponible(cliente, propiedad)
+    assert len(consultas) == 1
+    assert indice_ocupacion._revision == revision_actual(db)
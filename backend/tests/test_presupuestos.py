@@ -0,0 +1,123 @@
+"""
+Presupuestos de consultas por ruta (PRESUPUESTOS_CONSULTAS en api/perfilador.py) sobre un
+volumen chico de benchmarks.datos, con las caches vacías como indica el presupuesto. El
+benchmark los controla con más datos; acá fallan en el mismo pytest que el resto.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+import src.db.database as database
+from benchmarks.datos import Volumen, generar
+from src.api.api import ROUTERS
+from src.api.metricas import TablaRutas
+from src.api.perfilador import PRESUPUESTOS_CONSULTAS
+from src.core.config import settings
+from src.models import CategoriaMovimiento, MovimientoCaja, Reserva, TipoMovimientoEnum
+from src.services.cache import cache_categorias, cache_propiedades, cache_tipos_cambio
+from src.services.ocupacion import indice_ocupacion
+
+ANIO = date.today().year - 1  # Meses cerrados: saldos y libro generan sus puntos de control
+
+
+def _get(url, **params):
+    return lambda ctx: ("GET", url.format(**ctx), {"params": params})
+
+
+CASOS = {
+    "propiedades.listar": _get("/api/v1/propiedades/"),
+    "propiedades.obtener": _get("/api/v1/propiedades/{propiedad_id}"),
+    "reservas.listar": _get("/api/v1/reservas/", limit=100),
+    "reservas.exportar": _get("/api/v1/reservas/exportar"),
+    "reservas.calendario": _get("/api/v1/reservas/calendario", desde=f"{ANIO}-01-01", hasta=f"{ANIO}-12-31"),
+    "reservas.disponibilidad": _get(
+        "/api/v1/reservas/disponibilidad", desde=f"{ANIO}-01-01", hasta=f"{ANIO}-03-31", noches=3
+    ),
+    "reservas.obtener": _get("/api/v1/reservas/{reserva_id}"),
+    "reservas.crear": lambda ctx: ("POST", "/api/v1/reservas/", {"json": {
+        "propiedad_id": ctx["propiedad_id"], "fecha_ingreso": f"{ANIO + 3}-01-10", "fecha_salida": f"{ANIO + 3}-01-12",
+        "nombre_huesped": "Presupuesto", "plataforma": "Particular", "monto_total_usd": 100.0,
+    }}),
+    "categorias.listar": _get("/api/v1/categorias/"),
+    "categorias.obtener": _get("/api/v1/categorias/{categoria_id}"),
+    "categorias.borrar": lambda ctx: ("DELETE", f"/api/v1/categorias/{ctx['categoria_libre_id']}", {}),
+    "caja.listar": _get("/api/v1/caja/", limit=100),
+    "caja.exportar": _get("/api/v1/caja/exportar", desde=f"{ANIO}-01-01"),
+    "caja.resumen": _get("/api/v1/caja/resumen", desde=f"{ANIO}-01-01", hasta=f"{ANIO}-12-31"),
+    "caja.resumen_mensual": _get("/api/v1/caja/resumen-mensual", anio=ANIO),
+    "caja.liquidacion": _get("/api/v1/caja/liquidacion", desde=f"{ANIO}-01-01", hasta=f"{ANIO}-12-31"),
+    "caja.resumen_moneda": _get(
+        "/api/v1/caja/resumen-moneda", desde=f"{ANIO}-01-01", hasta=f"{ANIO}-12-31", moneda="ARS", agrupar="categoria"
+    ),
+    "caja.obtener": _get("/api/v1/caja/{movimiento_id}"),
+    "caja.crear": lambda ctx: ("POST", "/api/v1/caja/", {"json": {
+        "fecha": f"{ANIO}-05-10", "tipo": "Egreso", "categoria_id": ctx["categoria_egreso_id"],
+        "monto": 15000.0, "moneda": "ARS", "socio": "Todos",
+    }}),
+    "caja.saldos_socios": _get("/api/v1/caja/saldos-socios", fecha=f"{ANIO}-12-31"),
+    "caja.libro_socios": _get("/api/v1/caja/libro-socios", desde=f"{ANIO}-03-01", hasta=f"{ANIO}-03-31"),
+    "tipos_cambio.listar": _get("/api/v1/tipos-cambio/"),
+    "tipos_cambio.vigente": _get("/api/v1/tipos-cambio/vigente", fecha=f"{ANIO}-06-15"),
+    "integraciones.canales": _get("/api/v1/integraciones/canales"),
+    "analitica.rendimiento": _get("/api/v1/analitica/rendimiento", desde=f"{ANIO}-01-01", hasta=f"{ANIO + 1}-01-01"),
+    "buscar.huesped": _get("/api/v1/buscar/", q="Huésped 1-1"),
+}
+
+RUTAS = TablaRutas(ROUTERS, settings.API_V1_STR)
+
+
+def _plantilla(caso: str) -> str:
+    ctx = {"propiedad_id": 1, "reserva_id": 1, "categoria_id": 1, "movimiento_id": 1, "categoria_libre_id": 1,
+           "categoria_egreso_id": 1}
+    metodo, url, _ = CASOS[caso](ctx)
+    return f"{metodo} {RUTAS.plantilla(metodo, url)}"
+
+
+@pytest.fixture
+def contexto(engine, cliente, db):
+    generar(db, Volumen(propiedades=2, anios=2, anio_final=ANIO, movimientos=1000))
+    libre = CategoriaMovimiento(nombre="Sin movimientos", tipo=TipoMovimientoEnum.EGRESO)
+    db.add(libre)
+    db.commit()
+    return {
+        "propiedad_id": 1,
+        "reserva_id": db.query(Reserva.id).order_by(Reserva.id).limit(1).scalar(),
+        "categoria_id": 1,
+        "movimiento_id": db.query(MovimientoCaja.id).order_by(MovimientoCaja.id).limit(1).scalar(),
+        "categoria_libre_id": libre.id,
+        "categoria_egreso_id": db.query(CategoriaMovimiento.id).filter(
+            CategoriaMovimiento.tipo == TipoMovimientoEnum.EGRESO
+        ).order_by(CategoriaMovimiento.id).limit(1).scalar(),
+    }
+
+
+def test_cada_ruta_con_presupuesto_tiene_un_caso():
+    assert set(PRESUPUESTOS_CONSULTAS) == {_plantilla(caso) for caso in CASOS}
+
+
+@pytest.mark.parametrize("caso", CASOS)
+def test_la_ruta_respeta_su_presupuesto_de_consultas(caso, contexto, cliente, engine):
+    metodo, url, kwargs = CASOS[caso](contexto)
+    presupuesto = PRESUPUESTOS_CONSULTAS[_plantilla(caso)]
+
+    consultas = []
+
+    def contar(conn, cursor, sql, *_):
+        consultas.append(sql)
+
+    # El presupuesto es el peor caso: con las caches y el índice de ocupación vacíos
+    for cache in (cache_propiedades, cache_categorias, cache_tipos_cambio):
+        cache.invalidar()
+    indice_ocupacion.invalidar()
+    motores = (engine, database.async_engine.sync_engine)
+    for motor in motores:
+        event.listen(motor, "before_cursor_execute", contar)
+    try:
+        respuesta = cliente.request(metodo, url, **kwargs)
+    finally:
+        for motor in motores:
+            event.remove(motor, "before_cursor_execute", contar)
+
+    assert respuesta.status_code < 400, respuesta.text
+    assert len(consultas) <= presupuesto, "\n\n".join(" ".join(sql.split())[:200] for sql in consultas)
@@ -0,0 +1,113 @@
+from datetime import date
+
+from src.models import Reserva, EstadoReservaEnum, PlataformaEnum
+
+
+def _reserva(propiedad_id, ingreso, salida, estado, nombre="Huésped"):
+    return Reserva(
+        propiedad_id=propiedad_id, fecha_ingreso=ingreso, fecha_salida=salida, nombre_huesped=nombre,
+        plataforma=PlataformaEnum.PARTICULAR, estado=estado, monto_total_usd=100
+    )
+
+
+def _item(propiedad_id, ingreso, salida, estado="Confirmada", **extra):
+    return {
+        "propiedad_id": propiedad_id, "fecha_ingreso": ingreso, "fecha_salida": salida,
+        "nombre_huesped": "Lote", "plataforma": "Particular", "estado": estado, "monto_total_usd": 200, **extra
+    }
+
+
+def _activas(db, propiedad_id):
+    return db.query(Reserva).filter(
+        Reserva.propiedad_id == propiedad_id, Reserva.estado != EstadoReservaEnum.CANCELADA
+    ).order_by(Reserva.fecha_ingreso).all()
+
+
+def test_lote_detecta_conflictos_con_la_base_y_dentro_del_lote(cliente, db, propiedad):
+    db.add(_reserva(propiedad["id"], date(2025, 1, 10), date(2025, 1, 15), EstadoReservaEnum.CONFIRMADA))
+    db.commit()
+
+    respuesta = cliente.post("/api/v1/reservas/bulk", json=[
+        _item(propiedad["id"], "2025-01-12", "2025-01-14"),
+        _item(propiedad["id"], "2025-01-20", "2025-01-25"),
+        _item(propiedad["id"], "2025-01-24", "2025-01-27"),
+        _item(propiedad["id"], "2025-01-24", "2025-01-27", estado="Cancelada"),
+    ]).json()
+
+    assert [r["resultado"] for r in respuesta["resultados"]] == ["conflicto", "creada", "conflicto", "creada"]
+    assert respuesta["resultados"][0]["reserva_id"] is not None
+    assert respuesta["resultados"][2]["conflicto_con_indice"] == 1
+
+
+def test_actualizar_prefiere_la_reserva_activa_de_la_misma_clave(cliente, db, propiedad):
+    cancelada = _reserva(propiedad["id"], date(2025, 1, 10), date(2025, 1, 15), EstadoReservaEnum.CANCELADA, "Cancelado")
+    activa = _reserva(propiedad["id"], date(2025, 1, 10), date(2025, 1, 15), EstadoReservaEnum.CONFIRMADA, "Activa")
+    db.add_all([cancelada, activa])
+    db.commit()
+
+    respuesta = cliente.post(
+        "/api/v1/reservas/bulk", params={"actualizar": True},
+        json=[_item(propiedad["id"], "2025-01-10", "2025-01-15", notas="actualizada")]
+    ).json()
+
+    assert respuesta["resultados"][0]["resultado"] == "actualizada"
+    assert respuesta["resultados"][0]["reserva_id"] == activa.id
+    db.expire_all()
+    assert db.get(Reserva, cancelada.id).estado == EstadoReservaEnum.CANCELADA
+    assert [r.id for r in _activas(db, propiedad["id"])] == [activa.id]
+
+
+def test_reactivar_una_cancelada_superpuesta_es_conflicto(cliente, db, propiedad):
+    cancelada = _reserva(propiedad["id"], date(2025, 1, 10), date(2025, 1, 15), EstadoReservaEnum.CANCELADA)
+    confirmada = _reserva(propiedad["id"], date(2025, 1, 12), date(2025, 1, 20), EstadoReservaEnum.CONFIRMADA)
+    db.add_all([cancelada, confirmada])
+    db.commit()
+
+    respuesta = cliente.post(
+        "/api/v1/reservas/bulk", params={"actualizar": True},
+        json=[_item(propiedad["id"], "2025-01-10", "2025-01-15")]
+    )
+
+    assert respuesta.status_code == 200
+    resultado = respuesta.json()["resultados"][0]
+    assert resultado["resultado"] == "conflicto"
+    assert resultado["reserva_id"] == confirmada.id
+    db.expire_all()
+    assert db.get(Reserva, cancelada.id).estado == EstadoReservaEnum.CANCELADA
+    assert [r.id for r in _activas(db, propiedad["id"])] == [confirmada.id]
+
+
+def test_reactivar_una_cancelada_libre_la_actualiza(cliente, db, propiedad):
+    cancelada = _reserva(propiedad["id"], date(2025, 1, 10), date(2025, 1, 15), EstadoReservaEnum.CANCELADA)
+    db.add(cancelada)
+    db.commit()
+
+    respuesta = cliente.post(
+        "/api/v1/reservas/bulk", params={"actualizar": True},
+        json=[
+            _item(propiedad["id"], "2025-01-10", "2025-01-15"),
+            _item(propiedad["id"], "2025-01-14", "2025-01-18"),
+        ]
+    ).json()
+
+    # La reactivada vuelve a ocupar sus fechas también para el resto del lote
+    assert [r["resultado"] for r in respuesta["resultados"]] == ["actualizada", "conflicto"]
+    assert respuesta["resultados"][0]["reserva_id"] == cancelada.id
+    db.expire_all()
+    assert db.get(Reserva, cancelada.id).estado == EstadoReservaEnum.CONFIRMADA
+
+
+def test_cancelar_por_lote_libera_las_fechas_para_el_resto_del_lote(cliente, db, propiedad):
+    confirmada = _reserva(propiedad["id"], date(2025, 1, 10), date(2025, 1, 15), EstadoReservaEnum.CONFIRMADA)
+    db.add(confirmada)
+    db.commit()
+
+    respuesta = cliente.post(
+        "/api/v1/reservas/bulk", params={"actualizar": True},
+        json=[
+            _item(propiedad["id"], "2025-01-10", "2025-01-15", estado="Cancelada"),
+            _item(propiedad["id"], "2025-01-12", "2025-01-16"),
+        ]
+    ).json()
+
+    assert [r["resultado"] for r in respuesta["resultados"]] == ["actualizada", "creada"]
@@ -0,0 +1,41 @@
+from datetime import date
+
+from src.models import CategoriaMovimiento, MovimientoCaja, TipoCambio, MonedaEnum, SocioEnum, TipoMovimientoEnum
+from src.services.resumen_mensual import reconstruir_resumen_mensual
+
+
+def _marzo(cliente):
+    meses = cliente.get("/api/v1/caja/resumen-mensual", params={"anio": 2025}).json()
+    return next(mes for mes in meses if mes["mes"] == 3)
+
+
+def test_usd_sin_tipo_cambio_usa_el_vigente_en_todos_los_reportes(cliente, db):
+    categoria = CategoriaMovimiento(nombre="Alquiler", tipo=TipoMovimientoEnum.INGRESO)
+    db.add_all([categoria, TipoCambio(fecha=date(2025, 1, 1), valor=1000.0)])
+    db.flush()
+    # Movimiento anterior a la tabla de tipos de cambio: en dólares y sin tipo de cambio propio
+    legado = MovimientoCaja(
+        fecha=date(2025, 3, 10), tipo=TipoMovimientoEnum.INGRESO, categoria_id=categoria.id,
+        monto=10.0, moneda=MonedaEnum.DOLARES, tipo_cambio=None, socio=SocioEnum.MAXY
+    )
+    db.add(legado)
+    db.commit()
+    reconstruir_resumen_mensual(db)
+    db.commit()
+
+    respuesta = cliente.post("/api/v1/caja/", json={
+        "fecha": "2025-03-12", "tipo": "Ingreso", "categoria_id": categoria.id,
+        "monto": 500, "moneda": "ARS", "socio": "Maxy"
+    })
+    assert respuesta.status_code == 201, respuesta.text
+    assert _marzo(cliente)["total_ingresos_pesos"] == 10500.0
+
+    periodo = {"desde": "2025-03-01", "hasta": "2025-03-31"}
+    resumen = cliente.get("/api/v1/caja/resumen", params=periodo).json()
+    assert resumen["desglose_por_categoria"]["Alquiler"] == 10500.0
+    en_pesos = cliente.get("/api/v1/caja/resumen-moneda", params={**periodo, "moneda": "ARS"}).json()
+    assert en_pesos["total_ingresos"] == 10500.0
+
+    # Borrar el movimiento legado resta lo mismo que sumó la reconstrucción
+    assert cliente.delete(f"/api/v1/caja/{legado.id}").status_code == 204
+    assert _marzo(cliente)["total_ingresos_pesos"] == 500.0
@@ -0,0 +1,38 @@
+from src.models import CategoriaMovimiento, SaldoSocioMensual, TipoMovimientoEnum
+
+
+def _saldo(cliente, fecha, socio="Maxy", moneda="ARS"):
+    saldos = cliente.get("/api/v1/caja/saldos-socios", params={"fecha": fecha}).json()
+    return next(s["saldo"] for s in saldos if (s["socio"], s["moneda"]) == (socio, moneda))
+
+
+def _movimiento(cliente, categoria_id, fecha, monto, tipo="Ingreso"):
+    respuesta = cliente.post("/api/v1/caja/", json={
+        "fecha": fecha, "tipo": tipo, "categoria_id": categoria_id,
+        "monto": monto, "moneda": "ARS", "socio": "Maxy"
+    })
+    assert respuesta.status_code == 201, respuesta.text
+    return respuesta.json()["id"]
+
+
+def test_un_movimiento_retroactivo_invalida_y_regenera_los_puntos_de_control(cliente, db):
+    categoria = CategoriaMovimiento(nombre="Alquiler", tipo=TipoMovimientoEnum.INGRESO)
+    gasto = CategoriaMovimiento(nombre="Limpieza", tipo=TipoMovimientoEnum.EGRESO)
+    db.add_all([categoria, gasto])
+    db.commit()
+    _movimiento(cliente, categoria.id, "2024-01-10", 1000)
+    _movimiento(cliente, categoria.id, "2024-03-10", 500)
+
+    assert _saldo(cliente, "2024-04-30") == 1500.0
+    assert db.query(SaldoSocioMensual).filter(SaldoSocioMensual.anio == 2024).count() > 0
+
+    # Borra los puntos de control desde febrero; la siguiente consulta los vuelve a generar
+    retroactivo = _movimiento(cliente, gasto.id, "2024-02-15", 200, tipo="Egreso")
+    assert not db.query(SaldoSocioMensual).filter(
+        SaldoSocioMensual.anio == 2024, SaldoSocioMensual.mes >= 2
+    ).count()
+    assert _saldo(cliente, "2024-04-30") == 1300.0
+    assert _saldo(cliente, "2024-02-29") == 800.0
+
+    assert cliente.delete(f"/api/v1/caja/{retroactivo}").status_code == 204
+    assert _saldo(cliente, "2024-04-30") == 1500.0
@@ -27,23 +27,22 @@ import {
   CircularProgress,
   Snackbar
 } from '@mui/material';
-import { DatePicker } from '@mui/x-date-pickers/DatePicker';
-import { AdapterDateFns } from '@mui/x-date-pickers/AdapterDateFns';
-import { LocalizationProvider } from '@mui/x-date-pickers/LocalizationProvider';
-import { es } from 'date-fns/locale';
-import { format, startOfMonth, endOfMonth } from 'date-fns';
 import { integracionesService, propiedadesService } from '../../services/api';
 
+// Texto del resultado de una sincronización (SincronizacionRespuesta del backend)
+const resumenSincronizacion = (resultado) => {
+  const resumen = `${resultado.creadas} nuevas, ${resultado.actualizadas} actualizadas, ` +
+    `${resultado.conflictos} con conflicto, ${resultado.invalidas} inválidas`;
+  const errores = resultado.canales.filter((canal) => canal.error).map((canal) => canal.error);
+  return errores.length > 0 ? `${resumen}. ${errores.join(' ')}` : resumen;
+};
+
 const SincronizarPage = () => {
   // Estados para los formularios
   const [propiedades, setPropiedades] = useState([]);
   const [propiedadAirbnb, setPropiedadAirbnb] = useState('');
   const [propiedadBooking, setPropiedadBooking] = useState('');
   const [propiedadExcel, setPropiedadExcel] = useState('');
-  const [fechaInicioAirbnb, setFechaInicioAirbnb] = useState(startOfMonth(new Date()));
-  const [fechaFinAirbnb, setFechaFinAirbnb] = useState(endOfMonth(new Date()));
-  const [fechaInicioBooking, setFechaInicioBooking] = useState(startOfMonth(new Date()));
-  const [fechaFinBooking, setFechaFinBooking] = useState(endOfMonth(new Date()));
   const [excelFilePath, setExcelFilePath] = useState('');
 
   // Estados para manejar la sincronización
@@ -115,11 +114,7 @@ const SincronizarPage = () => {
       setIsSyncingAirbnb(true);
       setAirbnbResult(null);
       
-      const response = await integracionesService.syncAirbnb({
-        propiedad_id: propiedadAirbnb,
-        desde: format(fechaInicioAirbnb, 'yyyy-MM-dd'),
-        hasta: format(fechaFinAirbnb, 'yyyy-MM-dd')
-      });
+      const response = await integracionesService.syncAirbnb(propiedadAirbnb);
       
       setAirbnbResult(response.data);
       showSnackbar('Sincronización con Airbnb completada', 'success');
@@ -142,11 +137,7 @@ const SincronizarPage = () => {
       setIsSyncingBooking(true);
       setBookingResult(null);
       
-      const response = await integracionesService.syncBooking({
-        propiedad_id: propiedadBooking,
-        desde: format(fechaInicioBooking, 'yyyy-MM-dd'),
-        hasta: format(fechaFinBooking, 'yyyy-MM-dd')
-      });
+      const response = await integracionesService.syncBooking(propiedadBooking);
       
       setBookingResult(response.data);
       showSnackbar('Sincronización con Booking completada', 'success');
@@ -212,313 +203,289 @@ const SincronizarPage = () => {
   };
 
   return (
-    <LocalizationProvider dateAdapter={AdapterDateFns} adapterLocale={es}>
-      <Container maxWidth="lg">
-        <Typography variant="h4" component="h1" gutterBottom>
-          Sincronización de Reservas
-        </Typography>
-
-        <Grid container spacing={3}>
-          {/* Tarjeta de Airbnb */}
-          <Grid item xs={12} md={6}>
-            <Card elevation={3}>
-              <CardContent>
-                <Box sx={{ display: 'flex', alignItems: 'center', mb: 2 }}>
-                  <Typography variant="h5" component="div" sx={{ flexGrow: 1 }}>
-                    Sincronizar con Airbnb
-                  </Typography>
-                  {!apiStatus.airbnb && (
-                    <Button 
-                      size="small" 
-                      variant="outlined" 
-                      color="primary"
-                      onClick={handleOpenConfigDialog}
-                    >
-                      Configurar API
-                    </Button>
-                  )}
-                </Box>
+    <Container maxWidth="lg">
+      <Typography variant="h4" component="h1" gutterBottom>
+        Sincronización de Reservas
+      </Typography>
 
+      <Grid container spacing={3}>
+        {/* Tarjeta de Airbnb */}
+        <Grid item xs={12} md={6}>
+          <Card elevation={3}>
+            <CardContent>
+              <Box sx={{ display: 'flex', alignItems: 'center', mb: 2 }}>
+                <Typography variant="h5" component="div" sx={{ flexGrow: 1 }}>
+                  Sincronizar con Airbnb
+                </Typography>
                 {!apiStatus.airbnb && (
-                  <Alert severity="warning" sx={{ mb: 2 }}>
-                    <AlertTitle>API no configurada</AlertTitle>
-                    La API de Airbnb no está configurada. La sincronización no funcionará hasta que se configure correctamente.
-                  </Alert>
+                  <Button 
+                    size="small" 
+                    variant="outlined" 
+                    color="primary"
+                    onClick={handleOpenConfigDialog}
+                  >
+                    Configurar API
+                  </Button>
                 )}
+              </Box>
 
-                <Grid container spacing={2}>
-                  <Grid item xs={12}>
-                    <FormControl fullWidth>
-                      <InputLabel id="propiedad-airbnb-label">Propiedad</InputLabel>
-                      <Select
-                        labelId="propiedad-airbnb-label"
-                        id="propiedad-airbnb"
-                        value={propiedadAirbnb}
-                        onChange={(e) => setPropiedadAirbnb(e.target.value)}
-                        label="Propiedad"
-                      >
-                        {propiedades.map((propiedad) => (
-                          <MenuItem key={propiedad.id} value={propiedad.id}>
-                            {propiedad.nombre}
-                          </MenuItem>
-                        ))}
-                      </Select>
-                    </FormControl>
-                  </Grid>
-                  <Grid item xs={12} sm={6}>
-                    <DatePicker
-                      label="Desde"
-                      value={fechaInicioAirbnb}
-                      onChange={setFechaInicioAirbnb}
-                      slotProps={{ textField: { fullWidth: true } }}
-                    />
-                  </Grid>
-                  <Grid item xs={12} sm={6}>
-                    <DatePicker
-                      label="Hasta"
-                      value={fechaFinAirbnb}
-                      onChange={setFechaFinAirbnb}
-                      slotProps={{ textField: { fullWidth: true } }}
-                    />
-                  </Grid>
-                </Grid>
-              </CardContent>
-              <CardActions>
-                <Button 
-                  variant="contained" 
-                  color="primary" 
-                  fullWidth
-                  onClick={handleSyncAirbnb}
-                  disabled={isSyncingAirbnb || !propiedadAirbnb}
-                >
-                  {isSyncingAirbnb ? <CircularProgress size={24} /> : 'Sincronizar con Airbnb'}
-                </Button>
-              </CardActions>
-              
-              {airbnbResult && (
-                <Box sx={{ p: 2 }}>
-                  <Divider sx={{ my: 1 }} />
-                  <Typography variant="subtitle1" gutterBottom>
-                    Resultado de la sincronización:
-                  </Typography>
-                  <Typography variant="body2">
-                    {airbnbResult.mensaje}
-                  </Typography>
-                </Box>
+              {!apiStatus.airbnb && (
+                <Alert severity="warning" sx={{ mb: 2 }}>
+                  <AlertTitle>API no configurada</AlertTitle>
+                  La API de Airbnb no está configurada. La sincronización no funcionará hasta que se configure correctamente.
+                </Alert>
               )}
-            </Card>
-          </Grid>
 
-          {/* Tarjeta de Booking */}
-          <Grid item xs={12} md={6}>
-            <Card elevation={3}>
-              <CardContent>
-                <Box sx={{ display: 'flex', alignItems: 'center', mb: 2 }}>
-                  <Typography variant="h5" component="div" sx={{ flexGrow: 1 }}>
-                    Sincronizar con Booking
-                  </Typography>
-                  {!apiStatus.booking && (
-                    <Button 
-                      size="small" 
-                      variant="outlined" 
-                      color="primary"
-                      onClick={handleOpenConfigDialog}
+              <Grid container spacing={2}>
+                <Grid item xs={12}>
+                  <FormControl fullWidth>
+                    <InputLabel id="propiedad-airbnb-label">Propiedad</InputLabel>
+                    <Select
+                      labelId="propiedad-airbnb-label"
+                      id="propiedad-airbnb"
+                      value={propiedadAirbnb}
+                      onChange={(e) => setPropiedadAirbnb(e.target.value)}
+                      label="Propiedad"
                     >
-                      Configurar API
-                    </Button>
-                  )}
-                </Box>
+                      {propiedades.map((propiedad) => (
+                        <MenuItem key={propiedad.id} value={propiedad.id}>
+                          {propiedad.nombre}
+                        </MenuItem>
+                      ))}
+                    </Select>
+                  </FormControl>
+                </Grid>
+                <Grid item xs={12}>
+                  <Typography variant="body2" color="text.secondary">
+                    Se traen las reservas creadas o modificadas en Airbnb desde la última sincronización.
+                  </Typography>
+                </Grid>
+              </Grid>
+            </CardContent>
+            <CardActions>
+              <Button 
+                variant="contained" 
+                color="primary" 
+                fullWidth
+                onClick={handleSyncAirbnb}
+                disabled={isSyncingAirbnb || !propiedadAirbnb}
+              >
+                {isSyncingAirbnb ? <CircularProgress size={24} /> : 'Sincronizar con Airbnb'}
+              </Button>
+            </CardActions>
+            
+            {airbnbResult && (
+              <Box sx={{ p: 2 }}>
+                <Divider sx={{ my: 1 }} />
+                <Typography variant="subtitle1" gutterBottom>
+                  Resultado de la sincronización:
+                </Typography>
+                <Typography variant="body2">
+                  {resumenSincronizacion(airbnbResult)}
+                </Typography>
+              </Box>
+            )}
+          </Card>
+        </Grid>
 
+        {/* Tarjeta de Booking */}
+        <Grid item xs={12} md={6}>
+          <Card elevation={3}>
+            <CardContent>
+              <Box sx={{ display: 'flex', alignItems: 'center', mb: 2 }}>
+                <Typography variant="h5" component="div" sx={{ flexGrow: 1 }}>
+                  Sincronizar con Booking
+                </Typography>
                 {!apiStatus.booking && (
-                  <Alert severity="warning" sx={{ mb: 2 }}>
-                    <AlertTitle>API no configurada</AlertTitle>
-                    La API de Booking no está configurada. La sincronización no funcionará hasta que se configure correctamente.
-                  </Alert>
+                  <Button 
+                    size="small" 
+                    variant="outlined" 
+                    color="primary"
+                    onClick={handleOpenConfigDialog}
+                  >
+                    Configurar API
+                  </Button>
                 )}
+              </Box>
 
-                <Grid container spacing={2}>
-                  <Grid item xs={12}>
-                    <FormControl fullWidth>
-                      <InputLabel id="propiedad-booking-label">Propiedad</InputLabel>
-                      <Select
-                        labelId="propiedad-booking-label"
-                        id="propiedad-booking"
-                        value={propiedadBooking}
-                        onChange={(e) => setPropiedadBooking(e.target.value)}
-                        label="Propiedad"
-                      >
-                        {propiedades.map((propiedad) => (
-                          <MenuItem key={propiedad.id} value={propiedad.id}>
-                            {propiedad.nombre}
-                          </MenuItem>
-                        ))}
-                      </Select>
-                    </FormControl>
-                  </Grid>
-                  <Grid item xs={12} sm={6}>
-                    <DatePicker
-                      label="Desde"
-                      value={fechaInicioBooking}
-                      onChange={setFechaInicioBooking}
-                      slotProps={{ textField: { fullWidth: true } }}
-                    />
-                  </Grid>
-                  <Grid item xs={12} sm={6}>
-                    <DatePicker
-                      label="Hasta"
-                      value={fechaFinBooking}
-                      onChange={setFechaFinBooking}
-                      slotProps={{ textField: { fullWidth: true } }}
-                    />
-                  </Grid>
-                </Grid>
-              </CardContent>
-              <CardActions>
-                <Button 
-                  variant="contained" 
-                  color="primary" 
-                  fullWidth
-                  onClick={handleSyncBooking}
-                  disabled={isSyncingBooking || !propiedadBooking}
-                >
-                  {isSyncingBooking ? <CircularProgress size={24} /> : 'Sincronizar con Booking'}
-                </Button>
-              </CardActions>
-              
-              {bookingResult && (
-                <Box sx={{ p: 2 }}>
-                  <Divider sx={{ my: 1 }} />
-                  <Typography variant="subtitle1" gutterBottom>
-                    Resultado de la sincronización:
-                  </Typography>
-                  <Typography variant="body2">
-                    {bookingResult.mensaje}
-                  </Typography>
-                </Box>
+              {!apiStatus.booking && (
+                <Alert severity="warning" sx={{ mb: 2 }}>
+                  <AlertTitle>API no configurada</AlertTitle>
+                  La API de Booking no está configurada. La sincronización no funcionará hasta que se configure correctamente.
+                </Alert>
               )}
-            </Card>
-          </Grid>
 
-          {/* Tarjeta de importación de Excel */}
-          <Grid item xs={12}>
-            <Card elevation={3}>
-              <CardContent>
-                <Typography variant="h5" component="div" gutterBottom>
-                  Importar desde Excel
+              <Grid container spacing={2}>
+                <Grid item xs={12}>
+                  <FormControl fullWidth>
+                    <InputLabel id="propiedad-booking-label">Propiedad</InputLabel>
+                    <Select
+                      labelId="propiedad-booking-label"
+                      id="propiedad-booking"
+                      value={propiedadBooking}
+                      onChange={(e) => setPropiedadBooking(e.target.value)}
+                      label="Propiedad"
+                    >
+                      {propiedades.map((propiedad) => (
+                        <MenuItem key={propiedad.id} value={propiedad.id}>
+                          {propiedad.nombre}
+                        </MenuItem>
+                      ))}
+                    </Select>
+                  </FormControl>
+                </Grid>
+                <Grid item xs={12}>
+                  <Typography variant="body2" color="text.secondary">
+                    Se traen las reservas creadas o modificadas en Booking desde la última sincronización.
+                  </Typography>
+                </Grid>
+              </Grid>
+            </CardContent>
+            <CardActions>
+              <Button 
+                variant="contained" 
+                color="primary" 
+                fullWidth
+                onClick={handleSyncBooking}
+                disabled={isSyncingBooking || !propiedadBooking}
+              >
+                {isSyncingBooking ? <CircularProgress size={24} /> : 'Sincronizar con Booking'}
+              </Button>
+            </CardActions>
+            
+            {bookingResult && (
+              <Box sx={{ p: 2 }}>
+                <Divider sx={{ my: 1 }} />
+                <Typography variant="subtitle1" gutterBottom>
+                  Resultado de la sincronización:
                 </Typography>
-                <Typography variant="body2" color="text.secondary" paragraph>
-                  Importa reservas desde un archivo Excel. El archivo debe tener el formato adecuado.
+                <Typography variant="body2">
+                  {resumenSincronizacion(bookingResult)}
                 </Typography>
+              </Box>
+            )}
+          </Card>
+        </Grid>
 
-                <Grid container spacing={2}>
-                  <Grid item xs={12} md={6}>
-                    <FormControl fullWidth>
-                      <InputLabel id="propiedad-excel-label">Propiedad</InputLabel>
-                      <Select
-                        labelId="propiedad-excel-label"
-                        id="propiedad-excel"
-                        value={propiedadExcel}
-                        onChange={(e) => setPropiedadExcel(e.target.value)}
-                        label="Propiedad"
-                      >
-                        {propiedades.map((propiedad) => (
-                          <MenuItem key={propiedad.id} value={propiedad.id}>
-                            {propiedad.nombre}
-                          </MenuItem>
-                        ))}
-                      </Select>
-                    </FormControl>
-                  </Grid>
-                  <Grid item xs={12} md={6}>
-                    <TextField
-                      fullWidth
-                      label="Ruta del archivo Excel"
-                      value={excelFilePath}
-                      onChange={(e) => setExcelFilePath(e.target.value)}
-                      helperText="Ej: /home/usuario/reservas.xlsx"
-                    />
-                  </Grid>
+        {/* Tarjeta de importación de Excel */}
+        <Grid item xs={12}>
+          <Card elevation={3}>
+            <CardContent>
+              <Typography variant="h5" component="div" gutterBottom>
+                Importar desde Excel
+              </Typography>
+              <Typography variant="body2" color="text.secondary" paragraph>
+                Importa reservas desde un archivo Excel. El archivo debe tener el formato adecuado.
+              </Typography>
+
+              <Grid container spacing={2}>
+                <Grid item xs={12} md={6}>
+                  <FormControl fullWidth>
+                    <InputLabel id="propiedad-excel-label">Propiedad</InputLabel>
+                    <Select
+                      labelId="propiedad-excel-label"
+                      id="propiedad-excel"
+                      value={propiedadExcel}
+                      onChange={(e) => setPropiedadExcel(e.target.value)}
+                      label="Propiedad"
+                    >
+                      {propiedades.map((propiedad) => (
+                        <MenuItem key={propiedad.id} value={propiedad.id}>
+                          {propiedad.nombre}
+                        </MenuItem>
+                      ))}
+                    </Select>
+                  </FormControl>
                 </Grid>
-              </CardContent>
-              <CardActions>
-                <Button 
-                  variant="contained" 
-                  color="primary" 
-                  fullWidth
-                  onClick={handleImportExcel}
-                  disabled={isImportingExcel || !propiedadExcel || !excelFilePath}
-                >
-                  {isImportingExcel ? <CircularProgress size={24} /> : 'Importar desde Excel'}
-                </Button>
-              </CardActions>
-              
-              {excelResult && (
-                <Box sx={{ p: 2 }}>
-                  <Divider sx={{ my: 1 }} />
-                  <Typography variant="subtitle1" gutterBottom>
-                    Resultado de la importación:
-                  </Typography>
-                  <Typography variant="body2">
-                    {excelResult.mensaje}
-                  </Typography>
-                </Box>
-              )}
-            </Card>
-          </Grid>
+                <Grid item xs={12} md={6}>
+                  <TextField
+                    fullWidth
+                    label="Ruta del archivo Excel"
+                    value={excelFilePath}
+                    onChange={(e) => setExcelFilePath(e.target.value)}
+                    helperText="Ej: /home/usuario/reservas.xlsx"
+                  />
+                </Grid>
+              </Grid>
+            </CardContent>
+            <CardActions>
+              <Button 
+                variant="contained" 
+                color="primary" 
+                fullWidth
+                onClick={handleImportExcel}
+                disabled={isImportingExcel || !propiedadExcel || !excelFilePath}
+              >
+                {isImportingExcel ? <CircularProgress size={24} /> : 'Importar desde Excel'}
+              </Button>
+            </CardActions>
+            
+            {excelResult && (
+              <Box sx={{ p: 2 }}>
+                <Divider sx={{ my: 1 }} />
+                <Typography variant="subtitle1" gutterBottom>
+                  Resultado de la importación:
+                </Typography>
+                <Typography variant="body2">
+                  {excelResult.mensaje}
+                </Typography>
+              </Box>
+            )}
+          </Card>
         </Grid>
+      </Grid>
 
-        {/* Diálogo de configuración de APIs */}
-        <Dialog open={openDialog} onClose={handleCloseDialog}>
-          <DialogTitle>Configuración de APIs</DialogTitle>
-          <DialogContent>
-            <DialogContentText>
-              Para sincronizar con Airbnb y Booking, necesitas configurar las claves de API en el servidor.
-              Contacta con el administrador del sistema para obtener y configurar estas claves.
-            </DialogContentText>
-            <List>
-              <ListItem>
-                <ListItemText 
-                  primary="API de Airbnb" 
-                  secondary={apiStatus.airbnb ? "Configurada correctamente" : "No configurada"}
-                />
-              </ListItem>
-              <ListItem>
-                <ListItemText 
-                  primary="API de Booking" 
-                  secondary={apiStatus.booking ? "Configurada correctamente" : "No configurada"}
-                />
-              </ListItem>
-            </List>
-            <DialogContentText sx={{ mt: 2 }}>
-              Una vez obtenidas las claves de API, deberás actualizar el archivo .env en el servidor
-              con los siguientes valores:
-            </DialogContentText>
-            <Box component="pre" sx={{ bgcolor: '#f5f5f5', p: 2, borderRadius: 1, mt: 1 }}>
-              AIRBNB_API_KEY=tu_clave_de_airbnb_aqui
-              AIRBNB_API_URL=url_de_la_api_de_airbnb
-              
-              BOOKING_API_KEY=tu_clave_de_booking_aqui
-              BOOKING_API_URL=url_de_la_api_de_booking
-            </Box>
-          </DialogContent>
-          <DialogActions>
-            <Button onClick={handleCloseDialog}>Cerrar</Button>
-          </DialogActions>
-        </Dialog>
+      {/* Diálogo de configuración de APIs */}
+      <Dialog open={openDialog} onClose={handleCloseDialog}>
+        <DialogTitle>Configuración de APIs</DialogTitle>
+        <DialogContent>
+          <DialogContentText>
+            Para sincronizar con Airbnb y Booking, necesitas configurar las claves de API en el servidor.
+            Contacta con el administrador del sistema para obtener y configurar estas claves.
+          </DialogContentText>
+          <List>
+            <ListItem>
+              <ListItemText 
+                primary="API de Airbnb" 
+                secondary={apiStatus.airbnb ? "Configurada correctamente" : "No configurada"}
+              />
+            </ListItem>
+            <ListItem>
+              <ListItemText 
+                primary="API de Booking" 
+                secondary={apiStatus.booking ? "Configurada correctamente" : "No configurada"}
+              />
+            </ListItem>
+          </List>
+          <DialogContentText sx={{ mt: 2 }}>
+            Una vez obtenidas las claves de API, deberás actualizar el archivo .env en el servidor
+            con los siguientes valores:
+          </DialogContentText>
+          <Box component="pre" sx={{ bgcolor: '#f5f5f5', p: 2, borderRadius: 1, mt: 1 }}>
+            AIRBNB_API_KEY=tu_clave_de_airbnb_aqui
+            AIRBNB_API_URL=url_de_la_api_de_airbnb
+            
+            BOOKING_API_KEY=tu_clave_de_booking_aqui
+            BOOKING_API_URL=url_de_la_api_de_booking
+          </Box>
+        </DialogContent>
+        <DialogActions>
+          <Button onClick={handleCloseDialog}>Cerrar</Button>
+        </DialogActions>
+      </Dialog>
 
-        {/* Snackbar para notificaciones */}
-        <Snackbar
-          open={openSnackbar}
-          autoHideDuration={6000}
-          onClose={handleCloseSnackbar}
-          anchorOrigin={{ vertical: 'bottom', horizontal: 'right' }}
-        >
-          <Alert onClose={handleCloseSnackbar} severity={snackbarSeverity}>
-            {snackbarMessage}
-          </Alert>
-        </Snackbar>
-      </Container>
-    </LocalizationProvider>
+      {/* Snackbar para notificaciones */}
+      <Snackbar
+        open={openSnackbar}
+        autoHideDuration={6000}
+        onClose={handleCloseSnackbar}
+        anchorOrigin={{ vertical: 'bottom', horizontal: 'right' }}
+      >
+        <Alert onClose={handleCloseSnackbar} severity={snackbarSeverity}>
+          {snackbarMessage}
+        </Alert>
+      </Snackbar>
+    </Container>
   );
 };
 
@@ -60,8 +60,9 @@ export const cajaService = {
 
 // Servicios para integraciones
 export const integracionesService = {
-  syncAirbnb: (data) => api.post('/integraciones/airbnb/sync', data),
-  syncBooking: (data) => api.post('/integraciones/booking/sync', data),
+  // Sincronización incremental: el backend trae lo modificado desde la última sincronización
+  syncAirbnb: (propiedadId) => api.post('/integraciones/airbnb/sync', null, { params: { propiedad_id: propiedadId } }),
+  syncBooking: (propiedadId) => api.post('/integraciones/booking/sync', null, { params: { propiedad_id: propiedadId } }),
   importarExcel: (data) => api.post('/integraciones/importar-excel', data),
 };
 